@@ -0,0 +1,140 @@
+"""
+Benchmark de introspección del esquema: consultas por tabla vs consultas por lotes.
+
+Genera en una base de datos de pruebas un esquema sintético (por defecto 1000 tablas
+encadenadas con claves foráneas e índices secundarios) y mide, para cada estrategia,
+el tiempo total y el número de viajes a MySQL. Comprueba además que ambas producen
+exactamente la misma estructura.
+
+Uso (desde la raíz del proyecto, con las credenciales del .env):
+
+    uv run python -m benchmarks.schema_introspection --tables 1000
+
+El usuario necesita permisos para crear y eliminar la base de datos indicada en
+--database (por defecto mcp_bench_schema); se elimina al terminar salvo con --keep.
+"""
+import argparse
+import os
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--tables", type=int, default=1000, help="Número de tablas a generar")
+    parser.add_argument("--database", default="mcp_bench_schema", help="Base de datos de pruebas")
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticiones por estrategia")
+    parser.add_argument("--keep", action="store_true", help="No eliminar la base de datos al terminar")
+    return parser.parse_args()
+
+
+def generate_schema(cursor, num_tables: int):
+    """Crea num_tables tablas; cada una referencia a la anterior y tiene un índice secundario"""
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+    for i in range(num_tables):
+        fk = ""
+        if i > 0:
+            fk = (f", parent_id INT NULL, INDEX idx_parent_{i} (parent_id), "
+                  f"CONSTRAINT fk_bench_{i} FOREIGN KEY (parent_id) REFERENCES bench_{i - 1} (id)")
+        cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS bench_{i} (
+            id INT PRIMARY KEY AUTO_INCREMENT,
+            name VARCHAR(100) NOT NULL,
+            amount DECIMAL(10, 2) DEFAULT 0,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_name_{i} (name){fk}
+        ) ENGINE=InnoDB
+        """)
+    cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+
+
+class RoundTripCounter:
+    """Envuelve execute_query del conector para contar los viajes a MySQL"""
+
+    def __init__(self, db):
+        self.db = db
+        self.count = 0
+        self._original = db.execute_query
+
+    def __enter__(self):
+        def counted(query, params=None):
+            self.count += 1
+            return self._original(query, params)
+        self.db.execute_query = counted
+        return self
+
+    def __exit__(self, *exc):
+        self.db.execute_query = self._original
+        return False
+
+
+def measure(db, label: str, strategy, repeat: int):
+    timings = []
+    result = None
+    trips = 0
+    for _ in range(repeat):
+        with RoundTripCounter(db) as counter:
+            start = time.perf_counter()
+            result = strategy()
+            timings.append(time.perf_counter() - start)
+        trips = counter.count
+    best = min(timings)
+    print(f"{label:<12} mejor {best:8.3f}s  media {sum(timings) / len(timings):8.3f}s  viajes {trips}")
+    return result, best
+
+
+def main():
+    args = parse_args()
+
+    # La base de datos de pruebas se fija antes de importar el conector
+    os.environ["DATABASE_MYSQL"] = args.database
+    from core import MySQLConnector
+    from features.information.services.get_information import (
+        get_all_tables_safe,
+        get_table_details,
+        get_tables_details,
+    )
+
+    import mysql.connector
+    conn = mysql.connector.connect(
+        user=os.getenv("USER_BD"),
+        password=os.getenv("PASSWORD_BD"),
+        host=os.getenv("HOST_DB"),
+    )
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{args.database}`")
+    conn.database = args.database
+
+    try:
+        with MySQLConnector() as db:
+            existing = get_all_tables_safe(db) or []
+            if len(existing) < args.tables:
+                print(f"Generando {args.tables} tablas en {args.database}...")
+                start = time.perf_counter()
+                generate_schema(cursor, args.tables)
+                print(f"Esquema generado en {time.perf_counter() - start:.1f}s")
+
+            tables = get_all_tables_safe(db)
+            print(f"Tablas: {len(tables)}\n")
+
+            per_table, per_table_time = measure(
+                db, "por tabla",
+                lambda: {table: get_table_details(db, table) for table in tables},
+                args.repeat,
+            )
+            batched, batched_time = measure(
+                db, "por lotes",
+                lambda: get_tables_details(db, tables, all_tables=True),
+                args.repeat,
+            )
+
+            print(f"\nMejora: x{per_table_time / batched_time:.1f}")
+            print("Resultados idénticos:", per_table == batched)
+    finally:
+        if not args.keep:
+            cursor.execute(f"DROP DATABASE IF EXISTS `{args.database}`")
+        cursor.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,13 @@
 from .conector_mysql import MySQLConnector
+from .pool_mysql import ConnectionPool, PoolTimeoutError, get_pool, get_pools_stats
+from .async_connector import AsyncMySQLConnector, run_blocking, get_executor
+from .query_watchdog import QueryControl, QueryWatchdog, kill_query
+from .bulk_loader import BulkLoader, iter_records
+from .table_exporter import TableExporter, export_tables
+from .row_count import count_rows, row_counts, get_row_count_stats
+from .result_cache import ResultCache, result_cache, get_cache_stats
+from .sql_classifier import StatementInfo, classify, get_classifier_stats
+from .replica_router import ReplicaRouter, get_router, get_replication_stats
 from .base_tool import BaseTool
 
-__all__ = ["MySQLConnector","BaseTool"]
\ No newline at end of file
+__all__ = ["MySQLConnector","BaseTool","ConnectionPool","PoolTimeoutError","get_pool","get_pools_stats","AsyncMySQLConnector","run_blocking","get_executor","QueryControl","QueryWatchdog","kill_query","BulkLoader","iter_records","TableExporter","export_tables","count_rows","row_counts","get_row_count_stats","ResultCache","result_cache","get_cache_stats","ReplicaRouter","get_router","get_replication_stats","StatementInfo","classify","get_classifier_stats"]
\ No newline at end of file
@@ -0,0 +1,89 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from .conector_mysql import MySQLConnector
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Executor acotado dedicado a la E/S bloqueante de MySQL.
+
+    Su tamaño coincide con el máximo del pool de conexiones (o DB_EXECUTOR_WORKERS),
+    de modo que ningún hilo queda esperando una conexión que nunca llegará y el
+    event loop de FastMCP nunca ejecuta llamadas bloqueantes.
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = os.getenv("DB_EXECUTOR_WORKERS") or os.getenv("POOL_MAX_SIZE") or 10
+                _executor = ThreadPoolExecutor(
+                    max_workers=max(1, int(workers)), thread_name_prefix="mysql-io"
+                )
+    return _executor
+
+
+async def run_blocking(func: Callable, *args, **kwargs) -> Any:
+    """
+    Ejecuta una función bloqueante en el executor de base de datos
+
+    La función se ejecuta con una copia del contexto de la tarea, así el hilo ve
+    las variables de contexto de la petición (p. ej. la sesión MCP que usa el
+    enrutado a réplicas).
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+
+class AsyncMySQLConnector:
+    """
+    Versión asíncrona de MySQLConnector.
+
+    Toma una conexión propia del pool y ejecuta cada método del conector en el
+    executor de base de datos:
+
+        async with AsyncMySQLConnector() as db:
+            rows = await db.select("clientes", limit=10)
+    """
+
+    def __init__(self):
+        self._db = MySQLConnector()
+
+    @property
+    def sync(self) -> MySQLConnector:
+        """Conector síncrono subyacente (para usarlo dentro de run_blocking)"""
+        return self._db
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.disconnect()
+        return False
+
+    async def connect(self) -> bool:
+        return await run_blocking(self._db.connect)
+
+    async def disconnect(self):
+        await run_blocking(self._db.disconnect)
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._db, name)
+        if not callable(attr):
+            return attr
+
+        async def wrapper(*args, **kwargs):
+            return await run_blocking(attr, *args, **kwargs)
+
+        wrapper.__name__ = name
+        wrapper.__doc__ = attr.__doc__
+        return wrapper
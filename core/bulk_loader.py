@@ -0,0 +1,407 @@
+import base64
+import csv
+import gzip
+import json
+import os
+import tempfile
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import mysql.connector
+from mysql.connector import Error
+
+# Sentencias por transacción y tamaño de cada INSERT multi-fila
+BULK_COMMIT_CHUNKS = int(os.getenv("BULK_COMMIT_CHUNKS", 10))
+BULK_MAX_CHUNK_ROWS = int(os.getenv("BULK_MAX_CHUNK_ROWS", 10000))
+# Fracción de max_allowed_packet que puede ocupar un INSERT (margen para el escapado)
+BULK_PACKET_RATIO = float(os.getenv("BULK_PACKET_RATIO", 0.8))
+
+# Con LOAD DATA el fichero viaja en varios paquetes: los lotes pueden ser mayores
+_LOAD_DATA_CHUNK_BYTES = 16 * 1024 * 1024
+_READ_CHUNK = 64 * 1024
+# Código de MySQL/cliente cuando LOAD DATA LOCAL está deshabilitado
+_LOCAL_INFILE_DISABLED = (1148, 2068, 3948, 3950)
+
+# Valor NULL en CSV (mismo convenio que LOAD DATA / SELECT ... INTO OUTFILE)
+CSV_NULL = "\\N"
+
+
+# ========== LECTURA EN STREAMING ==========
+
+def _open_text(file_path: str):
+    """Abre un fichero de texto UTF-8, descomprimiendo al vuelo si termina en .gz"""
+    if file_path.endswith(".gz"):
+        return gzip.open(file_path, "rt", encoding="utf-8", newline="")
+    return open(file_path, "r", encoding="utf-8", newline="")
+
+
+def detect_format(file_path: str) -> str:
+    """Formato de un fichero de datos por su extensión: json, jsonl o csv"""
+    name = file_path[:-3] if file_path.endswith(".gz") else file_path
+    extension = os.path.splitext(name)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    if extension == ".csv":
+        return "csv"
+    # .json puede ser un array o un registro por línea: se mira el primer carácter
+    with _open_text(file_path) as f:
+        while True:
+            char = f.read(1)
+            if not char or not char.isspace():
+                return "json" if char in ("[", "") else "jsonl"
+
+
+def _iter_json_array(f) -> Iterator[Any]:
+    """Decodifica uno a uno los elementos de un array JSON sin cargar el fichero"""
+    decoder = json.JSONDecoder()
+    buffer, pos = "", 0
+    started = eof = False
+    while True:
+        while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ",")):
+            pos += 1
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("Se esperaba un array JSON")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                # Un número al final del bloque puede continuar en el siguiente
+                if end < len(buffer) or eof or isinstance(item, (dict, list)):
+                    yield item
+                    pos = end
+                    continue
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+        elif eof:
+            if started:
+                raise ValueError("Array JSON incompleto")
+            return
+        chunk = f.read(_READ_CHUNK)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+
+def iter_records(file_path: str, file_format: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Lee un fichero de registros en streaming, uno a uno
+
+    Formatos: json (array de objetos), jsonl (un objeto por línea) y csv (con
+    cabecera; \\N es NULL). Los ficheros .gz se descomprimen al vuelo. Los
+    binarios van como {"b64": ...} y se decodifican al cargarlos.
+    """
+    file_format = file_format or detect_format(file_path)
+    with _open_text(file_path) as f:
+        if file_format == "csv":
+            for row in csv.DictReader(f):
+                yield {key: (None if value == CSV_NULL else value) for key, value in row.items()}
+        elif file_format == "jsonl":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        elif file_format == "json":
+            yield from _iter_json_array(f)
+        else:
+            raise ValueError(f"Formato no soportado: {file_format} (use json, jsonl o csv)")
+
+
+# ========== CARGA ==========
+
+def quote_identifier(name: str) -> str:
+    """Entrecomilla un identificador (admite esquema.tabla)"""
+    return ".".join(f"`{part.replace('`', '``')}`" for part in name.split("."))
+
+
+def _db_value(value: Any) -> Any:
+    # Binarios exportados por TableExporter como {"b64": ...}
+    if isinstance(value, dict) and len(value) == 1 and isinstance(value.get("b64"), str):
+        return base64.b64decode(value["b64"])
+    # Objetos y listas (columnas JSON) se envían como texto JSON
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def _value_bytes(value: Any) -> int:
+    """Tamaño aproximado del literal SQL de un valor"""
+    if value is None:
+        return 4
+    if isinstance(value, str):
+        return len(value.encode("utf-8")) + 3
+    if isinstance(value, (bytes, bytearray)):
+        return 2 * len(value) + 12
+    return len(str(value)) + 1
+
+
+def _infile_field(value: Any) -> bytes:
+    """Campo en el formato por defecto de LOAD DATA (tabulado, escapado con \\)"""
+    if value is None:
+        return b"\\N"
+    if isinstance(value, bool):
+        return b"1" if value else b"0"
+    if isinstance(value, (bytes, bytearray)):
+        data = bytes(value)
+    elif isinstance(value, datetime):
+        data = value.isoformat(sep=" ").encode()
+    elif isinstance(value, (date, dt_time, timedelta, Decimal)):
+        data = str(value).encode()
+    else:
+        data = str(value).encode("utf-8")
+    return (data.replace(b"\\", b"\\\\").replace(b"\t", b"\\t").replace(b"\n", b"\\n")
+            .replace(b"\r", b"\\r").replace(b"\0", b"\\0"))
+
+
+class BulkLoader:
+    """
+    Carga masiva de registros en una tabla con memoria constante.
+
+    Los registros se agrupan en lotes cuyo INSERT multi-fila cabe en
+    max_allowed_packet (o en ficheros temporales para LOAD DATA LOCAL INFILE) y se
+    confirma una transacción cada `commit_every` lotes. Tras cada commit se anota
+    el progreso, de modo que una carga interrumpida de un fichero se reanuda desde
+    el último registro confirmado.
+
+    Los registros consecutivos con las mismas claves comparten sentencia; si
+    cambian las columnas se cierra el lote y se empieza otro.
+    """
+
+    def __init__(self, table: str, commit_every: int = BULK_COMMIT_CHUNKS,
+                 max_chunk_rows: int = BULK_MAX_CHUNK_ROWS, chunk_bytes: Optional[int] = None,
+                 use_load_data: bool = False):
+        self.table = table
+        self.commit_every = max(1, commit_every)
+        self.max_chunk_rows = max(1, max_chunk_rows)
+        self.chunk_bytes = chunk_bytes
+        self.use_load_data = use_load_data
+        self.method = "load_data" if use_load_data else "insert"
+        self._infile = None
+        self._chunk_bytes = chunk_bytes or 0
+
+    def _max_allowed_packet(self, conn) -> int:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT @@max_allowed_packet")
+            return int(cursor.fetchone()[0])
+        finally:
+            cursor.close()
+
+    def _chunks(self, records: Iterable[Dict[str, Any]], chunk_bytes: int) -> Iterator[Tuple[List[str], List[tuple]]]:
+        """Agrupa los registros en lotes (columnas, filas) acotados en filas y bytes"""
+        columns: List[str] = []
+        keys = None
+        rows: List[tuple] = []
+        used_bytes = 0
+        for record in records:
+            if keys is None or record.keys() != keys:
+                if rows:
+                    yield columns, rows
+                columns, keys = list(record.keys()), record.keys()
+                rows, used_bytes = [], 0
+            row = tuple(_db_value(record[column]) for column in columns)
+            size = sum(_value_bytes(value) for value in row) + 3
+            # Se consulta en cada fila: LOAD DATA puede pasar a INSERT a mitad de la carga
+            if self.method == "load_data":
+                full = used_bytes + size > max(chunk_bytes, _LOAD_DATA_CHUNK_BYTES)
+            else:
+                full = used_bytes + size > chunk_bytes or len(rows) >= self.max_chunk_rows
+            if rows and full:
+                yield columns, rows
+                rows, used_bytes = [], 0
+            rows.append(row)
+            used_bytes += size
+        if rows:
+            yield columns, rows
+
+    def _insert_chunk(self, cursor, columns: List[str], rows: List[tuple]):
+        column_list = ", ".join(quote_identifier(column) for column in columns)
+        placeholders = ", ".join(["%s"] * len(columns))
+        # executemany reescribe el INSERT en una única sentencia multi-fila
+        cursor.executemany(
+            f"INSERT INTO {quote_identifier(self.table)} ({column_list}) VALUES ({placeholders})", rows
+        )
+
+    def _load_data_chunk(self, cursor, columns: List[str], rows: List[tuple]):
+        if self._infile is None:
+            self._infile = tempfile.NamedTemporaryFile(prefix="mcp_bulk_", suffix=".tsv", delete=False)
+        f = self._infile
+        f.seek(0)
+        f.truncate()
+        for row in rows:
+            f.write(b"\t".join(_infile_field(value) for value in row) + b"\n")
+        f.flush()
+        column_list = ", ".join(quote_identifier(column) for column in columns)
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE %s INTO TABLE {quote_identifier(self.table)} CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' ({column_list})",
+            (f.name,)
+        )
+
+    def _close_infile(self):
+        if self._infile is not None:
+            try:
+                self._infile.close()
+                os.unlink(self._infile.name)
+            except OSError:
+                pass
+            self._infile = None
+
+    def _write_chunk(self, cursor, columns: List[str], rows: List[tuple]):
+        if self.method == "load_data":
+            try:
+                self._load_data_chunk(cursor, columns, rows)
+                return
+            except Error as e:
+                if getattr(e, "errno", None) not in _LOCAL_INFILE_DISABLED:
+                    raise
+                print(f"⚠️ LOAD DATA LOCAL INFILE no disponible ({e}); se continúa con INSERT multi-fila")
+                self.method = "insert"
+                # El lote se preparó para LOAD DATA: se vuelve a partir según max_allowed_packet
+                records = (dict(zip(columns, row)) for row in rows)
+                for sub_columns, sub_rows in self._chunks(records, self._chunk_bytes):
+                    self._insert_chunk(cursor, sub_columns, sub_rows)
+                return
+        self._insert_chunk(cursor, columns, rows)
+
+    def load(self, records: Iterable[Dict[str, Any]], connector=None,
+             on_commit=None) -> Optional[Dict[str, Any]]:
+        """
+        Inserta los registros en la tabla
+
+        Args:
+            records: Iterable de diccionarios columna -> valor (se consume en streaming)
+            connector: MySQLConnector a usar (por defecto uno nuevo del pool);
+                con LOAD DATA se abre una conexión aparte con allow_local_infile
+            on_commit: Función llamada con el número de registros confirmados tras cada commit
+
+        Returns:
+            Dict con rows, chunks, commits, method, execution_time y rows_per_second,
+            o None si falló (lo confirmado hasta el último commit se conserva)
+        """
+        from .conector_mysql import MySQLConnector
+
+        start_time = time.time()
+        db = connector or MySQLConnector()
+        owns_connector = connector is None
+        direct = None
+        cursor = None
+        stats = {"rows": 0, "chunks": 0, "commits": 0}
+        pending = 0
+        try:
+            if self.use_load_data:
+                # El pool no habilita allow_local_infile: se usa una conexión propia
+                direct = mysql.connector.connect(**db.config, allow_local_infile=True)
+                conn = direct
+            else:
+                if not db.connect():
+                    return None
+                conn = db.conn
+            self._chunk_bytes = self.chunk_bytes or int(self._max_allowed_packet(conn) * BULK_PACKET_RATIO)
+            cursor = conn.cursor()
+            for columns, rows in self._chunks(records, self._chunk_bytes):
+                self._write_chunk(cursor, columns, rows)
+                stats["chunks"] += 1
+                pending += len(rows)
+                if stats["chunks"] % self.commit_every == 0:
+                    conn.commit()
+                    stats["commits"] += 1
+                    stats["rows"] += pending
+                    pending = 0
+                    if on_commit:
+                        on_commit(stats["rows"])
+            if pending:
+                conn.commit()
+                stats["commits"] += 1
+                stats["rows"] += pending
+                if on_commit:
+                    on_commit(stats["rows"])
+        except Exception as e:
+            print(f"❌ Error en carga masiva en {self.table}: {e} ({stats['rows']} registros confirmados)")
+            try:
+                (direct or db.conn).rollback()
+            except Exception:
+                pass
+            return None
+        finally:
+            self._close_infile()
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+            if direct is not None:
+                direct.close()
+            if owns_connector:
+                db.disconnect()
+
+        elapsed = time.time() - start_time
+        stats["method"] = self.method
+        stats["execution_time"] = elapsed
+        stats["rows_per_second"] = round(stats["rows"] / elapsed, 1) if elapsed > 0 else None
+        return stats
+
+    # ========== CARGA DESDE FICHERO ==========
+
+    @staticmethod
+    def progress_path(file_path: str, table: str) -> str:
+        return f"{file_path}.{table}.progress.json"
+
+    def _read_progress(self, progress_file: str, source: Dict[str, Any]) -> int:
+        """Registros ya confirmados de una carga anterior del mismo fichero (0 si no hay)"""
+        try:
+            with open(progress_file, "r", encoding="utf-8") as f:
+                progress = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if any(progress.get(key) != value for key, value in source.items()):
+            # El fichero cambió desde la carga interrumpida: se empieza de cero
+            return 0
+        return int(progress.get("records", 0))
+
+    def _write_progress(self, progress_file: str, source: Dict[str, Any], records: int):
+        temp_file = progress_file + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump({**source, "records": records}, f)
+        os.replace(temp_file, progress_file)
+
+    def load_file(self, file_path: str, file_format: Optional[str] = None, resume: bool = True,
+                  connector=None) -> Optional[Dict[str, Any]]:
+        """
+        Carga un fichero json/jsonl/csv (opcionalmente .gz) en la tabla
+
+        El progreso se guarda junto al fichero tras cada commit y se elimina al
+        terminar; con resume=True una carga interrumpida salta los registros ya
+        confirmados en lugar de volver a insertarlos.
+        """
+        stat = os.stat(file_path)
+        source = {
+            "source": os.path.abspath(file_path),
+            "table": self.table,
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+        }
+        progress_file = self.progress_path(file_path, self.table)
+        skip = self._read_progress(progress_file, source) if resume else 0
+
+        records = iter_records(file_path, file_format)
+        for _ in range(skip):
+            if next(records, None) is None:
+                break
+
+        stats = self.load(
+            records,
+            connector=connector,
+            on_commit=lambda committed: self._write_progress(progress_file, source, skip + committed)
+        )
+        if stats is not None:
+            stats["skipped"] = skip
+            try:
+                os.remove(progress_file)
+            except OSError:
+                pass
+        return stats
@@ -2,35 +2,80 @@ from dotenv import load_dotenv
 import os
 import mysql.connector
 from mysql.connector import Error
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Optional, Union, Iterator, Iterable
 import json
+import base64
+import hashlib
+import re
 from datetime import datetime
+from .pool_mysql import get_pool
+from .bulk_loader import BulkLoader, quote_identifier
+from .table_exporter import TableExporter, export_tables, primary_key_columns, encode_key, decode_key
+from .row_count import count_rows, estimate_rows
+from .result_cache import invalidate_tables, invalidate_for_write
+from .replica_router import get_router
+from .sql_classifier import classify
 
 load_dotenv()
 
+# Operadores del modo booleano de FULLTEXT que no deben llegar desde el término buscado
+_FULLTEXT_SPECIAL_RE = re.compile(r'[+\-<>()~*"@]')
+
+# Elemento de un ORDER BY admitido por la paginación keyset: columna [ASC|DESC]
+_ORDER_ITEM_RE = re.compile(r"^([\w$]+(?:\.[\w$]+)?)(?:\s+(ASC|DESC))?$", re.IGNORECASE)
+
 class MySQLConnector:
-    _instance = None
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(MySQLConnector, cls).__new__(cls)
-            cls._instance._initialized = False
-        return cls._instance
+    """
+    Conector MySQL respaldado por un pool de conexiones compartido.
+
+    Cada instancia toma prestada su propia conexión y cursor del pool al conectar
+    y los devuelve al desconectar, por lo que peticiones concurrentes no comparten
+    ni cierran conexiones ajenas.
+
+    Por defecto usa el servidor primario; MySQLConnector.for_query envía las
+    lecturas a una réplica (MYSQL_REPLICAS) cuando hay alguna disponible.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.primary_config = self.primary()
+        self.config = config or self.primary_config
+        self.pool = get_pool(self.config)
+        self._pooled = None
+        self.conn = None
+        self.cursor = None
+        self.last_cursor = None
+        self._initialized = True
     
-    def __init__(self):
-        if self._initialized:
-            return
-            
-        self.config = {
+    @staticmethod
+    def primary() -> Dict[str, Any]:
+        """Configuración del servidor primario (variables de entorno)"""
+        return {
             "user": os.getenv("USER_BD"),
             "password": os.getenv("PASSWORD_BD"),
             "host": os.getenv("HOST_DB"),
             "database": os.getenv("DATABASE_MYSQL"),
         }
-        self.conn = None
-        self.cursor = None
-        self._initialized = True
-    
+
+    @classmethod
+    def for_query(cls, query: str) -> "MySQLConnector":
+        """
+        Conector para ejecutar `query`: una réplica si es una lectura sin bloqueos
+        y la sesión no ha escrito hace poco; el primario en cualquier otro caso
+        """
+        return cls(get_router(cls.primary()).route(query))
+
+    @property
+    def router(self):
+        return get_router(self.primary_config)
+
+    def note_write(self):
+        """Las lecturas siguientes de la sesión irán al primario (leer lo escrito)"""
+        self.router.note_write()
+
+    def invalidate_cached(self, tables: List[str]):
+        """Descarta los resultados y conteos cacheados de las tablas tras una escritura"""
+        invalidate_tables(tables)
+
     def __enter__(self):
         """Context manager entrada"""
         self.connect()
@@ -42,43 +87,59 @@ class MySQLConnector:
         return False  # No suprimir excepciones
     
     def connect(self):
+        """Toma prestada una conexión del pool si la instancia aún no tiene una"""
         try:
-            if not self.conn or not self.conn.is_connected():
-                self.conn = mysql.connector.connect(**self.config)
+            if self._pooled is None:
+                try:
+                    self._pooled = self.pool.acquire()
+                except Error as e:
+                    if self.config is self.primary_config:
+                        raise
+                    # Réplica inaccesible: se saca del reparto y se lee del primario
+                    print(f"⚠️ Réplica {self.config.get('host')} no disponible, se usa el primario: {e}")
+                    self.router.mark_failed(self.config)
+                    self.config = self.primary_config
+                    self.pool = get_pool(self.config)
+                    self._pooled = self.pool.acquire()
+                self.conn = self._pooled.conn
                 self.cursor = self.conn.cursor(dictionary=True)
-                print("✅ Conexión establecida a MySQL")
             return True
         except Error as e:
             print(f"❌ Error de conexión: {e}")
             return False
     
     def disconnect(self):
+        """Cierra el cursor y devuelve la conexión al pool"""
         try:
             # Cerrar cursor si existe y es válido
-            if hasattr(self, 'cursor') and self.cursor is not None:
+            if getattr(self, 'cursor', None) is not None:
                 try:
-                    if hasattr(self.cursor, 'close'):
-                        self.cursor.close()
-                except (ReferenceError, AttributeError):
-                    pass  # El objeto ya fue destruido
+                    self.cursor.close()
+                except Exception:
+                    pass  # El cursor ya no es utilizable
                 finally:
                     self.cursor = None
             
-            # Cerrar conexión si existe y es válida
-            if hasattr(self, 'conn') and self.conn is not None:
-                try:
-                    if hasattr(self.conn, 'is_connected') and self.conn.is_connected():
-                        self.conn.close()
-                        print("🔌 Conexión cerrada")
-                except (ReferenceError, AttributeError):
-                    pass  # El objeto ya fue destruido
-                finally:
-                    self.conn = None
+            # Devolver la conexión al pool
+            pooled = getattr(self, '_pooled', None)
+            if pooled is not None:
+                self._pooled = None
+                self.conn = None
+                self.pool.release(pooled)
                     
         except Exception:
             # Silenciar cualquier otro error de cierre
             pass
     
+    def invalidate(self):
+        """Cierra la conexión física en lugar de devolverla al pool"""
+        pooled = self._pooled
+        self._pooled = None
+        self.cursor = None
+        self.conn = None
+        if pooled is not None:
+            self.pool.discard(pooled)
+    
     def normalize_keys(self, data):
         """Normaliza las claves de un diccionario o lista de diccionarios a minúsculas"""
         if isinstance(data, dict):
@@ -87,25 +148,95 @@ class MySQLConnector:
             return [self.normalize_keys(item) for item in data]
         return data
     
+    def statement_cursor(self, query: str, params=None, dictionary: bool = True):
+        """
+        Cursor con el que ejecutar una sentencia: (texto SQL a pasarle, cursor, preparado)
+
+        Las consultas con parámetros posicionales usan una sentencia preparada en el
+        servidor, reutilizada entre ejecuciones del mismo SQL en esta conexión (protocolo
+        binario, sin volver a analizar la sentencia); el resto usan un cursor normal.
+        Los cursores preparados pertenecen a la conexión y no deben cerrarse.
+        """
+        if params and isinstance(params, (tuple, list)) and self.pool.statement_cache_size:
+            query, cursor = self.pool.prepared_cursor(self._pooled, query, dictionary)
+            return query, cursor, True
+        return query, (self.cursor if dictionary else self.conn.cursor()), False
+    
+    def forget_statement(self, query: str, dictionary: bool = True):
+        """Descarta la sentencia preparada de `query` tras un error"""
+        if self._pooled is not None:
+            self.pool.forget_prepared(self._pooled, query, dictionary)
+    
     def execute_query(self, query, params=None):
         if not self.connect():
             return None
             
         try:
-            self.cursor.execute(query, params or ())
+            info = classify(query)
+            query, cursor, _ = self.statement_cursor(query, params)
+            # Cursor de la última sentencia (lastrowid puede estar en un cursor preparado)
+            self.last_cursor = cursor
+            cursor.execute(query, params or ())
             
-            if query.strip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')):
+            if info.modifies_data:
                 self.conn.commit()
-                return self.cursor.rowcount
+                self.note_write()
+                invalidate_for_write(query)
+                return cursor.rowcount
+            elif not cursor.with_rows:
+                # DDL y demás sentencias sin resultado (CREATE INDEX, SET...)
+                if info.is_ddl:
+                    invalidate_for_write(query)
+                return cursor.rowcount
             else:
-                result = self.cursor.fetchall()
+                result = cursor.fetchall()
                 # Normalizar claves a minúsculas
                 return self.normalize_keys(result)
         except Error as e:
             print(f"❌ Error en consulta: {e}")
+            self.forget_statement(query)
             self.conn.rollback()
             return None
     
+    def stream_query(self, query, params=None, batch_size: int = 1000) -> Iterator[List[Dict]]:
+        """
+        Ejecuta una consulta con un cursor sin buffer y entrega los resultados por lotes.
+
+        Solo se mantiene en memoria un lote de `batch_size` filas. Si el generador se
+        cierra antes de agotar el resultado, la conexión se descarta en lugar de
+        devolverse al pool para no tener que leer las filas pendientes.
+
+        Raises:
+            ValueError: Si la sentencia no es de solo lectura (nunca se confirmaría)
+        """
+        # Se valida aquí y no en el generador, que solo se ejecutaría al pedir el primer lote
+        if not classify(query).read_only:
+            raise ValueError("El modo streaming solo admite consultas SELECT de solo lectura")
+        return self._stream_rows(query, params, batch_size)
+    
+    def _stream_rows(self, query, params, batch_size: int) -> Iterator[List[Dict]]:
+        if not self.connect():
+            return
+        
+        cursor = self.conn.cursor(dictionary=True, buffered=False)
+        exhausted = False
+        try:
+            cursor.execute(query, params or ())
+            while not exhausted:
+                rows = cursor.fetchmany(batch_size)
+                # Un lote incompleto implica que el servidor ya envió el final del resultado
+                exhausted = len(rows) < batch_size
+                if rows:
+                    yield self.normalize_keys(rows)
+        finally:
+            if exhausted:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+            else:
+                self.invalidate()
+    
     # ========== MÉTODOS CRUD ==========
     
     def insert(self, table: str, data: Dict[str, Any]) -> Optional[int]:
@@ -118,29 +249,23 @@ class MySQLConnector:
         query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
         
         result = self.execute_query(query, tuple(data.values()))
-        return self.cursor.lastrowid if result else None
+        return self.last_cursor.lastrowid if result else None
     
-    def insert_many(self, table: str, data_list: List[Dict[str, Any]]) -> Optional[int]:
-        """Inserta múltiples registros"""
-        if not data_list:
-            return None
-            
-        columns = ', '.join(data_list[0].keys())
-        placeholders = ', '.join(['%s'] * len(data_list[0]))
-        query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
-        
+    def insert_many(self, table: str, data_list: Iterable[Dict[str, Any]],
+                    commit_every: Optional[int] = None) -> Optional[int]:
+        """
+        Inserta múltiples registros con INSERT multi-fila por lotes
+
+        Los lotes se ajustan a max_allowed_packet y se confirma cada `commit_every`
+        lotes (BULK_COMMIT_CHUNKS por defecto); data_list puede ser un generador.
+        """
+        loader = BulkLoader(table) if commit_every is None else BulkLoader(table, commit_every=commit_every)
         try:
-            if not self.connect():
-                return None
-                
-            values = [tuple(row.values()) for row in data_list]
-            self.cursor.executemany(query, values)
-            self.conn.commit()
-            return self.cursor.rowcount
-        except Error as e:
-            print(f"❌ Error en inserción múltiple: {e}")
-            self.conn.rollback()
-            return None
+            stats = loader.load(data_list, connector=self)
+        finally:
+            # Los lotes confirmados antes de un error también cambian el conteo
+            self.invalidate_cached([table])
+        return stats["rows"] if stats else None
     
     def select(self, table: str, conditions: str = "", params: tuple = (), 
                columns: str = "*", order_by: str = "", limit: int = None) -> Optional[List[Dict]]:
@@ -171,21 +296,28 @@ class MySQLConnector:
         query = f"UPDATE {table} SET {set_clause} WHERE {conditions}"
         
         all_params = tuple(data.values()) + params
-        return self.execute_query(query, all_params)
+        result = self.execute_query(query, all_params)
+        return result
     
     def delete(self, table: str, conditions: str, params: tuple = ()) -> Optional[int]:
         """Elimina registros de una tabla"""
         query = f"DELETE FROM {table} WHERE {conditions}"
-        return self.execute_query(query, params)
+        result = self.execute_query(query, params)
+        return result
     
-    def delete_safe(self, table: str, conditions: str, params: tuple = ()) -> Optional[int]:
-        """Elimina registros con confirmación previa"""
-        count_query = f"SELECT COUNT(*) as total FROM {table} WHERE {conditions}"
-        result = self.execute_query(count_query, params)
+    def delete_safe(self, table: str, conditions: str, params: tuple = (),
+                    count_mode: str = "exact") -> Optional[int]:
+        """
+        Elimina registros con confirmación previa
         
-        if result and result[0]['total'] > 0:
-            total = result[0]['total']
-            confirm = input(f"¿Estás seguro de eliminar {total} registros? (s/n): ").lower()
+        count_mode: cómo contar los registros a confirmar (exact, estimate o cached);
+        con estimate el número mostrado es aproximado y no recorre la tabla
+        """
+        total = self.count_records(table, conditions, params, count_mode)
+        
+        if total and total > 0:
+            about = "aproximadamente " if count_mode == "estimate" else ""
+            confirm = input(f"¿Estás seguro de eliminar {about}{total} registros? (s/n): ").lower()
             
             if confirm == 's':
                 return self.delete(table, conditions, params)
@@ -236,11 +368,16 @@ class MySQLConnector:
         """
         return self.execute_query(query, (self.config['database'], table_name))
     
-    def get_table_size(self, table_name: str) -> Optional[Dict]:
-        """Obtiene información del tamaño de una tabla"""
+    def get_table_size(self, table_name: str, rows_mode: str = "estimate") -> Optional[Dict]:
+        """
+        Obtiene información del tamaño de una tabla
+        
+        rows_mode: cómo obtener el número de filas; estimate usa table_rows de
+        information_schema (sin recorrer la tabla), exact y cached usan COUNT(*)
+        """
         query = """
         SELECT 
-            table_rows as rows,
+            table_rows as `rows`,
             ROUND(((data_length + index_length) / 1024 / 1024), 2) as size_mb,
             ROUND((data_length / 1024 / 1024), 2) as data_mb,
             ROUND((index_length / 1024 / 1024), 2) as index_mb
@@ -248,7 +385,13 @@ class MySQLConnector:
         WHERE table_schema = %s AND table_name = %s
         """
         result = self.execute_query(query, (self.config['database'], table_name))
-        return result[0] if result else None
+        if not result:
+            return None
+        size = result[0]
+        if rows_mode != "estimate":
+            size['rows'] = self.count_records(table_name, mode=rows_mode)
+        size['rows_mode'] = rows_mode
+        return size
     
     def get_all_tables(self) -> Optional[List[str]]:
         """Obtiene lista de todas las tablas"""
@@ -270,41 +413,64 @@ class MySQLConnector:
         
         return tables
     
-    def count_records(self, table: str, conditions: str = "", params: tuple = ()) -> Optional[int]:
-        """Cuenta registros en una tabla"""
-        query = f"SELECT COUNT(*) as total FROM {table}"
-        if conditions:
-            query += f" WHERE {conditions}"
-            
-        result = self.execute_query(query, params)
-        return result[0]['total'] if result else None
+    def count_records(self, table: str, conditions: str = "", params: tuple = (),
+                      mode: str = "exact") -> Optional[int]:
+        """
+        Cuenta registros en una tabla
+        
+        mode: "exact" (COUNT(*)), "estimate" (estadísticas de MySQL, sin recorrer
+        la tabla) o "cached" (COUNT(*) reutilizado hasta una escritura o ROW_COUNT_TTL)
+        """
+        return count_rows(self, table, conditions, params, mode)
     
     # ========== MÉTODOS DE BACKUP Y RESTORE ==========
     
-    def backup_table(self, table_name: str, file_path: str) -> bool:
-        """Exporta datos de una tabla a JSON"""
+    def backup_table(self, table_name: str, file_path: str, file_format: Optional[str] = None,
+                     resume: bool = True) -> bool:
+        """
+        Exporta datos de una tabla a JSONL, CSV o JSON (con .gz opcional según la extensión)
+
+        La tabla se lee por bloques de su clave primaria con un cursor sin buffer y se
+        escribe en streaming; una exportación interrumpida continúa desde el último
+        bloque guardado (resume=False para empezar de cero).
+        """
         try:
-            data = self.select(table_name)
-            if data:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, default=str, ensure_ascii=False)
-                print(f"✅ Backup de {table_name} guardado en {file_path}")
+            stats = TableExporter(table_name, file_path, file_format).export(connector=self, resume=resume)
+            if stats:
+                print(f"✅ Backup de {table_name} guardado en {file_path} "
+                      f"({stats['total_rows']} registros, {stats['rows_per_second']} registros/s)")
                 return True
         except Exception as e:
             print(f"❌ Error en backup: {e}")
         return False
     
-    def restore_table(self, table_name: str, file_path: str) -> bool:
-        """Restaura datos desde un archivo JSON"""
+    def backup_tables(self, tables: List[str], directory: str, file_format: str = "jsonl.gz",
+                      resume: bool = True) -> Dict[str, bool]:
+        """Exporta varias tablas en paralelo, cada una con su propia conexión del pool"""
+        results = export_tables(tables, directory, file_format, resume=resume)
+        return {table: stats is not None for table, stats in results.items()}
+    
+    def restore_table(self, table_name: str, file_path: str, file_format: Optional[str] = None,
+                      resume: bool = True, use_load_data: bool = False) -> bool:
+        """
+        Restaura datos desde un archivo JSON, JSONL o CSV (opcionalmente .gz)
+
+        El archivo se lee en streaming y se inserta por lotes, por lo que la memoria
+        no depende de su tamaño. Si se interrumpe, la siguiente llamada continúa
+        desde el último lote confirmado (resume=False para empezar de cero).
+        Con use_load_data se usa LOAD DATA LOCAL INFILE cuando el servidor lo permite.
+        """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            if data and isinstance(data, list):
-                result = self.insert_many(table_name, data)
-                if result:
-                    print(f"✅ Restaurados {result} registros en {table_name}")
-                    return True
+            try:
+                stats = BulkLoader(table_name, use_load_data=use_load_data).load_file(
+                    file_path, file_format, resume=resume, connector=self
+                )
+            finally:
+                self.invalidate_cached([table_name])
+            if stats and stats["rows"] + stats["skipped"]:
+                print(f"✅ Restaurados {stats['rows']} registros en {table_name} "
+                      f"({stats['rows_per_second']} registros/s, {stats['method']})")
+                return True
         except Exception as e:
             print(f"❌ Error en restore: {e}")
         return False
@@ -333,13 +499,29 @@ class MySQLConnector:
     
     # ========== MÉTODOS DE ÍNDICES ==========
     
-    def create_index(self, table_name: str, index_name: str, columns: List[str]) -> bool:
-        """Crea un índice en una tabla"""
+    def create_index(self, table_name: str, index_name: str, columns: List[str],
+                     index_type: str = "") -> bool:
+        """Crea un índice en una tabla (index_type: "", "UNIQUE" o "FULLTEXT")"""
         columns_str = ', '.join(columns)
-        query = f"CREATE INDEX {index_name} ON {table_name} ({columns_str})"
+        kind = f"{index_type.upper()} " if index_type else ""
+        query = f"CREATE {kind}INDEX {index_name} ON {table_name} ({columns_str})"
         result = self.execute_query(query)
         return result is not None
     
+    def create_fulltext_index(self, table_name: str, columns: List[str],
+                              index_name: Optional[str] = None) -> bool:
+        """
+        Crea el índice FULLTEXT que search necesita para usar MATCH ... AGAINST
+        
+        Un único índice sobre todas las columnas permite buscar en ellas a la vez;
+        MATCH exige exactamente las columnas de un índice FULLTEXT.
+        """
+        index_name = index_name or f"ft_{'_'.join(columns)}"[:64]
+        return self.create_index(
+            quote_identifier(table_name), quote_identifier(index_name),
+            [quote_identifier(column) for column in columns], "FULLTEXT"
+        )
+    
     def drop_index(self, table_name: str, index_name: str) -> bool:
         """Elimina un índice"""
         query = f"DROP INDEX {index_name} ON {table_name}"
@@ -353,26 +535,92 @@ class MySQLConnector:
     
     # ========== MÉTODOS DE BÚSQUEDA AVANZADA ==========
     
+    def fulltext_columns(self, table: str, columns: List[str]) -> Optional[List[List[str]]]:
+        """
+        Grupos de columnas para MATCH que cubren `columns` con índices FULLTEXT
+        
+        Devuelve [columns] si un índice tiene exactamente esas columnas, un grupo por
+        columna si cada una tiene su propio índice, o None si no están cubiertas.
+        """
+        indexes: Dict[str, set] = {}
+        for row in self.get_table_indexes(quote_identifier(table.replace("`", ""))) or []:
+            if str(row.get("index_type", "")).upper() == "FULLTEXT":
+                indexes.setdefault(row["key_name"], set()).add(row["column_name"].lower())
+        wanted = {column.lower() for column in columns}
+        if any(indexed == wanted for indexed in indexes.values()):
+            return [list(columns)]
+        if all({column.lower()} in indexes.values() for column in columns):
+            return [[column] for column in columns]
+        return None
+    
     def search(self, table: str, search_term: str, columns: List[str], 
-               exact_match: bool = False) -> Optional[List[Dict]]:
-        """Busca en múltiples columnas"""
+               exact_match: bool = False, prefix: bool = False,
+               limit: int = 100, offset: int = 0, use_fulltext: bool = True) -> Optional[List[Dict]]:
+        """
+        Busca en múltiples columnas, por páginas de `limit` registros
+        
+        - exact_match: igualdad en alguna columna (puede usar índices normales)
+        - Si hay índices FULLTEXT sobre las columnas se usa MATCH ... AGAINST, ordenado
+          por relevancia (columna relevance); con prefix=True en modo booleano con
+          comodín final por palabra (term*)
+        - Sin FULLTEXT: con prefix=True se usa LIKE 'term%' (puede usar un índice
+          B-tree de la columna); si no, LIKE '%term%', que recorre la tabla
+        
+        Los índices se crean con create_fulltext_index.
+        """
+        columns_sql = [quote_identifier(column) for column in columns]
+        words = _FULLTEXT_SPECIAL_RE.sub(" ", search_term).split()
+        groups = None
+        # Palabras más cortas que innodb_ft_min_token_size (3) no están en el índice
+        if not exact_match and use_fulltext and any(len(word) >= 3 for word in words):
+            groups = self.fulltext_columns(table, columns)
+        
         if exact_match:
-            conditions = " OR ".join([f"{col} = %s" for col in columns])
+            conditions = " OR ".join([f"{col} = %s" for col in columns_sql])
+            query = f"SELECT * FROM {table} WHERE {conditions}"
             params = tuple([search_term] * len(columns))
+        elif groups:
+            if prefix:
+                against, mode = " ".join(f"{word}*" for word in words), " IN BOOLEAN MODE"
+            else:
+                against, mode = " ".join(words), ""
+            matches = [
+                f"MATCH({', '.join(quote_identifier(column) for column in group)}) AGAINST(%s{mode})"
+                for group in groups
+            ]
+            relevance = " + ".join(matches)
+            query = (f"SELECT *, {relevance} AS relevance FROM {table} "
+                     f"WHERE {' OR '.join(matches)} ORDER BY relevance DESC")
+            params = tuple([against] * (2 * len(matches)))
         else:
-            conditions = " OR ".join([f"{col} LIKE %s" for col in columns])
-            params = tuple([f"%{search_term}%"] * len(columns))
+            escaped = search_term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            pattern = f"{escaped}%" if prefix else f"%{escaped}%"
+            conditions = " OR ".join([f"{col} LIKE %s" for col in columns_sql])
+            query = f"SELECT * FROM {table} WHERE {conditions}"
+            params = tuple([pattern] * len(columns))
         
-        return self.select(table, conditions, params)
+        if limit:
+            query += f" LIMIT {int(limit)} OFFSET {int(offset)}"
+        return self.execute_query(query, params)
     
     def paginate(self, table: str, page: int = 1, per_page: int = 10, 
                  conditions: str = "", params: tuple = (), 
-                 order_by: str = "id") -> Dict:
-        """Paginación de resultados"""
+                 order_by: str = "id", cursor: Optional[str] = None,
+                 keyset: bool = False, total: Optional[str] = "exact") -> Dict:
+        """
+        Paginación de resultados
+        
+        Por defecto pagina con LIMIT/OFFSET. Con keyset=True o un cursor se usa
+        paginate_keyset: el coste de cada página no depende de su profundidad.
+        total: Modo de conteo del total (exact, estimate o cached, ver count_records) o None
+        """
+        if keyset or cursor:
+            return self.paginate_keyset(table, per_page, cursor, conditions, params, order_by, total)
+        
         offset = (page - 1) * per_page
         
         # Obtener total de registros
-        total = self.count_records(table, conditions, params)
+        count = self.count_records(table, conditions, params, total) if total else None
         
         # Obtener registros de la página
         query = f"SELECT * FROM {table}"
@@ -382,18 +630,159 @@ class MySQLConnector:
         
         data = self.execute_query(query, params)
         
+        pagination = {
+            'page': page,
+            'per_page': per_page,
+        }
+        if total:
+            pagination.update({
+                'total': count or 0,
+                'pages': ((count or 0) + per_page - 1) // per_page,
+                'total_is_estimate': total == "estimate",
+            })
         return {
             'data': data or [],
-            'pagination': {
-                'page': page,
-                'per_page': per_page,
-                'total': total or 0,
-                'pages': ((total or 0) + per_page - 1) // per_page
-            }
+            'pagination': pagination
         }
     
+    def paginate_keyset(self, table: str, per_page: int = 10, cursor: Optional[str] = None,
+                        conditions: str = "", params: tuple = (), order_by: str = "id",
+                        total: Optional[str] = None) -> Dict:
+        """
+        Paginación por búsqueda (keyset): WHERE (columnas de orden) > (últimos valores)
+        
+        Cada página continúa justo después de la última fila de la anterior, así que
+        con un índice sobre las columnas de orden la página 10.000 cuesta lo mismo
+        que la primera. Se añade la clave primaria al orden si no está para que sea
+        único. El cursor es opaco y solo vale para la misma tabla, condiciones y orden.
+        
+        Args:
+            cursor: next_cursor de la página anterior (None para la primera)
+            order_by: Columnas de orden, p. ej. "created_at DESC, id"
+            total: Modo de conteo del total (exact, estimate o cached) o None
+        
+        Returns:
+            Dict con data y pagination (per_page, next_cursor, has_more y total si se pidió)
+        
+        Raises:
+            ValueError: Si order_by no es una lista de columnas NOT NULL o el cursor no es válido
+        """
+        order = self._keyset_order(table, order_by)
+        scope = hashlib.sha1(f"{table}|{conditions}|{order}".encode("utf-8")).hexdigest()[:12]
+        
+        where = [f"({conditions})"] if conditions else []
+        all_params = tuple(params)
+        if cursor:
+            values = self._decode_page_cursor(cursor, scope, len(order))
+            seek, seek_params = self._seek_condition(order, values)
+            where.append(seek)
+            all_params += seek_params
+        
+        query = f"SELECT * FROM {table}"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        order_sql = ", ".join(f"{column} {'DESC' if desc else 'ASC'}" for column, desc in order)
+        # Una fila de más indica si hay página siguiente
+        query += f" ORDER BY {order_sql} LIMIT {int(per_page) + 1}"
+        
+        data = self.execute_query(query, all_params) or []
+        has_more = len(data) > per_page
+        data = data[:per_page]
+        next_cursor = None
+        if has_more and data:
+            last = data[-1]
+            values = [last.get(column.split(".")[-1].strip("`").lower()) for column, _ in order]
+            raw = json.dumps({"s": scope, "v": encode_key(values)}).encode("utf-8")
+            next_cursor = base64.urlsafe_b64encode(raw).decode("ascii")
+        
+        pagination = {
+            'per_page': per_page,
+            'cursor': cursor,
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+        }
+        if total:
+            pagination['total'] = self.count_records(table, conditions, params, total) or 0
+            pagination['total_is_estimate'] = total == "estimate"
+        return {
+            'data': data,
+            'pagination': pagination
+        }
+    
+    def _keyset_order(self, table: str, order_by: str) -> List[tuple]:
+        """Columnas de orden (columna, descendente) completadas con la clave primaria"""
+        order = []
+        for item in order_by.replace("`", "").split(","):
+            match = _ORDER_ITEM_RE.match(item.strip())
+            if not match:
+                raise ValueError(f"Orden no admitido en paginación keyset: {item.strip()}")
+            order.append((match.group(1), (match.group(2) or "").upper() == "DESC"))
+        
+        names = {column.split(".")[-1].lower() for column, _ in order}
+        if self.connect():
+            # Con NULL la comparación (a, b) > (x, y) es desconocida: esas filas se perderían
+            nullable = self._nullable_columns(table.replace("`", ""), names)
+            if nullable:
+                raise ValueError(f"Columnas con NULL no admitidas en paginación keyset: {', '.join(nullable)}")
+            for column in primary_key_columns(self.conn, table.replace("`", "")):
+                if column.lower() not in names:
+                    order.append((quote_identifier(column), order[-1][1]))
+        return order
+    
+    def _nullable_columns(self, table: str, columns: Iterable[str]) -> List[str]:
+        """Columnas de `columns` que admiten NULL en la tabla (admite esquema.tabla)"""
+        columns = sorted(columns)
+        schema, _, name = table.rpartition(".")
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(f"""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_schema = COALESCE(%s, DATABASE()) AND table_name = %s
+              AND is_nullable = 'YES' AND LOWER(column_name) IN ({', '.join(['%s'] * len(columns))})
+            ORDER BY ordinal_position
+            """, (schema or None, name, *columns))
+            return [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    
+    @staticmethod
+    def _seek_condition(order: List[tuple], values: tuple) -> tuple:
+        """Condición que selecciona las filas posteriores a `values` en el orden dado"""
+        if len({desc for _, desc in order}) == 1:
+            operator = "<" if order[0][1] else ">"
+            if len(order) == 1:
+                return f"{order[0][0]} {operator} %s", tuple(values)
+            # Mismo sentido en todas las columnas: comparación de filas, resoluble por rango
+            columns = ", ".join(column for column, _ in order)
+            return f"({columns}) {operator} ({', '.join(['%s'] * len(order))})", tuple(values)
+        
+        # Sentidos mezclados: (a > x) OR (a = x AND b < y) OR ...
+        terms, term_params = [], []
+        for index, (column, desc) in enumerate(order):
+            parts = [f"{previous} = %s" for previous, _ in order[:index]]
+            parts.append(f"{column} {'<' if desc else '>'} %s")
+            terms.append("(" + " AND ".join(parts) + ")")
+            term_params.extend(values[:index + 1])
+        return "(" + " OR ".join(terms) + ")", tuple(term_params)
+    
+    @staticmethod
+    def _decode_page_cursor(cursor: str, scope: str, size: int) -> tuple:
+        try:
+            token = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            values = decode_key(token["v"])
+        except (ValueError, TypeError, KeyError):
+            raise ValueError("Cursor de paginación no válido")
+        if token.get("s") != scope or len(values) != size:
+            raise ValueError("El cursor de paginación corresponde a otra consulta")
+        return values
+    
+    def estimate_count(self, table: str, conditions: str = "", params: tuple = ()) -> Optional[int]:
+        """Número aproximado de registros (estadísticas de la tabla o EXPLAIN), sin recorrerla"""
+        return estimate_rows(self, table, conditions, params)
+    
     def close(self):
-        """Método público para cerrar la conexión de forma limpia"""
+        """Método público para devolver la conexión al pool de forma limpia"""
         self.disconnect()
     
     def __del__(self):
@@ -0,0 +1,375 @@
+from dotenv import load_dotenv
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Any, Optional, Tuple
+import mysql.connector
+from mysql.connector import Error
+
+load_dotenv()
+
+
+class PoolTimeoutError(Error):
+    """No se pudo obtener una conexión del pool dentro del tiempo de espera"""
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class PooledConnection:
+    """Conexión física del pool junto con sus marcas de tiempo y sus sentencias preparadas"""
+    __slots__ = ("conn", "created_at", "last_used", "statements")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+        # (sql, dictionary) -> (sql, cursor preparado), en orden LRU
+        self.statements: "OrderedDict[Tuple[str, bool], Tuple[str, Any]]" = OrderedDict()
+
+
+class ConnectionPool:
+    """
+    Pool acotado de conexiones MySQL.
+
+    - min_size / max_size: conexiones mínimas que se mantienen abiertas y máximo total
+    - timeout: segundos de espera máxima al pedir una conexión con el pool lleno
+    - max_lifetime: segundos tras los cuales una conexión se recicla
+    - idle_timeout: segundos de inactividad tras los cuales se cierra (respetando min_size)
+    - ping_interval: si la conexión lleva más de estos segundos sin usarse se verifica antes de entregarla
+    - statement_cache_size: sentencias preparadas en el servidor que se conservan por conexión (0 = ninguna)
+    """
+
+    def __init__(self, config: Dict[str, Any], min_size: int = 1, max_size: int = 10,
+                 timeout: float = 10.0, max_lifetime: float = 1800.0,
+                 idle_timeout: float = 300.0, ping_interval: float = 1.0,
+                 reap_interval: float = 30.0, statement_cache_size: int = 64):
+        self.config = dict(config)
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.idle_timeout = idle_timeout
+        self.ping_interval = ping_interval
+        self.reap_interval = reap_interval
+        self.statement_cache_size = max(0, statement_cache_size)
+
+        self._idle = deque()
+        self._size = 0
+        self._lock = threading.Condition()
+        self._closed = False
+        self._reaper = None
+        self._stats = {
+            "created": 0,
+            "closed": 0,
+            "acquired": 0,
+            "timeouts": 0,
+            "failed_health_checks": 0,
+            "prepared_hits": 0,
+            "prepared_misses": 0,
+            "prepared_evictions": 0,
+        }
+
+    # ========== CICLO DE VIDA DE CONEXIONES ==========
+
+    def _open(self) -> PooledConnection:
+        conn = mysql.connector.connect(**self.config)
+        with self._lock:
+            self._stats["created"] += 1
+        print("✅ Conexión establecida a MySQL")
+        return PooledConnection(conn)
+
+    def _close(self, pooled: PooledConnection):
+        # Al cerrar la conexión el servidor libera sus sentencias preparadas
+        pooled.statements.clear()
+        try:
+            pooled.conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._stats["closed"] += 1
+
+    def _expired(self, pooled: PooledConnection, now: float) -> bool:
+        return self.max_lifetime > 0 and now - pooled.created_at > self.max_lifetime
+
+    def _healthy(self, pooled: PooledConnection, now: float) -> bool:
+        if now - pooled.last_used < self.ping_interval:
+            return True
+        try:
+            pooled.conn.ping(reconnect=False)
+            return True
+        except Exception:
+            with self._lock:
+                self._stats["failed_health_checks"] += 1
+            return False
+
+    def _discard(self, pooled: PooledConnection):
+        """Cierra una conexión y libera su hueco en el pool"""
+        self._close(pooled)
+        with self._lock:
+            self._size -= 1
+            self._lock.notify()
+
+    # ========== API PÚBLICA ==========
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledConnection:
+        """Obtiene una conexión sana del pool, creando una nueva si hay hueco"""
+        self._ensure_reaper()
+        wait = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + wait
+
+        while True:
+            pooled = None
+            reserve = False
+            with self._lock:
+                if self._closed:
+                    raise Error("El pool de conexiones está cerrado")
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeoutError(
+                            f"Tiempo de espera agotado ({wait}s) esperando una conexión del pool"
+                        )
+                    self._lock.wait(remaining)
+                if self._idle:
+                    pooled = self._idle.pop()
+                else:
+                    self._size += 1
+                    reserve = True
+
+            if reserve:
+                try:
+                    pooled = self._open()
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                        self._lock.notify()
+                    raise
+            else:
+                now = time.monotonic()
+                if self._expired(pooled, now) or not self._healthy(pooled, now):
+                    self._discard(pooled)
+                    continue
+
+            pooled.last_used = time.monotonic()
+            with self._lock:
+                self._stats["acquired"] += 1
+            return pooled
+
+    def release(self, pooled: PooledConnection):
+        """Devuelve una conexión al pool, descartándola si ya no es reutilizable"""
+        if pooled is None:
+            return
+        try:
+            if pooled.conn.in_transaction:
+                pooled.conn.rollback()
+        except Exception:
+            self._discard(pooled)
+            return
+
+        now = time.monotonic()
+        if self._closed or self._expired(pooled, now):
+            self._discard(pooled)
+            return
+
+        pooled.last_used = now
+        with self._lock:
+            self._idle.append(pooled)
+            self._lock.notify()
+
+    def discard(self, pooled: PooledConnection):
+        """Cierra una conexión prestada que no debe volver al pool (p. ej. con resultados sin leer)"""
+        if pooled is not None:
+            self._discard(pooled)
+
+    # ========== SENTENCIAS PREPARADAS ==========
+
+    def prepared_cursor(self, pooled: PooledConnection, sql: str,
+                        dictionary: bool = True) -> Tuple[str, Any]:
+        """
+        Cursor preparado en el servidor para `sql` en esta conexión (LRU por texto SQL)
+
+        Devuelve también el objeto str con el que se preparó: mysql-connector compara
+        la sentencia por identidad, así que hay que ejecutar siempre ese mismo objeto
+        para que no vuelva a prepararla.
+        """
+        key = (sql, dictionary)
+        entry = pooled.statements.get(key)
+        if entry is not None:
+            pooled.statements.move_to_end(key)
+            with self._lock:
+                self._stats["prepared_hits"] += 1
+            return entry
+
+        entry = (sql, pooled.conn.cursor(prepared=True, dictionary=dictionary))
+        pooled.statements[key] = entry
+        evicted = []
+        while len(pooled.statements) > self.statement_cache_size:
+            evicted.append(pooled.statements.popitem(last=False)[1][1])
+        for cursor in evicted:
+            self._close_cursor(cursor)
+        with self._lock:
+            self._stats["prepared_misses"] += 1
+            self._stats["prepared_evictions"] += len(evicted)
+        return entry
+
+    def forget_prepared(self, pooled: PooledConnection, sql: str, dictionary: bool = True):
+        """Descarta la sentencia preparada (p. ej. tras un error al prepararla o ejecutarla)"""
+        entry = pooled.statements.pop((sql, dictionary), None)
+        if entry is not None:
+            self._close_cursor(entry[1])
+
+    @staticmethod
+    def _close_cursor(cursor):
+        try:
+            cursor.close()
+        except Exception:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Estado actual y contadores del pool"""
+        with self._lock:
+            lookups = self._stats["prepared_hits"] + self._stats["prepared_misses"]
+            return {
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": self._size - len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                **self._stats,
+                "prepared_hit_rate": self._stats["prepared_hits"] / lookups if lookups else 0.0,
+            }
+
+    def close(self):
+        """Cierra todas las conexiones inactivas; las prestadas se cierran al devolverse"""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._lock.notify_all()
+        for pooled in idle:
+            self._close(pooled)
+
+    # ========== MANTENIMIENTO EN SEGUNDO PLANO ==========
+
+    def _ensure_reaper(self):
+        if self._reaper is not None or self.reap_interval <= 0:
+            return
+        with self._lock:
+            if self._reaper is None:
+                self._reaper = threading.Thread(
+                    target=self._reap_loop, name="mysql-pool-reaper", daemon=True
+                )
+                self._reaper.start()
+
+    def _reap_loop(self):
+        while not self._closed:
+            time.sleep(self.reap_interval)
+            try:
+                self.reap()
+            except Exception as e:
+                print(f"❌ Error en mantenimiento del pool: {e}")
+
+    def reap(self):
+        """Cierra conexiones inactivas o caducadas y repone el mínimo configurado"""
+        now = time.monotonic()
+        to_close = []
+        with self._lock:
+            keep = deque()
+            # Las más antiguas están a la izquierda: se revisan primero
+            while self._idle:
+                pooled = self._idle.popleft()
+                idle_for = now - pooled.last_used
+                remaining = self._size - len(to_close)
+                if self._expired(pooled, now) or (
+                    self.idle_timeout > 0 and idle_for > self.idle_timeout and remaining > self.min_size
+                ):
+                    to_close.append(pooled)
+                else:
+                    keep.append(pooled)
+            self._idle = keep
+            self._size -= len(to_close)
+            missing = max(0, self.min_size - self._size) if not self._closed else 0
+            self._size += missing
+
+        for pooled in to_close:
+            self._close(pooled)
+
+        for _ in range(missing):
+            try:
+                pooled = self._open()
+            except Exception as e:
+                with self._lock:
+                    self._size -= 1
+                print(f"❌ Error de conexión: {e}")
+                continue
+            with self._lock:
+                self._idle.appendleft(pooled)
+                self._lock.notify()
+
+
+# ========== REGISTRO DE POOLS POR SERVIDOR ==========
+
+_pools: Dict[Tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_key(config: Dict[str, Any]) -> Tuple:
+    return (
+        config.get("host"),
+        config.get("port"),
+        config.get("user"),
+        config.get("database"),
+    )
+
+
+def get_pool(config: Dict[str, Any]) -> ConnectionPool:
+    """Devuelve el pool compartido para un servidor, creándolo la primera vez"""
+    key = _pool_key(config)
+    pool = _pools.get(key)
+    if pool is not None:
+        return pool
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(
+                config,
+                min_size=_env_int("POOL_MIN_SIZE", 1),
+                max_size=_env_int("POOL_MAX_SIZE", 10),
+                timeout=_env_float("POOL_TIMEOUT", 10.0),
+                max_lifetime=_env_float("POOL_MAX_LIFETIME", 1800.0),
+                idle_timeout=_env_float("POOL_IDLE_TIMEOUT", 300.0),
+                ping_interval=_env_float("POOL_PING_INTERVAL", 1.0),
+                statement_cache_size=_env_int("POOL_STATEMENT_CACHE_SIZE", 64),
+            )
+            _pools[key] = pool
+        return pool
+
+
+def get_pools_stats() -> Dict[str, Dict[str, Any]]:
+    """Estadísticas de todos los pools activos, indexadas por host/base de datos"""
+    return {f"{key[0]}/{key[3]}": pool.stats() for key, pool in list(_pools.items())}
+
+
+def close_all_pools():
+    """Cierra todos los pools registrados"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,130 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+import mysql.connector
+from mysql.connector import Error
+from typing import Any, Dict, List, Optional
+
+# Tiempo máximo por consulta en segundos (0 = sin límite)
+QUERY_TIMEOUT = float(os.getenv("QUERY_TIMEOUT", 30))
+
+# Códigos de MySQL de una consulta interrumpida por tiempo o por KILL QUERY
+ER_QUERY_INTERRUPTED = 1317
+ER_QUERY_TIMEOUT = 3024
+
+
+def kill_query(config: Dict[str, Any], connection_id: int) -> bool:
+    """
+    Cancela la sentencia en curso de una conexión con KILL QUERY
+
+    Se usa una conexión aparte y fuera del pool: la cancelación no puede esperar
+    a que el pool tenga conexiones libres.
+    """
+    try:
+        conn = mysql.connector.connect(**config, connection_timeout=5)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"KILL QUERY {int(connection_id)}")
+            cursor.close()
+        finally:
+            conn.close()
+        return True
+    except Error as e:
+        print(f"❌ Error al cancelar la consulta de la conexión {connection_id}: {e}")
+        return False
+
+
+def is_interrupted(error: Exception) -> bool:
+    """True si el error es una consulta cancelada por tiempo máximo o KILL QUERY"""
+    return getattr(error, "errno", None) in (ER_QUERY_INTERRUPTED, ER_QUERY_TIMEOUT)
+
+
+class QueryControl:
+    """
+    Permite cancelar desde otro hilo la consulta que se ejecuta en una conexión.
+
+    La conexión se asocia con attach() justo antes de ejecutar y se desasocia con
+    detach() antes de devolverla al pool; cancel() solo actúa mientras está asociada,
+    así nunca se cancela una consulta de otra petición que reutilice la conexión.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._config = None
+        self._connection_id = None
+        self.reason: Optional[str] = None
+
+    def attach(self, config: Dict[str, Any], connection_id: int):
+        with self._lock:
+            self._config = config
+            self._connection_id = connection_id
+
+    def detach(self):
+        with self._lock:
+            self._config = None
+            self._connection_id = None
+
+    def cancel(self, reason: str = "cancelled") -> bool:
+        with self._lock:
+            if self.reason is None:
+                self.reason = reason
+            if self._connection_id is None:
+                return False
+            return kill_query(self._config, self._connection_id)
+
+    @property
+    def timed_out(self) -> bool:
+        return self.reason == "timeout"
+
+
+class QueryWatchdog:
+    """
+    Hilo único que cancela las consultas que superan su tiempo máximo.
+
+    Las vigilancias se guardan en un heap por fecha límite; al terminar la
+    consulta se marcan como inactivas y se descartan cuando llegan a la cima.
+    """
+
+    def __init__(self):
+        self._heap: List[list] = []
+        self._cond = threading.Condition()
+        self._counter = itertools.count()
+        self._thread = None
+
+    def watch(self, control: QueryControl, timeout: float) -> Optional[list]:
+        """Cancela la consulta de `control` si sigue en curso tras `timeout` segundos"""
+        if not timeout or timeout <= 0:
+            return None
+        entry = [time.monotonic() + timeout, next(self._counter), control, True]
+        with self._cond:
+            heapq.heappush(self._heap, entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="query-watchdog", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return entry
+
+    def unwatch(self, entry: Optional[list]):
+        if entry is not None:
+            entry[3] = False
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                deadline, _, control, active = self._heap[0]
+                if not active:
+                    heapq.heappop(self._heap)
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+                heapq.heappop(self._heap)
+            control.cancel("timeout")
+
+
+watchdog = QueryWatchdog()
@@ -0,0 +1,214 @@
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+import json
+import os
+import re
+import threading
+import time
+from .row_count import row_counts, table_key
+from .sql_classifier import classify
+
+QUERY_CACHE_ENABLED = os.getenv("QUERY_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", 60))
+QUERY_CACHE_MAX_BYTES = int(os.getenv("QUERY_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+# Literales de cadena o identificadores entre backticks: no se alteran al normalizar
+_LITERAL_RE = re.compile(r"('(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\"|`[^`]*`)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Colapsa espacios y elimina el ';' final sin tocar literales ni identificadores citados"""
+    parts = _LITERAL_RE.split(query.strip().rstrip(';').strip())
+    for i in range(0, len(parts), 2):
+        parts[i] = _WHITESPACE_RE.sub(" ", parts[i])
+    return "".join(parts)
+
+
+def extract_tables(query: str) -> Set[str]:
+    """Tablas leídas o escritas por la sentencia, en minúsculas y sin esquema ni backticks"""
+    return set(classify(query).tables)
+
+
+def is_cacheable(query: str) -> bool:
+    """Solo se cachean SELECT (o WITH ... SELECT) deterministas, sin bloqueos, cuyo conjunto de tablas se conoce"""
+    info = classify(query)
+    return info.statement_type == "SELECT" and info.read_only and info.deterministic and bool(info.tables_read)
+
+
+def is_write(query: str) -> bool:
+    """True para sentencias que modifican datos o estructura"""
+    return classify(query).is_write
+
+
+class _CacheEntry:
+    __slots__ = ("value", "size", "expires_at", "tables")
+
+    def __init__(self, value: Any, size: int, expires_at: float, tables: Set[str]):
+        self.value = value
+        self.size = size
+        self.expires_at = expires_at
+        self.tables = tables
+
+
+class ResultCache:
+    """
+    Caché LRU con TTL para resultados de consultas de solo lectura.
+
+    La memoria se limita por tamaño estimado (JSON serializado) y cada entrada se
+    indexa por las tablas que lee para poder invalidarla cuando se escribe en ellas.
+    """
+
+    def __init__(self, max_bytes: int = QUERY_CACHE_MAX_BYTES, ttl: float = QUERY_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple, _CacheEntry]" = OrderedDict()
+        self._by_table: Dict[str, Set[Tuple]] = {}
+        self._bytes = 0
+        # Generación por tabla: evita guardar resultados leídos antes de una escritura concurrente
+        self._generations: Dict[str, int] = {}
+        self._global_generation = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+        }
+
+    @staticmethod
+    def make_key(query: str, params: Any, fetch_all: bool, variant: str = "dicts") -> Tuple:
+        return (normalize_query(query), repr(tuple(params)) if params else "", fetch_all, variant)
+
+    def _remove(self, key: Tuple) -> Optional[_CacheEntry]:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return None
+        self._bytes -= entry.size
+        for table in entry.tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+        return entry
+
+    def get(self, key: Tuple) -> Tuple[bool, Any]:
+        """Devuelve (encontrado, valor) y actualiza el orden LRU"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            if entry.expires_at < time.monotonic():
+                self._remove(key)
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return True, entry.value
+
+    def generation(self, tables: Iterable[str]) -> Tuple:
+        """Marca de versión de las tablas; se toma antes de ejecutar la consulta"""
+        with self._lock:
+            return (self._global_generation,) + tuple(
+                self._generations.get(table, 0) for table in sorted(tables)
+            )
+
+    def put(self, key: Tuple, value: Any, tables: Iterable[str],
+            generation: Optional[Tuple] = None) -> bool:
+        """
+        Guarda un resultado. Devuelve False si supera por sí solo el límite de memoria
+        o si alguna de sus tablas se modificó desde que se tomó `generation`.
+        """
+        tables = set(tables)
+        size = len(json.dumps(value, default=str, ensure_ascii=False))
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            if generation is not None and generation != (self._global_generation,) + tuple(
+                self._generations.get(table, 0) for table in sorted(tables)
+            ):
+                return False
+            self._remove(key)
+            while self._entries and self._bytes + size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+            self._entries[key] = _CacheEntry(value, size, time.monotonic() + self.ttl, tables)
+            self._bytes += size
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+        return True
+
+    def invalidate_tables(self, tables: Iterable[str]) -> int:
+        """Elimina las entradas que leen alguna de las tablas indicadas"""
+        removed = 0
+        with self._lock:
+            for table in set(tables):
+                table = table.lower()
+                self._generations[table] = self._generations.get(table, 0) + 1
+                for key in list(self._by_table.get(table, ())):
+                    if self._remove(key) is not None:
+                        removed += 1
+            self._stats["invalidations"] += removed
+        return removed
+
+    def clear(self) -> int:
+        with self._lock:
+            removed = len(self._entries)
+            self._global_generation += 1
+            self._entries.clear()
+            self._by_table.clear()
+            self._bytes = 0
+            self._stats["invalidations"] += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "enabled": QUERY_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0,
+                **self._stats,
+            }
+
+
+result_cache = ResultCache()
+
+
+def invalidate_for_write(query: str) -> int:
+    """
+    Invalida las entradas de las tablas que modifica una escritura; si no se
+    reconocen (CREATE VIEW, DROP DATABASE...) vacía la caché
+
+    También descarta los conteos de registros cacheados de esas tablas.
+    """
+    tables = classify(query).tables_written
+    if not tables:
+        row_counts.clear()
+        return result_cache.clear()
+    return invalidate_tables(tables)
+
+
+def invalidate_tables(tables: Iterable[str]) -> int:
+    """
+    Invalida los resultados y los conteos cacheados de las tablas escritas
+
+    Admite nombres con esquema o backticks (db.`users`); es la regla común a
+    invalidate_for_write y a los métodos de escritura de MySQLConnector.
+    """
+    names = {table_key(table) for table in tables}
+    row_counts.invalidate(names)
+    return result_cache.invalidate_tables(names)
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Contadores de aciertos, fallos y expulsiones de la caché de resultados"""
+    return result_cache.stats()
@@ -0,0 +1,163 @@
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+from mysql.connector import Error
+
+# Vida de los conteos exactos cacheados (modo "cached"), en segundos
+ROW_COUNT_TTL = float(os.getenv("ROW_COUNT_TTL", 300))
+
+# exact: COUNT(*); estimate: estadísticas de MySQL; cached: COUNT(*) reutilizado hasta una escritura o el TTL
+COUNT_MODES = ("exact", "estimate", "cached")
+
+
+def table_key(table: str) -> str:
+    """Nombre de tabla en minúsculas, sin esquema ni backticks (mismo criterio que la caché de resultados)"""
+    return table.replace("`", "").split(".")[-1].lower()
+
+
+class RowCountCache:
+    """
+    Conteos exactos por (tabla, condiciones, parámetros) con TTL.
+
+    Las escrituras invalidan los conteos de sus tablas; una generación por tabla
+    evita guardar un conteo calculado mientras se escribía en ella.
+    """
+
+    def __init__(self, ttl: float = ROW_COUNT_TTL):
+        self.ttl = ttl
+        self._entries: Dict[Tuple[str, str, str], Tuple[int, float]] = {}
+        self._generations: Dict[str, int] = {}
+        self._global_generation = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def make_key(table: str, conditions: str, params: Any) -> Tuple[str, str, str]:
+        return (table_key(table), " ".join(conditions.split()), repr(tuple(params)) if params else "")
+
+    def get(self, key: Tuple[str, str, str]) -> Tuple[bool, Optional[int]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                self._entries.pop(key, None)
+                self._stats["misses"] += 1
+                return False, None
+            self._stats["hits"] += 1
+            return True, entry[0]
+
+    def generation(self, table: str) -> Tuple[int, int]:
+        with self._lock:
+            return self._global_generation, self._generations.get(table_key(table), 0)
+
+    def put(self, key: Tuple[str, str, str], count: int, generation: Optional[Tuple[int, int]] = None) -> bool:
+        with self._lock:
+            if generation is not None and generation != (self._global_generation, self._generations.get(key[0], 0)):
+                return False
+            self._entries[key] = (count, time.monotonic() + self.ttl)
+        return True
+
+    def invalidate(self, tables: Iterable[str]) -> int:
+        """Descarta los conteos de las tablas indicadas"""
+        names = {table_key(table) for table in tables}
+        with self._lock:
+            for name in names:
+                self._generations[name] = self._generations.get(name, 0) + 1
+            stale = [key for key in self._entries if key[0] in names]
+            for key in stale:
+                del self._entries[key]
+            self._stats["invalidations"] += len(stale)
+        return len(stale)
+
+    def clear(self) -> int:
+        with self._lock:
+            removed = len(self._entries)
+            self._global_generation += 1
+            self._entries.clear()
+            self._stats["invalidations"] += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "ttl": self.ttl,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0,
+                **self._stats,
+            }
+
+
+row_counts = RowCountCache()
+
+
+def estimate_rows(db, table: str, conditions: str = "", params: tuple = ()) -> Optional[int]:
+    """
+    Número aproximado de registros sin recorrer la tabla
+
+    Sin condiciones se usa information_schema.tables.table_rows; con condiciones,
+    la estimación de filas de EXPLAIN (rows × filtered).
+    """
+    if not db.connect():
+        return None
+    cursor = db.conn.cursor(dictionary=True)
+    try:
+        if not conditions:
+            schema, _, name = table.replace("`", "").rpartition(".")
+            cursor.execute("""
+            SELECT table_rows
+            FROM information_schema.tables
+            WHERE table_schema = COALESCE(%s, DATABASE()) AND table_name = %s
+            """, (schema or None, name))
+            row = db.normalize_keys(cursor.fetchone())
+            return int(row["table_rows"] or 0) if row else None
+        cursor.execute(f"EXPLAIN SELECT * FROM {table} WHERE {conditions}", params or ())
+        row = db.normalize_keys(cursor.fetchall()[0])
+        return int((row.get("rows") or 0) * float(row.get("filtered") or 100) / 100)
+    except Error as e:
+        print(f"❌ Error al estimar registros de {table}: {e}")
+        return None
+    finally:
+        cursor.close()
+
+
+def count_rows(db, table: str, conditions: str = "", params: tuple = (),
+               mode: str = "exact") -> Optional[int]:
+    """
+    Cuenta los registros de una tabla con el modo indicado
+
+    Args:
+        db: MySQLConnector con el que consultar
+        mode: "exact" (COUNT(*), recorre la tabla), "estimate" (estadísticas de
+            MySQL, sin recorrerla) o "cached" (COUNT(*) reutilizado durante
+            ROW_COUNT_TTL segundos o hasta la siguiente escritura en la tabla)
+
+    Raises:
+        ValueError: Si el modo no es válido
+    """
+    if mode not in COUNT_MODES:
+        raise ValueError(f"Modo de conteo no válido: {mode} (use {', '.join(COUNT_MODES)})")
+    if mode == "estimate":
+        return estimate_rows(db, table, conditions, params)
+
+    if mode == "cached":
+        key = RowCountCache.make_key(table, conditions, params)
+        found, count = row_counts.get(key)
+        if found:
+            return count
+        generation = row_counts.generation(table)
+
+    query = f"SELECT COUNT(*) as total FROM {table}"
+    if conditions:
+        query += f" WHERE {conditions}"
+    result = db.execute_query(query, params)
+    count = result[0]['total'] if result else None
+
+    if mode == "cached" and count is not None:
+        row_counts.put(key, count, generation)
+    return count
+
+
+def get_row_count_stats() -> Dict[str, Any]:
+    """Contadores de la caché de conteos de registros"""
+    return row_counts.stats()
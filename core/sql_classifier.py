@@ -0,0 +1,437 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+# Análisis memorizados (LRU por texto SQL) y longitud máxima de las sentencias que se memorizan
+SQL_CLASSIFIER_CACHE_SIZE = int(os.getenv("SQL_CLASSIFIER_CACHE_SIZE", 2048))
+SQL_CLASSIFIER_MAX_LENGTH = int(os.getenv("SQL_CLASSIFIER_MAX_LENGTH", 16384))
+
+# Tokens SQL: comentarios, literales, identificadores citados, números, palabras y símbolos
+SQL_TOKEN_RE = re.compile(
+    r"(?P<comment>--[^\n]*|#[^\n]*|/\*.*?\*/)"
+    r"|(?P<string>'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.|\"\")*\")"
+    r"|(?P<quoted>`(?:[^`]|``)*`)"
+    r"|(?P<number>0x[0-9a-fA-F]+|\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)"
+    r"|(?P<word>[A-Za-z_][A-Za-z0-9_$]*)"
+    r"|(?P<param>%s|\?|%\(\w+\)s)"
+    r"|(?P<symbol><=>|<=|>=|<>|!=|\S)",
+    re.DOTALL,
+)
+
+READ_TYPES = frozenset({"SELECT", "SHOW", "DESCRIBE", "EXPLAIN"})
+DML_TYPES = frozenset({"INSERT", "REPLACE", "UPDATE", "DELETE", "LOAD"})
+DDL_TYPES = frozenset({"CREATE", "ALTER", "DROP", "TRUNCATE", "RENAME"})
+
+_STATEMENT_ALIASES = {"DESC": "DESCRIBE", "TABLE": "SELECT", "VALUES": "SELECT"}
+_CTE_BODIES = {"SELECT", "INSERT", "REPLACE", "UPDATE", "DELETE", "TABLE", "VALUES"}
+
+# Palabras que nunca son nombres de tabla ni alias
+_KEYWORDS = {
+    "SELECT", "FROM", "WHERE", "JOIN", "INNER", "LEFT", "RIGHT", "FULL", "OUTER", "CROSS",
+    "NATURAL", "STRAIGHT_JOIN", "ON", "USING", "GROUP", "ORDER", "BY", "HAVING", "LIMIT",
+    "OFFSET", "UNION", "EXCEPT", "INTERSECT", "ALL", "DISTINCT", "AS", "AND", "OR", "NOT",
+    "IN", "IS", "NULL", "LIKE", "BETWEEN", "EXISTS", "CASE", "WHEN", "THEN", "ELSE", "END",
+    "SET", "VALUES", "VALUE", "INTO", "UPDATE", "DELETE", "INSERT", "REPLACE", "WITH",
+    "RECURSIVE", "FOR", "LOCK", "SHARE", "MODE", "WINDOW", "PARTITION", "OVER", "ASC",
+    "DESC", "INTERVAL", "TRUE", "FALSE", "FORCE", "USE", "IGNORE", "INDEX", "KEY",
+    "DUPLICATE", "LATERAL", "DUAL", "LOW_PRIORITY", "HIGH_PRIORITY", "DELAYED", "QUICK",
+    "IF", "TABLE", "TEMPORARY", "TO", "NOWAIT", "SKIP", "LOCKED", "OF", "ROWS", "ROW",
+}
+
+# Funciones cuyo resultado cambia entre ejecuciones: su SELECT no se cachea
+_NON_DETERMINISTIC_CALLS = {
+    "NOW", "SYSDATE", "CURDATE", "CURTIME", "CURRENT_TIMESTAMP", "CURRENT_DATE", "CURRENT_TIME",
+    "UTC_TIMESTAMP", "UTC_DATE", "UTC_TIME", "LOCALTIME", "LOCALTIMESTAMP", "UNIX_TIMESTAMP",
+    "RAND", "UUID", "UUID_SHORT", "CONNECTION_ID", "LAST_INSERT_ID", "FOUND_ROWS", "ROW_COUNT",
+    "SLEEP", "USER", "CURRENT_USER", "DATABASE",
+}
+# Bloqueos con nombre: pertenecen a la sesión, así que como FOR UPDATE se ejecutan en el primario
+_LOCK_CALLS = {"GET_LOCK", "RELEASE_LOCK", "RELEASE_ALL_LOCKS", "IS_FREE_LOCK", "IS_USED_LOCK"}
+_NON_DETERMINISTIC_WORDS = {
+    "CURRENT_TIMESTAMP", "CURRENT_DATE", "CURRENT_TIME", "LOCALTIME", "LOCALTIMESTAMP", "CURRENT_USER",
+}
+_AGGREGATES = {"COUNT", "SUM", "AVG", "MAX", "MIN"}
+
+
+class StatementInfo:
+    """
+    Análisis de una sentencia SQL. Las instancias se comparten desde la memoria
+    del clasificador: no deben modificarse.
+
+    - statement_type: SELECT, INSERT, REPLACE, UPDATE, DELETE, LOAD, CREATE, ALTER,
+      DROP, TRUNCATE, RENAME, SHOW, DESCRIBE, EXPLAIN, SET, CALL... u OTHER
+      (WITH ... se clasifica por su sentencia principal; TABLE y VALUES como SELECT)
+    - tables_read / tables_written: tablas en minúsculas, sin esquema ni backticks
+      (los nombres definidos con WITH no cuentan como tablas)
+    - read_only: lectura sin bloqueos (FOR UPDATE, GET_LOCK...) ni INTO que puede
+      responder una réplica
+    - modifies_data: DML que necesita commit; is_ddl: cambia la estructura
+    - deterministic: sin funciones de tiempo/aleatorias ni variables (cacheable)
+    - complexity: "simple", "medium" o "complex" (complexity_score)
+    - hint_offset: posición tras el SELECT principal donde insertar optimizer hints
+    """
+
+    __slots__ = ("statement_type", "tables_read", "tables_written", "read_only", "modifies_data",
+                 "is_ddl", "locking", "select_into", "deterministic", "statements",
+                 "complexity", "complexity_score", "hint_offset")
+
+    def __init__(self, statement_type: str, tables_read: FrozenSet[str], tables_written: FrozenSet[str],
+                 locking: bool, select_into: bool, deterministic: bool, statements: int,
+                 complexity_score: int, hint_offset: Optional[int]):
+        self.statement_type = statement_type
+        self.tables_read = tables_read
+        self.tables_written = tables_written
+        self.locking = locking
+        self.select_into = select_into
+        self.statements = statements
+        self.modifies_data = statement_type in DML_TYPES
+        self.is_ddl = statement_type in DDL_TYPES
+        self.read_only = (statement_type in READ_TYPES and not locking and not select_into
+                          and statements == 1)
+        self.deterministic = deterministic and not locking
+        self.complexity_score = complexity_score
+        self.complexity = "simple" if complexity_score <= 2 else "medium" if complexity_score <= 5 else "complex"
+        self.hint_offset = hint_offset
+
+    @property
+    def is_write(self) -> bool:
+        """Modifica datos o estructura (invalida cachés y fija la sesión al primario)"""
+        return self.modifies_data or self.is_ddl
+
+    @property
+    def tables(self) -> FrozenSet[str]:
+        return self.tables_read | self.tables_written
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "statement_type": self.statement_type,
+            "tables_read": sorted(self.tables_read),
+            "tables_written": sorted(self.tables_written),
+            "read_only": self.read_only,
+            "is_write": self.is_write,
+            "deterministic": self.deterministic,
+            "complexity": self.complexity,
+        }
+
+
+def _tokenize(query: str) -> List[Tuple[str, str, int]]:
+    """(tipo, valor, fin) sin comentarios; palabras en mayúsculas, identificadores citados sin backticks"""
+    tokens = []
+    for match in SQL_TOKEN_RE.finditer(query):
+        kind = match.lastgroup
+        if kind == "comment":
+            continue
+        text = match.group()
+        if kind == "word":
+            text = text.upper()
+        elif kind == "quoted":
+            text = text[1:-1].replace("``", "`")
+        tokens.append((kind, text, match.end()))
+    return tokens
+
+
+def _is_name(token: Tuple[str, str, int]) -> bool:
+    return token[0] == "quoted" or (token[0] == "word" and token[1] not in _KEYWORDS)
+
+
+def _table_name(tokens: List[Tuple[str, str, int]], i: int) -> Tuple[Optional[str], int]:
+    """Nombre [esquema.]tabla que empieza en i: (tabla normalizada, índice siguiente)"""
+    if i >= len(tokens) or not _is_name(tokens[i]):
+        return None, i
+    name = tokens[i][1]
+    i += 1
+    while i + 1 < len(tokens) and tokens[i][1] == "." and tokens[i + 1][0] in ("word", "quoted"):
+        name = tokens[i + 1][1]
+        i += 2
+    return name.lower(), i
+
+
+def _table_list(tokens: List[Tuple[str, str, int]], i: int, single: bool = False) -> Tuple[List[str], int]:
+    """Tablas separadas por comas con alias opcional (FROM a x, b AS y); se detiene en lo demás"""
+    tables = []
+    while True:
+        name, i = _table_name(tokens, i)
+        if name is None:
+            break
+        tables.append(name)
+        if i < len(tokens) and tokens[i][1] == "AS":
+            i += 1
+        if i < len(tokens) and _is_name(tokens[i]):
+            i += 1
+        if single or i >= len(tokens) or tokens[i][1] != ",":
+            break
+        i += 1
+    return tables, i
+
+
+def _skip_words(tokens: List[Tuple[str, str, int]], i: int, words: Set[str]) -> int:
+    while i < len(tokens) and tokens[i][0] == "word" and tokens[i][1] in words:
+        i += 1
+    return i
+
+
+def _statement_start(tokens: List[Tuple[str, str, int]]) -> Tuple[int, int]:
+    """Índice de la palabra que decide el tipo y del SELECT principal (o -1)"""
+    i = 0
+    while i < len(tokens) and tokens[i][1] == "(":
+        i += 1
+    if i >= len(tokens) or tokens[i][0] != "word":
+        return -1, -1
+    if tokens[i][1] != "WITH":
+        return i, i if (i == 0 and tokens[i][1] == "SELECT") else -1
+    # WITH cte AS (...), ... <sentencia>: la principal es la primera fuera de paréntesis
+    depth = 0
+    for j in range(i + 1, len(tokens)):
+        text = tokens[j][1]
+        if text == "(":
+            depth += 1
+        elif text == ")":
+            depth -= 1
+        elif depth == 0 and tokens[j][0] == "word" and text in _CTE_BODIES:
+            return j, j if (i == 0 and text == "SELECT") else -1
+    return i, -1
+
+
+def _closing(tokens: List[Tuple[str, str, int]], i: int) -> int:
+    """Índice siguiente al paréntesis que cierra el abierto en i"""
+    depth = 0
+    for j in range(i, len(tokens)):
+        if tokens[j][1] == "(":
+            depth += 1
+        elif tokens[j][1] == ")":
+            depth -= 1
+            if depth == 0:
+                return j + 1
+    return len(tokens)
+
+
+def _cte_names(tokens: List[Tuple[str, str, int]]) -> Set[str]:
+    """Nombres definidos en cláusulas WITH nombre [(columnas)] AS (...), ... (no son tablas)"""
+    names = set()
+    for i, (kind, text, _) in enumerate(tokens):
+        if kind != "word" or text != "WITH":
+            continue
+        j = _skip_words(tokens, i + 1, {"RECURSIVE"})
+        while j < len(tokens) and _is_name(tokens[j]):
+            k = j + 1
+            if k < len(tokens) and tokens[k][1] == "(":
+                k = _closing(tokens, k)
+            if k >= len(tokens) or tokens[k][1] != "AS":
+                break
+            names.add(tokens[j][1].lower())
+            k += 1
+            if k < len(tokens) and tokens[k][1] == "(":
+                k = _closing(tokens, k)
+            if k >= len(tokens) or tokens[k][1] != ",":
+                break
+            j = k + 1
+    return names
+
+
+def _analyze(query: str) -> StatementInfo:
+    tokens = _tokenize(query)
+    main, select_index = _statement_start(tokens)
+    if main < 0:
+        return StatementInfo("OTHER", frozenset(), frozenset(), False, False, True, 1, 0, None)
+    statement_type = _STATEMENT_ALIASES.get(tokens[main][1], tokens[main][1])
+    if statement_type == "WITH":
+        statement_type = "OTHER"
+
+    read: Set[str] = set()
+    written: Set[str] = set()
+    locking = select_into = False
+    deterministic = True
+    statements = 1
+    joins = selects = 0
+    aggregates: Set[str] = set()
+    grouped = ordered = False
+    # Contexto de cada paréntesis abierto: True si contiene una subconsulta
+    stack: List[bool] = []
+    target_written = statement_type in ("UPDATE", "DELETE")
+
+    def in_query() -> bool:
+        return not stack or stack[-1]
+
+    if statement_type in ("DESCRIBE", "EXPLAIN"):
+        i = _skip_words(tokens, main + 1, {"ANALYZE", "EXTENDED", "PARTITIONS"})
+        if i < len(tokens) and tokens[i][1] == "FORMAT":
+            i += 3
+        inner = tokens[i][1] if i < len(tokens) and tokens[i][0] == "word" else ""
+        if inner in DML_TYPES and any(token[1] == "ANALYZE" for token in tokens[main + 1:i]):
+            # EXPLAIN ANALYZE ejecuta la sentencia: se trata como la escritura que es
+            statement_type = inner
+            main = i
+            target_written = inner in ("UPDATE", "DELETE")
+        elif inner not in _KEYWORDS:
+            # DESCRIBE tabla
+            read.update(_table_list(tokens, i, single=True)[0])
+
+    if statement_type in ("INSERT", "REPLACE"):
+        i = _skip_words(tokens, main + 1, {"LOW_PRIORITY", "DELAYED", "HIGH_PRIORITY", "IGNORE", "INTO"})
+        written.update(_table_list(tokens, i, single=True)[0])
+    elif statement_type == "UPDATE":
+        i = _skip_words(tokens, main + 1, {"LOW_PRIORITY", "IGNORE"})
+        written.update(_table_list(tokens, i)[0])
+    elif statement_type == "DELETE":
+        # DELETE t1, t2 FROM ...: las tablas antes de FROM también se modifican
+        i = _skip_words(tokens, main + 1, {"LOW_PRIORITY", "QUICK", "IGNORE"})
+        written.update(_table_list(tokens, i)[0])
+    elif statement_type == "LOAD":
+        # LOAD DATA INFILE '...' INTO TABLE t
+        for j in range(main + 1, len(tokens)):
+            if tokens[j][1] == "INTO":
+                written.update(_table_list(tokens, _skip_words(tokens, j + 1, {"TABLE"}), single=True)[0])
+                break
+    elif statement_type in DDL_TYPES:
+        i = _skip_words(tokens, main + 1, {"OR", "REPLACE", "TEMPORARY", "UNIQUE", "FULLTEXT",
+                                            "SPATIAL", "ONLINE", "OFFLINE", "IGNORE"})
+        target = tokens[i][1] if i < len(tokens) else ""
+        if target in ("TABLE", "TABLES") or (statement_type == "TRUNCATE" and target != "TABLE"):
+            if target in ("TABLE", "TABLES"):
+                i += 1
+            i = _skip_words(tokens, i, {"IF", "NOT", "EXISTS"})
+            if statement_type == "RENAME":
+                # RENAME TABLE a TO b, c TO d
+                while i < len(tokens):
+                    name, i = _table_name(tokens, i)
+                    if name is None:
+                        break
+                    written.add(name)
+                    if i < len(tokens) and tokens[i][1] in ("TO", ","):
+                        i += 1
+            else:
+                written.update(_table_list(tokens, i)[0])
+        elif target == "INDEX":
+            # CREATE/DROP INDEX nombre ON tabla
+            for j in range(i + 1, len(tokens)):
+                if tokens[j][1] == "ON":
+                    written.update(_table_list(tokens, j + 1, single=True)[0])
+                    break
+
+    previous = ""
+    for i, (kind, text, _) in enumerate(tokens):
+        if kind == "symbol":
+            if text == "(":
+                following = tokens[i + 1][1] if i + 1 < len(tokens) else ""
+                stack.append(following in ("SELECT", "WITH", "VALUES", "TABLE"))
+            elif text == ")":
+                if stack:
+                    stack.pop()
+            elif text == "@":
+                deterministic = False
+            elif text == ";" and not stack and any(token[0] != "symbol" or token[1] != ";"
+                                                   for token in tokens[i + 1:]):
+                statements += 1
+            previous = text
+            continue
+        if kind != "word":
+            previous = text
+            continue
+
+        following = tokens[i + 1][1] if i + 1 < len(tokens) else ""
+        if text == "SELECT":
+            selects += 1
+        elif text in ("FROM", "JOIN", "STRAIGHT_JOIN") and in_query():
+            if text != "FROM":
+                joins += 1
+            tables = _table_list(tokens, i + 1, single=text != "FROM")[0]
+            (written if target_written and not stack else read).update(tables)
+        elif text == "USING" and target_written and not stack and following != "(":
+            # DELETE FROM t1 USING t1 JOIN t2
+            written.update(_table_list(tokens, i + 1)[0])
+        elif text == "INTO" and statement_type == "SELECT":
+            select_into = True
+        elif text in ("UPDATE", "SHARE") and previous == "FOR":
+            locking = True
+        elif text == "MODE" and previous == "SHARE":
+            locking = True
+        elif text == "BY" and previous == "GROUP":
+            grouped = True
+        elif text == "BY" and previous == "ORDER":
+            ordered = True
+        elif following == "(" and text in _AGGREGATES:
+            aggregates.add(text)
+        if following == "(" and text in _LOCK_CALLS:
+            locking = True
+        if (following == "(" and text in _NON_DETERMINISTIC_CALLS) or text in _NON_DETERMINISTIC_WORDS:
+            deterministic = False
+        previous = text
+
+    if statement_type == "TRUNCATE" or statement_type == "DROP":
+        read.clear()
+    read.discard("dual")
+    ctes = _cte_names(tokens)
+    read -= ctes
+    written -= ctes
+
+    # Misma puntuación que usaban las notas de aprendizaje, contada sobre tokens
+    score = joins * 2 + max(0, selects - 1) * 3 + int(grouped) + int(ordered) + len(aggregates)
+    hint_offset = tokens[select_index][2] if select_index >= 0 else None
+    return StatementInfo(statement_type, frozenset(read), frozenset(written), locking, select_into,
+                         deterministic, statements, score, hint_offset)
+
+
+class SQLClassifier:
+    """
+    Clasificador de sentencias con memoria LRU por texto SQL.
+
+    Tokeniza la sentencia una sola vez (ignorando comentarios y literales) y
+    reutiliza el análisis para las siguientes apariciones del mismo texto: el
+    enrutado a réplicas, la caché de resultados, su invalidación, el commit y
+    las notas de aprendizaje comparten el mismo análisis.
+    """
+
+    def __init__(self, max_entries: int = SQL_CLASSIFIER_CACHE_SIZE,
+                 max_length: int = SQL_CLASSIFIER_MAX_LENGTH):
+        self.max_entries = max_entries
+        self.max_length = max_length
+        self._entries: "OrderedDict[str, StatementInfo]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def classify(self, query: str) -> StatementInfo:
+        with self._lock:
+            info = self._entries.get(query)
+            if info is not None:
+                self._entries.move_to_end(query)
+                self._stats["hits"] += 1
+                return info
+            self._stats["misses"] += 1
+        info = _analyze(query)
+        # Las sentencias muy largas (INSERT con miles de valores) no se memorizan
+        if self.max_entries > 0 and len(query) <= self.max_length:
+            with self._lock:
+                self._entries[query] = info
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._stats["evictions"] += 1
+        return info
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0,
+                **self._stats,
+            }
+
+
+sql_classifier = SQLClassifier()
+
+
+def classify(query: str) -> StatementInfo:
+    """Análisis memorizado de una sentencia SQL"""
+    return sql_classifier.classify(query)
+
+
+def get_classifier_stats() -> Dict[str, Any]:
+    """Aciertos, fallos y expulsiones de la memoria del clasificador"""
+    return sql_classifier.stats()
@@ -0,0 +1,300 @@
+import base64
+import csv
+import gzip
+import io
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dt_time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence
+from .bulk_loader import CSV_NULL, quote_identifier
+
+# Filas por consulta keyset y tablas exportadas en paralelo
+BACKUP_CHUNK_ROWS = int(os.getenv("BACKUP_CHUNK_ROWS", 10000))
+BACKUP_PARALLEL_TABLES = int(os.getenv("BACKUP_PARALLEL_TABLES", 4))
+_FETCH_BATCH = 1000
+
+EXPORT_FORMATS = ("jsonl", "csv", "json")
+
+
+def _text_value(value: Any) -> Any:
+    """
+    Valor serializable y restaurable: binarios como {"b64": ...} (BulkLoader los
+    decodifica), fechas y decimales como texto
+    """
+    if isinstance(value, (bytes, bytearray)):
+        return {"b64": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, (datetime, date, dt_time, timedelta, Decimal)):
+        return str(value)
+    return value
+
+
+def _csv_value(value: Any) -> Any:
+    """Campo CSV; sin tipos en el fichero un binario no se podría restaurar"""
+    if value is None:
+        return CSV_NULL
+    if isinstance(value, (bytes, bytearray)):
+        raise ValueError("CSV no admite columnas binarias: exporte en jsonl o json")
+    return _text_value(value)
+
+
+def encode_key(values: Sequence[Any]) -> List[Any]:
+    """Clave primaria serializable en el checkpoint"""
+    return [_text_value(v) for v in values]
+
+
+def decode_key(values: Sequence[Any]) -> tuple:
+    return tuple(base64.b64decode(v["b64"]) if isinstance(v, dict) else v for v in values)
+
+
+def primary_key_columns(conn, table: str) -> List[str]:
+    """Columnas de la clave primaria de una tabla (admite esquema.tabla), en orden"""
+    schema, _, name = table.rpartition(".")
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+        SELECT column_name
+        FROM information_schema.key_column_usage
+        WHERE table_schema = COALESCE(%s, DATABASE()) AND table_name = %s
+          AND constraint_name = 'PRIMARY'
+        ORDER BY ordinal_position
+        """, (schema or None, name))
+        return [row[0] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def export_format(file_path: str) -> str:
+    """Formato de exportación por la extensión (.jsonl, .csv o .json, con .gz opcional)"""
+    name = file_path[:-3] if file_path.endswith(".gz") else file_path
+    extension = os.path.splitext(name)[1].lower().lstrip(".")
+    if extension == "ndjson":
+        return "jsonl"
+    return extension if extension in EXPORT_FORMATS else "jsonl"
+
+
+class TableExporter:
+    """
+    Exporta una tabla a un fichero en streaming, con memoria constante.
+
+    Las filas se leen por bloques ordenados por la clave primaria (keyset: WHERE
+    pk > última clave ORDER BY pk LIMIT n) con un cursor sin buffer y se escriben
+    según llegan. Tras cada bloque se guarda un checkpoint con la última clave y
+    el tamaño del fichero; una exportación interrumpida se reanuda truncando el
+    fichero a ese tamaño y continuando desde esa clave.
+
+    Con .gz cada bloque es un miembro gzip independiente, así el fichero es
+    válido en cada checkpoint. Las tablas sin clave primaria se exportan en una
+    sola pasada y no se pueden reanudar.
+    """
+
+    def __init__(self, table: str, file_path: str, file_format: Optional[str] = None,
+                 chunk_size: int = BACKUP_CHUNK_ROWS):
+        self.table = table
+        self.file_path = file_path
+        self.file_format = file_format or export_format(file_path)
+        if self.file_format not in EXPORT_FORMATS:
+            raise ValueError(f"Formato no soportado: {self.file_format} (use {', '.join(EXPORT_FORMATS)})")
+        self.compress = file_path.endswith(".gz")
+        self.chunk_size = max(1, chunk_size)
+        self.checkpoint_path = f"{file_path}.checkpoint.json"
+
+    # ========== CHECKPOINT ==========
+
+    def _read_checkpoint(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if checkpoint.get("table") != self.table or checkpoint.get("format") != self.file_format:
+            return None
+        try:
+            if os.path.getsize(self.file_path) < checkpoint["offset"]:
+                return None
+        except OSError:
+            return None
+        return checkpoint
+
+    def _write_checkpoint(self, checkpoint: Dict[str, Any]):
+        temp_file = self.checkpoint_path + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(temp_file, self.checkpoint_path)
+
+    # ========== ESCRITURA ==========
+
+    def _encode_rows(self, columns: List[str], rows: List[tuple], rows_before: int) -> bytes:
+        buffer = io.StringIO()
+        if self.file_format == "csv":
+            writer = csv.writer(buffer, lineterminator="\n")
+            for row in rows:
+                writer.writerow([_csv_value(value) for value in row])
+        else:
+            lines = [json.dumps(dict(zip(columns, (_text_value(v) for v in row))), ensure_ascii=False)
+                     for row in rows]
+            if self.file_format == "json":
+                buffer.write(("" if rows_before == 0 else ",\n") + ",\n".join(lines))
+            else:
+                buffer.write("".join(line + "\n" for line in lines))
+        return buffer.getvalue().encode("utf-8")
+
+    def _header(self, columns: List[str]) -> bytes:
+        if self.file_format == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer, lineterminator="\n").writerow(columns)
+            return buffer.getvalue().encode("utf-8")
+        return b"[\n" if self.file_format == "json" else b""
+
+    def _open_member(self, f):
+        """Destino de escritura de un bloque: un miembro gzip propio si se comprime"""
+        return gzip.GzipFile(fileobj=f, mode="wb", compresslevel=6) if self.compress else f
+
+    def _close_member(self, f, sink):
+        if sink is not f:
+            sink.close()
+        f.flush()
+        os.fsync(f.fileno())
+
+    # ========== LECTURA ==========
+
+    def _chunk_query(self, primary_key: List[str], last_key: Optional[tuple]) -> str:
+        order = ", ".join(quote_identifier(column) for column in primary_key)
+        query = f"SELECT * FROM {quote_identifier(self.table)}"
+        if last_key is not None:
+            if len(primary_key) == 1:
+                query += f" WHERE {order} > %s"
+            else:
+                query += f" WHERE ({order}) > ({', '.join(['%s'] * len(primary_key))})"
+        return f"{query} ORDER BY {order} LIMIT {self.chunk_size}"
+
+    def export(self, connector=None, resume: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Exporta la tabla al fichero
+
+        Args:
+            connector: MySQLConnector a usar (por defecto uno nuevo del pool)
+            resume: Continuar desde el checkpoint de una exportación interrumpida
+
+        Returns:
+            Dict con rows, chunks, bytes, resumed, execution_time y rows_per_second,
+            o None si falló (el checkpoint se conserva para reanudar)
+        """
+        from .conector_mysql import MySQLConnector
+
+        start_time = time.time()
+        db = connector or MySQLConnector()
+        owns_connector = connector is None
+        cursor = None
+        exhausted = True
+        try:
+            if not db.connect():
+                return None
+            primary_key = primary_key_columns(db.conn, self.table)
+            checkpoint = self._read_checkpoint() if resume and primary_key else None
+            if checkpoint and checkpoint.get("primary_key") != primary_key:
+                checkpoint = None
+            rows_written = checkpoint["rows"] if checkpoint else 0
+            last_key = decode_key(checkpoint["last_key"]) if checkpoint and checkpoint["last_key"] else None
+            stats = {"rows": 0, "chunks": 0, "resumed": bool(checkpoint)}
+
+            with open(self.file_path, "r+b" if checkpoint else "wb") as f:
+                if checkpoint:
+                    # Descarta lo escrito después del último checkpoint
+                    f.truncate(checkpoint["offset"])
+                    f.seek(checkpoint["offset"])
+                started = bool(checkpoint)
+                while True:
+                    if primary_key:
+                        query = self._chunk_query(primary_key, last_key)
+                    else:
+                        query = f"SELECT * FROM {quote_identifier(self.table)}"
+                    cursor = db.conn.cursor(buffered=False)
+                    exhausted = False
+                    cursor.execute(query, last_key or ())
+                    columns = list(cursor.column_names)
+                    key_index = [columns.index(column) for column in primary_key]
+                    sink = self._open_member(f)
+                    if not started:
+                        sink.write(self._header(columns))
+                        started = True
+                    chunk_rows = 0
+                    while True:
+                        rows = cursor.fetchmany(_FETCH_BATCH)
+                        if rows:
+                            sink.write(self._encode_rows(columns, rows, rows_written))
+                            rows_written += len(rows)
+                            chunk_rows += len(rows)
+                            if key_index:
+                                last_key = tuple(rows[-1][i] for i in key_index)
+                        if len(rows) < _FETCH_BATCH:
+                            break
+                    exhausted = True
+                    cursor.close()
+                    cursor = None
+                    self._close_member(f, sink)
+                    stats["chunks"] += 1
+                    stats["rows"] += chunk_rows
+                    if not primary_key or chunk_rows < self.chunk_size:
+                        break
+                    self._write_checkpoint({
+                        "table": self.table,
+                        "format": self.file_format,
+                        "primary_key": primary_key,
+                        "last_key": encode_key(last_key),
+                        "rows": rows_written,
+                        "offset": f.tell(),
+                    })
+                if self.file_format == "json":
+                    sink = self._open_member(f)
+                    sink.write(b"\n]\n")
+                    self._close_member(f, sink)
+                stats["bytes"] = f.tell()
+        except Exception as e:
+            print(f"❌ Error exportando {self.table}: {e}")
+            return None
+        finally:
+            if cursor is not None and not exhausted:
+                # Filas sin leer en un cursor sin buffer: la conexión no se reutiliza
+                db.invalidate()
+            elif cursor is not None:
+                cursor.close()
+            if owns_connector:
+                db.disconnect()
+
+        try:
+            os.remove(self.checkpoint_path)
+        except OSError:
+            pass
+        elapsed = time.time() - start_time
+        stats["total_rows"] = rows_written
+        stats["execution_time"] = elapsed
+        stats["rows_per_second"] = round(stats["rows"] / elapsed, 1) if elapsed > 0 else None
+        return stats
+
+
+def export_tables(tables: List[str], directory: str, file_format: str = "jsonl.gz",
+                  max_workers: int = BACKUP_PARALLEL_TABLES, resume: bool = True,
+                  chunk_size: int = BACKUP_CHUNK_ROWS) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Exporta varias tablas en paralelo, cada una con su propia conexión del pool
+
+    Cada tabla se escribe en `directory/<tabla>.<file_format>` (p. ej. jsonl.gz o csv).
+
+    Returns:
+        Dict tabla -> estadísticas de TableExporter.export (None si falló)
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    def export_one(table: str):
+        file_path = os.path.join(directory, f"{table}.{file_format}")
+        return TableExporter(table, file_path, chunk_size=chunk_size).export(resume=resume)
+
+    if not tables:
+        return {}
+    # Ejecutor propio: las exportaciones largas no deben ocupar el de las herramientas
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tables))),
+                            thread_name_prefix="table-export") as executor:
+        return dict(zip(tables, executor.map(export_one, tables)))
@@ -1,6 +1,12 @@
 from core import BaseTool
 from fastmcp import FastMCP
-from .services import get_information
+from .services import (
+    get_information_async,
+    get_tables_list_async,
+    get_tables_page_async,
+    get_table_info_async,
+    get_table_relations_async
+)
 
 
 class InfoTool(BaseTool):
@@ -14,8 +20,62 @@ class InfoTool(BaseTool):
             description="""
             Proporciona el esquema completo de una base de datos MySQL, incluyendo tablas, 
             columnas, tipos y relaciones.
+            
+            Se sirve desde una instantánea en caché que se refresca en segundo plano
+            únicamente cuando cambia la estructura de alguna tabla.
             """,
             tags={"database", "schema", "mysql", "metadata", "analysis", "documentation"},
             )
-      def get_database_schema_info():
-         return get_information()
\ No newline at end of file
+      async def get_database_schema_info():
+         return await get_information_async()
+
+      @self.mcp.resource(
+            uri="schema://database/tables",
+            name="get_database_tables",
+            description="""
+            Lista compacta con los nombres de todas las tablas de la base de datos y el
+            número de páginas disponibles en schema://database/tables/page/{page}.
+            Recomendado como primer paso antes de pedir el detalle de tablas concretas.
+            """,
+            tags={"database", "schema", "mysql", "metadata"},
+            )
+      async def get_database_tables():
+         return await get_tables_list_async()
+
+      @self.mcp.resource(
+            uri="schema://database/tables/page/{page}",
+            name="get_database_tables_page",
+            description="""
+            Página de tablas con sus columnas (nombre y tipo), claves primarias y tablas
+            a las que referencian. Las páginas empiezan en 1.
+            """,
+            tags={"database", "schema", "mysql", "metadata"},
+            )
+      async def get_database_tables_page(page: int):
+         return await get_tables_page_async(page)
+
+      @self.mcp.resource(
+            uri="schema://database/table/{name}",
+            name="get_table_schema_info",
+            description="""
+            Estructura completa de una sola tabla: columnas, tipos, nulabilidad, valores
+            por defecto, claves primarias, claves foráneas e índices, más el número
+            aproximado de filas según las estadísticas de MySQL (approximate_rows).
+            """,
+            tags={"database", "schema", "mysql", "metadata", "indexes"},
+            )
+      async def get_table_schema_info(name: str):
+         return await get_table_info_async(name)
+
+      @self.mcp.resource(
+            uri="schema://database/table/{name}/relations",
+            name="get_table_relations",
+            description="""
+            Vecindario de claves foráneas de una tabla: tablas a las que referencia, tablas
+            que la referencian y claves primarias de cada vecina. Útil para construir JOINs
+            sin descargar el esquema completo.
+            """,
+            tags={"database", "schema", "mysql", "relationships"},
+            )
+      async def get_table_relations(name: str):
+         return await get_table_relations_async(name)
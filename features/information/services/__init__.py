@@ -1,3 +1,17 @@
-from .get_information import get_information
+from .get_information import get_information, get_information_async, schema_cache
+from .schema_resources import (
+    get_tables_list_async,
+    get_tables_page_async,
+    get_table_info_async,
+    get_table_relations_async
+)
 
-__all__ = ["get_information"]
\ No newline at end of file
+__all__ = [
+    "get_information",
+    "get_information_async",
+    "schema_cache",
+    "get_tables_list_async",
+    "get_tables_page_async",
+    "get_table_info_async",
+    "get_table_relations_async"
+]
\ No newline at end of file
@@ -1,4 +1,5 @@
-from core import MySQLConnector
+from core import MySQLConnector, run_blocking
+from .schema_cache import SchemaSnapshotCache
 import json
 
 def get_all_tables_safe(db):
@@ -68,13 +69,200 @@ def get_foreign_keys_safe(db, table_name: str):
     
     return normalized_result
 
-def get_information():
+# ========== INTROSPECCIÓN POR LOTES ==========
+# Una consulta por vista del catálogo para todo el esquema (o para un subconjunto de
+# tablas), agrupando después en Python: el número de viajes a MySQL es constante.
+
+def _table_filter(db, tables):
+    """Condición y parámetros para limitar una vista de information_schema a ciertas tablas"""
+    params = [db.config['database']]
+    if tables is None:
+        return "", params
+    params.extend(tables)
+    return f" AND table_name IN ({', '.join(['%s'] * len(tables))})", params
+
+def _group_by_table(rows) -> dict:
+    grouped = {}
+    for row in rows or []:
+        grouped.setdefault(row['table_name'], []).append(row)
+    return grouped
+
+def get_columns_by_table(db, tables: list = None) -> dict:
+    """Columnas de todas las tablas (o de las indicadas) agrupadas por tabla"""
+    condition, params = _table_filter(db, tables)
+    query = f"""
+    SELECT table_name, column_name, data_type, is_nullable, column_default, column_key
+    FROM information_schema.columns
+    WHERE table_schema = %s{condition}
+    ORDER BY table_name, ordinal_position
     """
-    Obtiene información completa de la base de datos en formato JSON:
-    - Número total de tablas
-    - Nombres de todas las tablas
-    - Claves primarias de cada tabla
-    - Claves foráneas y sus relaciones
+    return _group_by_table(db.execute_query(query, tuple(params)))
+
+def get_foreign_keys_by_table(db, tables: list = None) -> dict:
+    """Claves foráneas de todas las tablas (o de las indicadas) agrupadas por tabla"""
+    condition, params = _table_filter(db, tables)
+    query = f"""
+    SELECT table_name, column_name, referenced_table_name, referenced_column_name, constraint_name
+    FROM information_schema.key_column_usage
+    WHERE table_schema = %s{condition}
+        AND referenced_table_name IS NOT NULL
+    ORDER BY table_name, constraint_name, ordinal_position
+    """
+    return _group_by_table(db.execute_query(query, tuple(params)))
+
+def get_indexes_by_table(db, tables: list = None) -> dict:
+    """
+    Índices de todas las tablas (o de las indicadas) agrupados por tabla:
+    {tabla: [{"name", "columns", "unique", "type"}, ...]}
+    """
+    condition, params = _table_filter(db, tables)
+    query = f"""
+    SELECT table_name, index_name, column_name, seq_in_index, non_unique, index_type
+    FROM information_schema.statistics
+    WHERE table_schema = %s{condition}
+    ORDER BY table_name, index_name, seq_in_index
+    """
+    indexes = {}
+    for table, rows in _group_by_table(db.execute_query(query, tuple(params))).items():
+        by_name = {}
+        for row in rows:
+            index = by_name.setdefault(row['index_name'], {
+                "name": row['index_name'],
+                "columns": [],
+                "unique": not int(row['non_unique']),
+                "type": row['index_type']
+            })
+            index["columns"].append(row['column_name'])
+        indexes[table] = list(by_name.values())
+    return indexes
+
+def _details_from_rows(columns: list, foreign_keys: list) -> dict:
+    table_details = {
+        "columns": [],
+        "primary_keys": [],
+        "foreign_keys": []
+    }
+    for col in columns:
+        table_details["columns"].append({
+            "name": col['column_name'],
+            "type": col['data_type'],
+            "nullable": col['is_nullable'] == 'YES',
+            "default": col.get('column_default')
+        })
+        if col.get('column_key') == 'PRI':
+            table_details["primary_keys"].append(col['column_name'])
+    for fk in foreign_keys:
+        table_details["foreign_keys"].append({
+            "column": fk['column_name'],
+            "references_table": fk['referenced_table_name'],
+            "references_column": fk['referenced_column_name'],
+            "constraint_name": fk['constraint_name']
+        })
+    return table_details
+
+def get_tables_details(db, tables: list, all_tables: bool = False) -> dict:
+    """
+    Columnas, claves primarias y claves foráneas de varias tablas con dos consultas
+    
+    Args:
+        db: Conector conectado
+        tables: Tablas a describir
+        all_tables: True si `tables` es el esquema completo (evita el filtro IN)
+    """
+    filter_tables = None if all_tables else list(tables)
+    if filter_tables == []:
+        return {}
+    columns = get_columns_by_table(db, filter_tables)
+    foreign_keys = get_foreign_keys_by_table(db, filter_tables)
+    return {
+        table: _details_from_rows(columns.get(table, []), foreign_keys.get(table, []))
+        for table in tables
+    }
+
+def get_table_details(db, table: str) -> dict:
+    """Columnas, claves primarias y claves foráneas de una tabla (dos consultas por tabla)"""
+    table_details = {
+        "columns": [],
+        "primary_keys": [],
+        "foreign_keys": []
+    }
+    
+    # Obtener esquema de la tabla (usando versión segura)
+    schema = get_table_schema_safe(db, table)
+    if schema:
+        for col in schema:
+            col_info = {
+                "name": col['column_name'],
+                "type": col['data_type'],
+                "nullable": col['is_nullable'] == 'YES',
+                "default": col.get('column_default')
+            }
+            table_details["columns"].append(col_info)
+            
+            # Identificar clave primaria
+            if col.get('column_key') == 'PRI':
+                table_details["primary_keys"].append(col['column_name'])
+    
+    # Obtener claves foráneas (usando versión segura)
+    foreign_keys = get_foreign_keys_safe(db, table)
+    
+    for fk in foreign_keys:
+        fk_info = {
+            "column": fk['column_name'],
+            "references_table": fk['referenced_table_name'],
+            "references_column": fk['referenced_column_name'],
+            "constraint_name": fk['constraint_name']
+        }
+        table_details["foreign_keys"].append(fk_info)
+    
+    return table_details
+
+def build_information(db_info, tables: list, db_structure: dict) -> dict:
+    """
+    Construye el documento de información a partir de la estructura de cada tabla:
+    resumen, relaciones entre tablas y tabla con más relaciones
+    """
+    # Obtener relaciones entre tablas (mapa de relaciones)
+    relationships = {}
+    
+    for table, details in db_structure.items():
+        for fk in details['foreign_keys']:
+            relation = f"{table}.{fk['column']} → {fk['references_table']}.{fk['references_column']}"
+            relationships[relation] = {
+                "from_table": table,
+                "from_column": fk['column'],
+                "to_table": fk['references_table'],
+                "to_column": fk['references_column'],
+                "constraint": fk['constraint_name']
+            }
+    
+    # Obtener tabla con más relaciones
+    table_relations = {}
+    for rel in relationships.values():
+        table_relations[rel['from_table']] = table_relations.get(rel['from_table'], 0) + 1
+    
+    most_related_table = None
+    most_relations_count = 0
+    if table_relations:
+        most_related_table = max(table_relations, key=table_relations.get)
+        most_relations_count = table_relations[most_related_table]
+    
+    return {
+        "database_info": db_info,
+        "summary": {
+            "num_tables": len(tables),
+            "tables": tables,
+            "num_relationships": len(relationships),
+            "most_related_table": most_related_table,
+            "most_relations_count": most_relations_count
+        },
+        "structure": db_structure,
+        "relationships": relationships
+    }
+
+def get_information_uncached():
+    """
+    Versión sin caché de get_information: recorre el esquema completo en cada llamada
     
     Returns:
         str: Cadena JSON con toda la información de la base de datos
@@ -87,87 +275,33 @@ def get_information():
         tables = get_all_tables_safe(db)
         if not tables:
             return json.dumps({"error": "No se encontraron tablas en la base de datos"})
-            
-        num_tables = len(tables)
-        
-        # 3. Obtener detalles de cada tabla
-        db_structure = {}
-        
-        for table in tables:
-            table_details = {
-                "columns": [],
-                "primary_keys": [],
-                "foreign_keys": []
-            }
-            
-            # Obtener esquema de la tabla (usando versión segura)
-            schema = get_table_schema_safe(db, table)
-            if schema:
-                for col in schema:
-                    col_info = {
-                        "name": col['column_name'],
-                        "type": col['data_type'],
-                        "nullable": col['is_nullable'] == 'YES',
-                        "default": col.get('column_default')
-                    }
-                    table_details["columns"].append(col_info)
-                    
-                    # Identificar clave primaria
-                    if col.get('column_key') == 'PRI':
-                        table_details["primary_keys"].append(col['column_name'])
-            
-            # Obtener claves foráneas (usando versión segura)
-            foreign_keys = get_foreign_keys_safe(db, table)
-            
-            for fk in foreign_keys:
-                fk_info = {
-                    "column": fk['column_name'],
-                    "references_table": fk['referenced_table_name'],
-                    "references_column": fk['referenced_column_name'],
-                    "constraint_name": fk['constraint_name']
-                }
-                table_details["foreign_keys"].append(fk_info)
-            
-            db_structure[table] = table_details
-        
-        # 4. Obtener relaciones entre tablas (mapa de relaciones)
-        relationships = {}
-        
-        for table, details in db_structure.items():
-            for fk in details['foreign_keys']:
-                relation = f"{table}.{fk['column']} → {fk['references_table']}.{fk['references_column']}"
-                relationships[relation] = {
-                    "from_table": table,
-                    "from_column": fk['column'],
-                    "to_table": fk['references_table'],
-                    "to_column": fk['references_column'],
-                    "constraint": fk['constraint_name']
-                }
-        
-        # 5. Obtener tabla con más relaciones
-        table_relations = {}
-        for rel in relationships.values():
-            table_relations[rel['from_table']] = table_relations.get(rel['from_table'], 0) + 1
         
-        most_related_table = None
-        most_relations_count = 0
-        if table_relations:
-            most_related_table = max(table_relations, key=table_relations.get)
-            most_relations_count = table_relations[most_related_table]
+        # 3. Obtener detalles de todas las tablas con consultas por lotes
+        db_structure = get_tables_details(db, tables, all_tables=True)
         
-        # 6. Construir el resultado final
-        result = {
-            "database_info": db_info,
-            "summary": {
-                "num_tables": num_tables,
-                "tables": tables,
-                "num_relationships": len(relationships),
-                "most_related_table": most_related_table,
-                "most_relations_count": most_relations_count
-            },
-            "structure": db_structure,
-            "relationships": relationships
-        }
-        
-        # 7. Convertir a JSON y retornar
+        # 4. Construir el resultado final y convertirlo a JSON
+        result = build_information(db_info, tables, db_structure)
         return json.dumps(result, indent=2, default=str, ensure_ascii=False)
+
+def get_information():
+    """
+    Obtiene información completa de la base de datos en formato JSON:
+    - Número total de tablas
+    - Nombres de todas las tablas
+    - Claves primarias de cada tabla
+    - Claves foráneas y sus relaciones
+    
+    La respuesta se sirve desde una instantánea en memoria que se refresca en
+    segundo plano solo cuando cambia la estructura de alguna tabla.
+    
+    Returns:
+        str: Cadena JSON con toda la información de la base de datos
+    """
+    return schema_cache.get_json()
+
+# Instantánea compartida del esquema, construida con las funciones de este módulo
+schema_cache = SchemaSnapshotCache(get_tables_details, build_information, get_indexes_by_table)
+
+async def get_information_async():
+    """Versión asíncrona de get_information para el event loop de FastMCP"""
+    return await run_blocking(get_information)
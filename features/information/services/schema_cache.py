@@ -0,0 +1,248 @@
+from core import MySQLConnector
+from typing import Any, Callable, Dict, List, Optional
+import json
+import os
+import threading
+import time
+
+SCHEMA_CACHE_REFRESH_INTERVAL = float(os.getenv("SCHEMA_CACHE_REFRESH_INTERVAL", 60))
+SCHEMA_CACHE_FILE = os.getenv("SCHEMA_CACHE_FILE", "")
+
+# Firma por tabla: fechas de creación/actualización y sumas de control de columnas, índices y FKs.
+# Una sola consulta que permite detectar qué tablas cambiaron desde la última instantánea.
+SIGNATURES_QUERY = """
+SELECT
+    t.table_name AS table_name,
+    t.create_time AS create_time,
+    t.update_time AS update_time,
+    c.ddl_checksum AS ddl_checksum,
+    i.index_checksum AS index_checksum,
+    k.fk_checksum AS fk_checksum
+FROM information_schema.tables t
+LEFT JOIN (
+    SELECT table_name,
+           CONCAT(COUNT(*), ':', BIT_XOR(CRC32(CONCAT_WS('|',
+               column_name, ordinal_position, column_type, is_nullable,
+               IFNULL(column_default, '<null>'), column_key)))) AS ddl_checksum
+    FROM information_schema.columns
+    WHERE table_schema = %s
+    GROUP BY table_name
+) c ON c.table_name = t.table_name
+LEFT JOIN (
+    SELECT table_name,
+           CONCAT(COUNT(*), ':', BIT_XOR(CRC32(CONCAT_WS('|',
+               index_name, seq_in_index, column_name, non_unique, index_type)))) AS index_checksum
+    FROM information_schema.statistics
+    WHERE table_schema = %s
+    GROUP BY table_name
+) i ON i.table_name = t.table_name
+LEFT JOIN (
+    SELECT table_name,
+           CONCAT(COUNT(*), ':', BIT_XOR(CRC32(CONCAT_WS('|',
+               constraint_name, column_name, referenced_table_name,
+               referenced_column_name)))) AS fk_checksum
+    FROM information_schema.key_column_usage
+    WHERE table_schema = %s AND referenced_table_name IS NOT NULL
+    GROUP BY table_name
+) k ON k.table_name = t.table_name
+WHERE t.table_schema = %s
+"""
+
+
+class SchemaSnapshotCache:
+    """
+    Instantánea en memoria (y opcionalmente en disco) del esquema de la base de datos.
+
+    - La primera lectura construye la instantánea; las siguientes la devuelven ya serializada.
+    - Un hilo en segundo plano compara cada SCHEMA_CACHE_REFRESH_INTERVAL segundos la firma
+      de cada tabla (CREATE_TIME, UPDATE_TIME y sumas de control de columnas/índices/FKs) y solo
+      vuelve a leer las tablas cuya firma cambió.
+    - Con SCHEMA_CACHE_FILE la instantánea se persiste y se reutiliza tras un reinicio.
+    """
+
+    def __init__(self, tables_details_fn: Callable, build_fn: Callable,
+                 indexes_fn: Optional[Callable] = None,
+                 refresh_interval: float = SCHEMA_CACHE_REFRESH_INTERVAL,
+                 cache_file: str = SCHEMA_CACHE_FILE):
+        self._tables_details_fn = tables_details_fn
+        self._build_fn = build_fn
+        self._indexes_fn = indexes_fn
+        self.refresh_interval = refresh_interval
+        self.cache_file = cache_file
+
+        self._db_info = None
+        self._tables: List[str] = []
+        self._signatures: Dict[str, str] = {}
+        self._structure: Dict[str, Dict[str, Any]] = {}
+        self._indexes: Dict[str, List[Dict[str, Any]]] = {}
+        self._document: Optional[Dict[str, Any]] = None
+        self._json: Optional[str] = None
+        self._version = 0
+        self._refreshed_at = None
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._worker = None
+        self._stats = {"refreshes": 0, "tables_reloaded": 0, "checks": 0}
+
+        self._load_from_disk()
+
+    # ========== LECTURA ==========
+
+    def get_json(self) -> str:
+        """Documento completo del esquema serializado; casi gratuito tras la primera lectura"""
+        self._ensure_worker()
+        if self._json is None:
+            self.refresh()
+        if self._json is None:
+            return json.dumps({"error": "No se encontraron tablas en la base de datos"})
+        return self._json
+
+    def get_document(self) -> Optional[Dict[str, Any]]:
+        """Documento del esquema como diccionario (compartido: no debe modificarse)"""
+        self._ensure_worker()
+        if self._document is None:
+            self.refresh()
+        return self._document
+
+    def get_indexes(self, table: str) -> List[Dict[str, Any]]:
+        """Índices de una tabla según la última instantánea"""
+        self._ensure_worker()
+        if self._document is None:
+            self.refresh()
+        return self._indexes.get(table, [])
+
+    @property
+    def version(self) -> int:
+        """Se incrementa cada vez que la instantánea cambia"""
+        return self._version
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tables": len(self._tables),
+            "version": self._version,
+            "refreshed_at": self._refreshed_at,
+            "refresh_interval": self.refresh_interval,
+            **self._stats,
+        }
+
+    # ========== REFRESCO INCREMENTAL ==========
+
+    @staticmethod
+    def _signature(row: Dict[str, Any]) -> str:
+        return "|".join(str(row.get(key)) for key in
+                        ("create_time", "update_time", "ddl_checksum", "index_checksum", "fk_checksum"))
+
+    def refresh(self) -> bool:
+        """
+        Compara las firmas de las tablas y vuelve a leer solo las que cambiaron
+
+        Returns:
+            True si la instantánea cambió
+        """
+        with self._refresh_lock:
+            with MySQLConnector() as db:
+                database = db.config['database']
+                rows = db.execute_query(SIGNATURES_QUERY, (database, database, database, database))
+                self._stats["checks"] += 1
+                if rows is None:
+                    return False
+
+                signatures = {row['table_name']: self._signature(row) for row in rows}
+                tables = [row['table_name'] for row in rows]
+                changed = [t for t in tables if self._signatures.get(t) != signatures[t]]
+                removed = set(self._signatures) - set(signatures)
+
+                if self._json is not None and not changed and not removed:
+                    return False
+
+                # Lecturas por lotes: todo el esquema si cambió todo, si no solo las tablas modificadas
+                all_changed = len(changed) == len(tables)
+                structure = {t: self._structure[t] for t in tables if t in self._structure}
+                structure.update(self._tables_details_fn(db, changed, all_tables=all_changed))
+                indexes = {t: self._indexes[t] for t in tables if t in self._indexes}
+                if self._indexes_fn is not None and changed:
+                    for table in changed:
+                        indexes.pop(table, None)
+                    indexes.update(self._indexes_fn(db, None if all_changed else changed))
+
+                db_info = db.get_database_info() if self._db_info is None or changed else self._db_info
+
+            self._stats["refreshes"] += 1
+            self._stats["tables_reloaded"] += len(changed)
+            self._publish(db_info, tables, signatures, structure, indexes)
+            self._save_to_disk()
+            return True
+
+    def _publish(self, db_info, tables: List[str], signatures: Dict[str, str],
+                 structure: Dict[str, Dict[str, Any]],
+                 indexes: Dict[str, List[Dict[str, Any]]]):
+        ordered = {table: structure[table] for table in tables}
+        document = self._build_fn(db_info, tables, ordered) if tables else None
+        serialized = (json.dumps(document, indent=2, default=str, ensure_ascii=False)
+                      if document is not None else None)
+        with self._lock:
+            self._db_info = db_info
+            self._tables = tables
+            self._signatures = signatures
+            self._structure = ordered
+            self._indexes = indexes
+            self._document = document
+            self._json = serialized
+            self._version += 1
+            self._refreshed_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+    # ========== HILO DE REFRESCO ==========
+
+    def _ensure_worker(self):
+        if self._worker is not None or self.refresh_interval <= 0:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._refresh_loop, name="schema-cache-refresh", daemon=True
+                )
+                self._worker.start()
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"❌ Error al refrescar el esquema: {e}")
+
+    # ========== PERSISTENCIA EN DISCO ==========
+
+    def _load_from_disk(self):
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            self._publish(snapshot["database_info"], snapshot["tables"],
+                          snapshot["signatures"], snapshot["structure"],
+                          snapshot.get("indexes", {}))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ Instantánea de esquema inválida, se reconstruirá: {e}")
+
+    def _save_to_disk(self):
+        if not self.cache_file:
+            return
+        snapshot = {
+            "database_info": self._db_info,
+            "tables": self._tables,
+            "signatures": self._signatures,
+            "structure": self._structure,
+            "indexes": self._indexes,
+        }
+        tmp_path = self.cache_file + ".tmp"
+        try:
+            directory = os.path.dirname(self.cache_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f, default=str, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            print(f"❌ Error al guardar la instantánea de esquema: {e}")
@@ -0,0 +1,143 @@
+from core import MySQLConnector, run_blocking
+from typing import Any, Dict, List
+import json
+import os
+import threading
+from .get_information import schema_cache
+
+SCHEMA_PAGE_SIZE = int(os.getenv("SCHEMA_PAGE_SIZE", 100))
+
+
+def _compact(data: Any) -> str:
+    """Serialización compacta (sin sangría ni espacios) para ahorrar contexto del LLM"""
+    return json.dumps(data, separators=(",", ":"), default=str, ensure_ascii=False)
+
+
+def _error(message: str) -> str:
+    return _compact({"error": message})
+
+
+class _ReferenceIndex:
+    """Referencias entrantes por tabla, recalculadas solo cuando cambia la instantánea"""
+
+    def __init__(self):
+        self._version = -1
+        self._incoming: Dict[str, List[Dict[str, str]]] = {}
+        self._lock = threading.Lock()
+
+    def incoming(self, document: Dict[str, Any], table: str) -> List[Dict[str, str]]:
+        with self._lock:
+            if self._version != schema_cache.version:
+                incoming = {}
+                for name, details in document["structure"].items():
+                    for fk in details["foreign_keys"]:
+                        incoming.setdefault(fk["references_table"], []).append({
+                            "from_table": name,
+                            "from_column": fk["column"],
+                            "to_column": fk["references_column"],
+                            "constraint": fk["constraint_name"]
+                        })
+                self._incoming = incoming
+                self._version = schema_cache.version
+            return self._incoming.get(table, [])
+
+
+_references = _ReferenceIndex()
+
+
+def get_tables_list() -> str:
+    """Lista compacta con el nombre de todas las tablas"""
+    document = schema_cache.get_document()
+    if document is None:
+        return _error("No se encontraron tablas en la base de datos")
+    tables = document["summary"]["tables"]
+    return _compact({
+        "num_tables": len(tables),
+        "page_size": SCHEMA_PAGE_SIZE,
+        "pages": (len(tables) + SCHEMA_PAGE_SIZE - 1) // SCHEMA_PAGE_SIZE,
+        "tables": tables
+    })
+
+
+def get_tables_page(page: int) -> str:
+    """Página de tablas con sus columnas (nombre y tipo) y claves primarias"""
+    document = schema_cache.get_document()
+    if document is None:
+        return _error("No se encontraron tablas en la base de datos")
+    page = max(1, int(page))
+    tables = document["summary"]["tables"]
+    selected = tables[(page - 1) * SCHEMA_PAGE_SIZE:page * SCHEMA_PAGE_SIZE]
+    structure = document["structure"]
+    return _compact({
+        "page": page,
+        "pages": (len(tables) + SCHEMA_PAGE_SIZE - 1) // SCHEMA_PAGE_SIZE,
+        "tables": {
+            name: {
+                "columns": {col["name"]: col["type"] for col in structure[name]["columns"]},
+                "primary_keys": structure[name]["primary_keys"],
+                "references": sorted({fk["references_table"] for fk in structure[name]["foreign_keys"]})
+            }
+            for name in selected
+        }
+    })
+
+
+def get_table_info(table_name: str) -> str:
+    """
+    Estructura completa de una tabla: columnas, claves, índices y número aproximado
+    de filas (estadísticas de MySQL: no recorre la tabla)
+    """
+    document = schema_cache.get_document()
+    if document is None or table_name not in document["structure"]:
+        return _error(f"La tabla '{table_name}' no existe")
+    with MySQLConnector() as db:
+        approximate_rows = db.count_records(table_name, mode="estimate")
+    return _compact({
+        "table": table_name,
+        **document["structure"][table_name],
+        "indexes": schema_cache.get_indexes(table_name),
+        "approximate_rows": approximate_rows
+    })
+
+
+def get_table_relations(table_name: str) -> str:
+    """
+    Vecindario de claves foráneas de una tabla: a qué tablas referencia, qué tablas la
+    referencian y las claves primarias de cada vecina para construir los JOIN
+    """
+    document = schema_cache.get_document()
+    if document is None or table_name not in document["structure"]:
+        return _error(f"La tabla '{table_name}' no existe")
+    structure = document["structure"]
+    outgoing = structure[table_name]["foreign_keys"]
+    incoming = _references.incoming(document, table_name)
+    neighbours = {fk["references_table"] for fk in outgoing} | {ref["from_table"] for ref in incoming}
+    return _compact({
+        "table": table_name,
+        "references": outgoing,
+        "referenced_by": incoming,
+        "neighbours": {
+            name: {"primary_keys": structure[name]["primary_keys"]}
+            for name in sorted(neighbours) if name in structure
+        }
+    })
+
+
+async def get_tables_list_async() -> str:
+    """Versión asíncrona de get_tables_list"""
+    return await run_blocking(get_tables_list)
+
+
+async def get_tables_page_async(page: int) -> str:
+    """Versión asíncrona de get_tables_page"""
+    return await run_blocking(get_tables_page, page)
+
+
+async def get_table_info_async(table_name: str) -> str:
+    """Versión asíncrona de get_table_info"""
+    return await run_blocking(get_table_info, table_name)
+
+
+async def get_table_relations_async(table_name: str) -> str:
+    """Versión asíncrona de get_table_relations"""
+    return await run_blocking(get_table_relations, table_name)
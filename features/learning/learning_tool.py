@@ -2,10 +2,11 @@ from core import BaseTool
 from fastmcp import FastMCP
 from typing import List, Dict, Any, Optional
 from .services import (
-    save_query_note, 
-    get_query_notes, 
-    search_query_notes, 
-    get_query_suggestions
+    save_query_note_async, 
+    get_query_notes_async, 
+    search_query_notes_async, 
+    get_query_suggestions_async,
+    get_workload_profile_async
 )
 
 class LearningTool(BaseTool):
@@ -54,7 +55,7 @@ class LearningTool(BaseTool):
             """,
             tags={"learning", "mysql", "sql", "documentation", "optimization"}
         )
-        def add_query_learning_note(
+        async def add_query_learning_note(
             query: str,
             execution_time: float,
             rows_affected: int,
@@ -78,7 +79,7 @@ class LearningTool(BaseTool):
             Returns:
                 Información de la nota guardada
             """
-            return save_query_note(
+            return await save_query_note_async(
                 query=query,
                 execution_time=execution_time,
                 rows_affected=rows_affected,
@@ -118,6 +119,7 @@ class LearningTool(BaseTool):
             3. Paginación:
                - Control sobre cantidad de resultados
                - Navegación por grandes conjuntos de datos
+               - Cursor (next_cursor) para continuar desde la página anterior
             
             4. Estadísticas agregadas:
                - Tasa de éxito global
@@ -132,11 +134,12 @@ class LearningTool(BaseTool):
             """,
             tags={"learning", "history", "mysql", "sql", "analysis"}
         )
-        def get_query_learning_history(
+        async def get_query_learning_history(
             limit: int,
             offset: int = 0,
             query_type: str = None,
-            success_only: bool = False
+            success_only: bool = False,
+            cursor: str = None
         ) -> Dict[str, Any]:
             """
             Obtiene el historial de aprendizaje de consultas SQL con opciones de filtrado.
@@ -146,15 +149,17 @@ class LearningTool(BaseTool):
                 offset: Índice inicial para paginación
                 query_type: Filtrar por tipo de consulta (SELECT, INSERT, etc.)
                 success_only: Si es True, solo retorna consultas exitosas
+                cursor: Valor next_cursor de la página anterior (sustituye a offset)
                 
             Returns:
                 Notas de aprendizaje y estadísticas
             """
-            return get_query_notes(
+            return await get_query_notes_async(
                 limit=limit,
                 offset=offset,
                 query_type=query_type,
-                success_only=success_only
+                success_only=success_only,
+                cursor=cursor
             )
         
         @self.mcp.tool(
@@ -171,7 +176,7 @@ class LearningTool(BaseTool):
             1. Búsqueda por contenido:
                - En el texto de las consultas
                - En las anotaciones y observaciones
-               - Coincidencias parciales
+               - Por identificadores SQL completos o por partes (customer_id → customer)
             
             2. Filtros combinados:
                - Por etiquetas asignadas
@@ -180,7 +185,7 @@ class LearningTool(BaseTool):
                - Por tasa de éxito
             
             3. Resultados relevantes:
-               - Ordenados por coincidencia
+               - Ordenados por relevancia (BM25 sobre un índice invertido)
                - Limitados a la cantidad requerida
                - Con toda la información asociada
             
@@ -196,7 +201,7 @@ class LearningTool(BaseTool):
             """,
             tags={"learning", "search", "mysql", "sql", "knowledge retrieval"}
         )
-        def search_query_learning_notes(
+        async def search_query_learning_notes(
             search_term: str = None,
             tags: List[str] = None,
             min_success_rate: float = None,
@@ -220,7 +225,7 @@ class LearningTool(BaseTool):
             Returns:
                 Lista de notas que coinciden con los criterios
             """
-            return search_query_notes(
+            return await search_query_notes_async(
                 search_term=search_term,
                 tags=tags,
                 min_success_rate=min_success_rate,
@@ -259,7 +264,8 @@ class LearningTool(BaseTool):
                - Métricas de impacto (filas afectadas)
             
             3. Relevancia personalizada:
-               - Ordenamiento por similitud
+               - Consultas agrupadas por huella (mismos patrones con distintos literales o alias)
+               - Ordenamiento por similitud estructural (MinHash/LSH) y coincidencia de texto
                - Puntuaciones de relevancia transparentes
                - Filtrado automático de sugerencias irrelevantes
             
@@ -276,7 +282,7 @@ class LearningTool(BaseTool):
             """,
             tags={"learning", "suggestions", "mysql", "sql", "optimization", "ai"}
         )
-        def get_sql_query_suggestions(
+        async def get_sql_query_suggestions(
             query_fragment: str,
             context: str = None,
             limit: int = 5
@@ -292,8 +298,36 @@ class LearningTool(BaseTool):
             Returns:
                 Sugerencias de consultas con métricas asociadas
             """
-            return get_query_suggestions(
+            return await get_query_suggestions_async(
                 query_fragment=query_fragment,
                 context=context,
                 limit=limit
-            )
\ No newline at end of file
+            )
+        
+        @self.mcp.resource(
+            uri="schema://learning/workload_profile/{order_by}",
+            name="get_workload_profile",
+            description="""
+            Perfil de carga de la base de datos construido automáticamente.
+            
+            Cada consulta ejecutada con execute_query_tool se registra en segundo plano
+            (sin añadir latencia) agrupada por huella: la misma consulta con distintos
+            literales, alias o espacios cuenta como un único patrón.
+            
+            Para cada patrón incluye:
+            - Número de ejecuciones y tasa de éxito
+            - Tiempo total, medio, mínimo y máximo
+            - Filas medias devueltas o afectadas
+            - Clases de error observadas (p. ej. ProgrammingError:1146)
+            
+            order_by: total_time, executions, avg_time o failures
+            
+            Ideal para:
+            - Encontrar las consultas que más tiempo consumen en total
+            - Detectar patrones que fallan de forma recurrente
+            - Priorizar índices y optimizaciones
+            """,
+            tags={"learning", "telemetry", "mysql", "sql", "performance"}
+        )
+        async def get_workload_profile(order_by: str = "total_time") -> Dict[str, Any]:
+            return await get_workload_profile_async(order_by=order_by)
@@ -2,12 +2,27 @@ from .learning_service import (
     save_query_note,
     get_query_notes,
     search_query_notes,
-    get_query_suggestions
+    get_query_suggestions,
+    save_query_note_async,
+    get_query_notes_async,
+    search_query_notes_async,
+    get_query_suggestions_async,
+    get_workload_profile,
+    get_workload_profile_async
 )
+from .telemetry import record_query_execution, get_telemetry_stats
 
 __all__ = [
     "save_query_note",
     "get_query_notes",
     "search_query_notes",
-    "get_query_suggestions"
+    "get_query_suggestions",
+    "save_query_note_async",
+    "get_query_notes_async",
+    "search_query_notes_async",
+    "get_query_suggestions_async",
+    "get_workload_profile",
+    "get_workload_profile_async",
+    "record_query_execution",
+    "get_telemetry_stats"
 ]
\ No newline at end of file
@@ -1,41 +1,10 @@
-import json
-import os
-import time
+import asyncio
 import uuid
 from datetime import datetime
 from typing import Dict, List, Optional, Any, Union
-
-# Configuración de ruta del archivo JSON
-LEARNING_DIR = os.path.join("data", "learning")
-LEARNING_FILE = os.path.join(LEARNING_DIR, "query_notes.json")
-
-def _ensure_learning_dir():
-    """Asegura que el directorio de aprendizaje exista"""
-    if not os.path.exists(LEARNING_DIR):
-        os.makedirs(LEARNING_DIR, exist_ok=True)
-
-def _load_notes() -> List[Dict[str, Any]]:
-    """Carga las notas de aprendizaje desde el archivo JSON"""
-    _ensure_learning_dir()
-    if not os.path.exists(LEARNING_FILE):
-        return []
-    
-    try:
-        with open(LEARNING_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (json.JSONDecodeError, FileNotFoundError):
-        return []
-
-def _save_notes(notes: List[Dict[str, Any]]) -> bool:
-    """Guarda las notas de aprendizaje en el archivo JSON"""
-    _ensure_learning_dir()
-    try:
-        with open(LEARNING_FILE, 'w', encoding='utf-8') as f:
-            json.dump(notes, f, indent=2, ensure_ascii=False)
-        return True
-    except Exception as e:
-        print(f"Error al guardar notas de aprendizaje: {e}")
-        return False
+from core.sql_classifier import classify
+from .note_store import note_store
+from .query_fingerprint import fingerprint_query, fingerprint_hash
 
 def save_query_note(
     query: str,
@@ -44,7 +13,8 @@ def save_query_note(
     success: bool,
     note: str,
     tags: List[str] = None,
-    query_type: str = None
+    query_type: str = None,
+    plan: Dict[str, Any] = None
 ) -> Dict[str, Any]:
     """
     Guarda una nota de aprendizaje sobre una consulta SQL
@@ -57,23 +27,15 @@ def save_query_note(
         note: Anotación o aprendizaje sobre la consulta
         tags: Etiquetas para categorizar la consulta
         query_type: Tipo de consulta (SELECT, INSERT, UPDATE, DELETE, etc.)
+        plan: Plan de ejecución (EXPLAIN FORMAT=JSON) y su análisis, si se capturó
         
     Returns:
         Dict con la información de la nota guardada
     """
     # Determinar automáticamente el tipo de consulta si no se proporciona
+    analysis = classify(query)
     if not query_type:
-        query_upper = query.strip().upper()
-        if query_upper.startswith("SELECT"):
-            query_type = "SELECT"
-        elif query_upper.startswith("INSERT"):
-            query_type = "INSERT"
-        elif query_upper.startswith("UPDATE"):
-            query_type = "UPDATE"
-        elif query_upper.startswith("DELETE"):
-            query_type = "DELETE"
-        else:
-            query_type = "OTHER"
+        query_type = analysis.statement_type
     
     # Crear nueva nota
     new_note = {
@@ -86,13 +48,16 @@ def save_query_note(
         "note": note,
         "tags": tags or [],
         "created_at": datetime.now().isoformat(),
-        "complexity": _calculate_query_complexity(query)
+        "complexity": analysis.complexity
     }
+    if plan:
+        new_note["plan"] = plan
     
-    # Cargar notas existentes, añadir la nueva y guardar
-    notes = _load_notes()
-    notes.append(new_note)
-    _save_notes(notes)
+    # Añadir la nota al almacenamiento sin reescribir las existentes
+    try:
+        note_store.add_note(new_note)
+    except Exception as e:
+        print(f"Error al guardar notas de aprendizaje: {e}")
     
     return new_note
 
@@ -100,7 +65,8 @@ def get_query_notes(
     limit: int = 50,
     offset: int = 0,
     query_type: str = None,
-    success_only: bool = False
+    success_only: bool = False,
+    cursor: str = None
 ) -> Dict[str, Any]:
     """
     Obtiene notas de aprendizaje con paginación y filtros opcionales
@@ -110,38 +76,33 @@ def get_query_notes(
         offset: Número de notas a saltar (para paginación)
         query_type: Filtrar por tipo de consulta
         success_only: Solo retornar consultas exitosas
+        cursor: Cursor devuelto en la página anterior (next_cursor); si se indica, se ignora offset
         
     Returns:
         Dict con las notas y metadata de paginación
     """
-    notes = _load_notes()
-    
-    # Aplicar filtros
-    if query_type:
-        notes = [n for n in notes if n.get("query_type") == query_type]
-    if success_only:
-        notes = [n for n in notes if n.get("success")]
+    filters = {"query_type": query_type, "success": True if success_only else None}
     
-    # Ordenar por fecha de creación (más recientes primero)
-    notes.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-    
-    # Aplicar paginación
-    paginated_notes = notes[offset:offset + limit] if notes else []
+    # La página recorre el índice por fecha (más recientes primero); total y estadísticas
+    # salen de los agregados acumulados en cada save_query_note
+    try:
+        paginated_notes, next_cursor = note_store.page_notes(
+            limit=limit, offset=offset, cursor=cursor, newest_first=True, **filters
+        )
+    except ValueError as e:
+        return {"notes": [], "error": str(e)}
+    total = note_store.count_notes(**filters)
     
     return {
         "notes": paginated_notes,
         "pagination": {
-            "total": len(notes),
-            "offset": offset,
+            "total": total,
+            "offset": None if cursor else offset,
             "limit": limit,
-            "has_more": (offset + limit) < len(notes)
+            "has_more": next_cursor is not None,
+            "next_cursor": next_cursor
         },
-        "stats": {
-            "success_rate": sum(1 for n in notes if n.get("success", False)) / len(notes) if notes else 0,
-            "avg_execution_time": sum(n.get("execution_time", 0) for n in notes) / len(notes) if notes else 0,
-            "count_by_type": {qtype: sum(1 for n in notes if n.get("query_type") == qtype) 
-                             for qtype in set(n.get("query_type", "") for n in notes)}
-        }
+        "stats": note_store.aggregate_stats(**filters)
     }
 
 def search_query_notes(
@@ -157,7 +118,7 @@ def search_query_notes(
     Busca notas de aprendizaje por diversos criterios
     
     Args:
-        search_term: Término a buscar en consultas y notas
+        search_term: Término a buscar en consultas y notas (resultados ordenados por relevancia BM25)
         tags: Filtrar por etiquetas específicas
         min_success_rate: Tasa mínima de éxito
         max_execution_time: Tiempo máximo de ejecución
@@ -168,42 +129,18 @@ def search_query_notes(
     Returns:
         Lista de notas que coinciden con los criterios
     """
-    notes = _load_notes()
-    results = []
-    
-    for note in notes:
-        # Filtrar por término de búsqueda
-        if search_term and search_term.lower() not in note.get("query", "").lower() and search_term.lower() not in note.get("note", "").lower():
-            continue
-            
-        # Filtrar por etiquetas
-        if tags and not all(tag in note.get("tags", []) for tag in tags):
-            continue
-            
-        # Filtrar por tiempo de ejecución
-        if max_execution_time is not None and note.get("execution_time", 0) > max_execution_time:
-            continue
-            
-        # Filtrar por fechas
-        if date_from or date_to:
-            note_date = datetime.fromisoformat(note.get("created_at", datetime.now().isoformat()))
-            
-            if date_from:
-                from_date = datetime.fromisoformat(date_from)
-                if note_date < from_date:
-                    continue
-                    
-            if date_to:
-                to_date = datetime.fromisoformat(date_to)
-                if note_date > to_date:
-                    continue
-        
-        results.append(note)
-        
-        if len(results) >= limit:
-            break
-    
-    return results
+    filters = dict(
+        tags=tags,
+        max_execution_time=max_execution_time,
+        date_from=date_from,
+        date_to=date_to
+    )
+    
+    # Con término de búsqueda: ranking BM25 sobre el índice invertido
+    if search_term:
+        return note_store.search_notes(search_term, limit=limit, **filters)
+    
+    return note_store.find_notes(limit=limit, **filters)
 
 def get_query_suggestions(
     query_fragment: str,
@@ -221,108 +158,98 @@ def get_query_suggestions(
     Returns:
         Dict con sugerencias y estadísticas de rendimiento
     """
-    notes = _load_notes()
-    
-    # Filtrar solo consultas exitosas
-    successful_notes = [n for n in notes if n.get("success", False)]
-    
     # Si no hay consultas exitosas, retornar vacío
-    if not successful_notes:
+    if not note_store.has_successful_fingerprints():
         return {
             "suggestions": [],
             "message": "No hay consultas previas para generar sugerencias"
         }
-    
-    # Buscar consultas similares
-    query_fragment = query_fragment.lower()
-    
-    # Función para calcular similitud simple
-    def calculate_similarity(note):
-        query = note.get("query", "").lower()
-        note_text = note.get("note", "").lower()
-        
-        # Mayor peso si coincide con la consulta
-        query_score = 3 if query_fragment in query else 0
-        
-        # Peso adicional si coincide con la nota
-        note_score = 1 if query_fragment in note_text else 0
-        
-        # Considerar el contexto si se proporciona
-        context_score = 0
-        if context and context.lower() in note_text:
-            context_score = 2
-            
-        return query_score + note_score + context_score
-    
-    # Filtrar y ordenar por relevancia
-    similar_queries = [(note, calculate_similarity(note)) for note in successful_notes]
-    similar_queries = [(note, score) for note, score in similar_queries if score > 0]
-    similar_queries.sort(key=lambda x: (x[1], -float(x[0].get("execution_time", 0))), reverse=True)
-    
-    # Tomar las mejores sugerencias
-    top_suggestions = similar_queries[:limit]
-    
-    # Formatear resultados
+
+    # Candidatas adicionales por texto (fragmentos que no son SQL o contexto en lenguaje natural)
+    text = f"{query_fragment} {context}" if context else query_fragment
+    text_matches = note_store.search_notes(text, limit=limit * 4, success=True)
+    extra_hashes = {fingerprint_hash(fingerprint_query(note["query"])) for note in text_matches}
+
+    # Vecinos aproximados por LSH sobre las firmas MinHash de las huellas
+    similar = note_store.similar_fingerprints(query_fragment, limit=limit * 4,
+                                              extra_hashes=sorted(extra_hashes))
+
+    # La similitud estructural pesa más; la coincidencia de texto desempata
+    for item in similar:
+        item["relevance_score"] = round(item["similarity"] + (0.25 if item["hash"] in extra_hashes else 0), 4)
+    similar.sort(key=lambda item: (-item["relevance_score"], item["avg_execution_time"]))
+    top_suggestions = similar[:limit]
+
+    # Nota de la ejecución de ejemplo de cada huella
+    examples = note_store.get_notes_by_seq([item["example_seq"] for item in top_suggestions])
+
     suggestions = []
-    for note, score in top_suggestions:
+    for item in top_suggestions:
+        example = examples.get(item["example_seq"], {})
         suggestions.append({
-            "query": note.get("query"),
-            "execution_time": note.get("execution_time"),
-            "rows_affected": note.get("rows_affected"),
-            "created_at": note.get("created_at"),
-            "note": note.get("note"),
-            "tags": note.get("tags", []),
-            "relevance_score": score
+            # Huellas vistas solo por telemetría: sin nota de ejemplo, se sugiere la huella
+            "query": item["example_query"] or item["fingerprint"],
+            "fingerprint": item["fingerprint"],
+            "execution_time": item["avg_execution_time"],
+            "min_execution_time": item["min_execution_time"],
+            "max_execution_time": item["max_execution_time"],
+            "rows_affected": item["avg_rows"],
+            "executions": item["executions"],
+            "success_rate": item["success_rate"],
+            "created_at": item["last_seen"],
+            "note": example.get("note"),
+            "tags": example.get("tags", []),
+            "relevance_score": item["relevance_score"]
         })
-    
+
     return {
         "suggestions": suggestions,
         "stats": {
-            "total_matches": len(similar_queries),
-            "avg_execution_time": sum(note.get("execution_time", 0) for note, _ in top_suggestions) / len(top_suggestions) if top_suggestions else 0
+            "total_matches": len(similar),
+            "avg_execution_time": sum(s["execution_time"] for s in suggestions) / len(suggestions) if suggestions else 0
         }
     }
 
-def _calculate_query_complexity(query: str) -> str:
+def get_workload_profile(limit: int = 20, order_by: str = "total_time") -> Dict[str, Any]:
     """
-    Calcula la complejidad de una consulta SQL
+    Perfil de carga: huellas de consulta con sus estadísticas de ejecución agregadas
+    
+    Incluye las ejecuciones registradas automáticamente por execute_query_tool y
+    las notas guardadas manualmente.
     
     Args:
-        query: Consulta SQL a analizar
+        limit: Número máximo de huellas
+        order_by: total_time, executions, avg_time o failures
         
     Returns:
-        String con nivel de complejidad ("simple", "medium", "complex")
+        Dict con las huellas ordenadas
     """
-    query_upper = query.strip().upper()
-    
-    # Contar características que indican complejidad
-    complexity_score = 0
-    
-    # Joins aumentan complejidad
-    if " JOIN " in query_upper:
-        join_count = query_upper.count(" JOIN ")
-        complexity_score += join_count * 2
-    
-    # Subconsultas aumentan complejidad
-    if "(" in query and "SELECT" in query_upper:
-        subquery_count = query_upper.count("SELECT") - 1
-        complexity_score += subquery_count * 3
-    
-    # Agrupamiento y ordenamiento
-    if " GROUP BY " in query_upper:
-        complexity_score += 1
-    if " ORDER BY " in query_upper:
-        complexity_score += 1
-    
-    # Funciones agregadas
-    for func in ["COUNT(", "SUM(", "AVG(", "MAX(", "MIN("]:
-        if func in query_upper:
-            complexity_score += 1
-    
-    # Determinar nivel basado en puntuación
-    if complexity_score <= 2:
-        return "simple"
-    elif complexity_score <= 5:
-        return "medium"
-    else:
-        return "complex"
\ No newline at end of file
+    try:
+        fingerprints = note_store.top_fingerprints(limit=limit, order_by=order_by)
+    except ValueError as e:
+        return {"fingerprints": [], "error": str(e)}
+    return {"fingerprints": fingerprints, "order_by": order_by}
+
+# ========== VERSIONES ASÍNCRONAS ==========
+# El almacenamiento es local, así que se usa el executor por defecto del loop
+# en lugar del executor reservado para las conexiones MySQL.
+
+async def save_query_note_async(**kwargs) -> Dict[str, Any]:
+    """Versión asíncrona de save_query_note"""
+    return await asyncio.to_thread(save_query_note, **kwargs)
+
+async def get_query_notes_async(**kwargs) -> Dict[str, Any]:
+    """Versión asíncrona de get_query_notes"""
+    return await asyncio.to_thread(get_query_notes, **kwargs)
+
+async def search_query_notes_async(**kwargs) -> List[Dict[str, Any]]:
+    """Versión asíncrona de search_query_notes"""
+    return await asyncio.to_thread(search_query_notes, **kwargs)
+
+async def get_query_suggestions_async(**kwargs) -> Dict[str, Any]:
+    """Versión asíncrona de get_query_suggestions"""
+    return await asyncio.to_thread(get_query_suggestions, **kwargs)
+
+async def get_workload_profile_async(**kwargs) -> Dict[str, Any]:
+    """Versión asíncrona de get_workload_profile"""
+    return await asyncio.to_thread(get_workload_profile, **kwargs)
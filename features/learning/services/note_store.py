@@ -0,0 +1,811 @@
+import base64
+import heapq
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from .text_index import tokenize, term_frequencies, bm25_idf, bm25_term_score
+from .query_fingerprint import (
+    fingerprint_tokens,
+    fingerprint_hash,
+    minhash_signature,
+    lsh_buckets,
+    estimate_similarity,
+    signature_from_bytes
+)
+
+# Configuración de rutas del almacenamiento
+LEARNING_DIR = os.path.join("data", "learning")
+LEARNING_DB = os.path.join(LEARNING_DIR, "query_notes.db")
+LEGACY_LEARNING_FILE = os.path.join(LEARNING_DIR, "query_notes.json")
+
+# Cada entrada lleva el esquema de la versión anterior a la siguiente (PRAGMA user_version)
+_MIGRATIONS = [
+    """
+    CREATE TABLE notes (
+        seq INTEGER PRIMARY KEY,
+        id TEXT NOT NULL UNIQUE,
+        query TEXT NOT NULL,
+        query_type TEXT,
+        execution_time REAL,
+        rows_affected INTEGER,
+        success INTEGER NOT NULL,
+        note TEXT,
+        tags TEXT NOT NULL DEFAULT '[]',
+        created_at TEXT NOT NULL,
+        complexity TEXT
+    );
+    CREATE INDEX idx_notes_created_at ON notes (created_at);
+    CREATE INDEX idx_notes_type_created_at ON notes (query_type, created_at);
+    CREATE INDEX idx_notes_success_created_at ON notes (success, created_at);
+    CREATE TABLE note_tags (
+        tag TEXT NOT NULL,
+        seq INTEGER NOT NULL REFERENCES notes (seq) ON DELETE CASCADE,
+        PRIMARY KEY (tag, seq)
+    ) WITHOUT ROWID;
+    CREATE TABLE meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    """,
+    # Índice invertido para la búsqueda de texto (BM25)
+    """
+    ALTER TABLE notes ADD COLUMN doc_length INTEGER NOT NULL DEFAULT 0;
+    CREATE TABLE term_postings (
+        term TEXT NOT NULL,
+        seq INTEGER NOT NULL REFERENCES notes (seq) ON DELETE CASCADE,
+        tf INTEGER NOT NULL,
+        PRIMARY KEY (term, seq)
+    ) WITHOUT ROWID;
+    CREATE TABLE term_stats (
+        term TEXT PRIMARY KEY,
+        df INTEGER NOT NULL
+    ) WITHOUT ROWID;
+    """,
+    lambda store, conn: store._backfill_text_index(conn),
+    # Huellas de consultas con estadísticas agregadas e índice LSH de firmas MinHash
+    """
+    ALTER TABLE notes ADD COLUMN fingerprint TEXT;
+    CREATE INDEX idx_notes_fingerprint ON notes (fingerprint);
+    CREATE TABLE fingerprints (
+        hash TEXT PRIMARY KEY,
+        fingerprint TEXT NOT NULL,
+        signature BLOB NOT NULL,
+        example_query TEXT,
+        example_seq INTEGER,
+        executions INTEGER NOT NULL DEFAULT 0,
+        successes INTEGER NOT NULL DEFAULT 0,
+        total_time REAL NOT NULL DEFAULT 0,
+        min_time REAL,
+        max_time REAL,
+        total_rows INTEGER NOT NULL DEFAULT 0,
+        last_seen TEXT
+    );
+    CREATE TABLE lsh_buckets (
+        band INTEGER NOT NULL,
+        bucket TEXT NOT NULL,
+        hash TEXT NOT NULL REFERENCES fingerprints (hash) ON DELETE CASCADE,
+        PRIMARY KEY (band, bucket, hash)
+    ) WITHOUT ROWID;
+    """,
+    lambda store, conn: store._backfill_fingerprints(conn),
+    # Agregados acumulados por (tipo de consulta, éxito) para las estadísticas del historial
+    """
+    CREATE TABLE note_aggregates (
+        query_type TEXT NOT NULL,
+        success INTEGER NOT NULL,
+        notes INTEGER NOT NULL DEFAULT 0,
+        total_time REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (query_type, success)
+    ) WITHOUT ROWID;
+    INSERT INTO note_aggregates (query_type, success, notes, total_time)
+        SELECT COALESCE(query_type, ''), success, COUNT(*), COALESCE(SUM(execution_time), 0)
+        FROM notes GROUP BY COALESCE(query_type, ''), success;
+    """,
+    # Clases de error por huella (telemetría de execute_query_tool)
+    """
+    CREATE TABLE fingerprint_errors (
+        hash TEXT NOT NULL REFERENCES fingerprints (hash) ON DELETE CASCADE,
+        error_class TEXT NOT NULL,
+        occurrences INTEGER NOT NULL DEFAULT 0,
+        last_seen TEXT,
+        PRIMARY KEY (hash, error_class)
+    ) WITHOUT ROWID;
+    CREATE INDEX idx_fingerprints_total_time ON fingerprints (total_time);
+    """,
+    # Plan de ejecución (EXPLAIN FORMAT=JSON) guardado con la nota
+    """
+    ALTER TABLE notes ADD COLUMN plan TEXT;
+    """,
+    # Huellas recalculadas: con una sola tabla las columnas ya no llevan calificador
+    lambda store, conn: store._rebuild_fingerprints(conn),
+    # El ejemplo de cada huella es la consulta de una nota, nunca SQL de la telemetría con sus literales
+    """
+    UPDATE fingerprints SET example_query = (
+        SELECT query FROM notes WHERE notes.seq = fingerprints.example_seq
+    );
+    """,
+]
+
+# Filtros que se resuelven con los agregados acumulados sin recorrer las notas
+_AGGREGATE_FILTERS = {"query_type", "success"}
+
+_NOTE_COLUMNS = ("id", "query", "query_type", "execution_time", "rows_affected",
+                 "success", "note", "tags", "created_at", "complexity", "plan")
+
+
+def _normalize_date(value: str) -> str:
+    """Convierte una fecha ISO (YYYY-MM-DD o completa) al formato de created_at"""
+    return datetime.fromisoformat(value).isoformat()
+
+
+class NoteStore:
+    """
+    Almacenamiento de notas de aprendizaje sobre SQLite en modo WAL.
+
+    - Inserciones sin reescribir el resto de notas
+    - Varios escritores concurrentes (hilos o procesos) sin perder notas
+    - Índices por query_type, success, created_at y etiquetas
+    - Migración única desde el antiguo archivo query_notes.json
+    """
+
+    def __init__(self, path: str = LEARNING_DB, legacy_file: str = LEGACY_LEARNING_FILE):
+        self.path = path
+        self.legacy_file = legacy_file
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    # ========== CONEXIÓN Y ESQUEMA ==========
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    self._migrate(conn)
+                    self._import_legacy_json(conn)
+                    self._initialized = True
+        return conn
+
+    def _migrate(self, conn: sqlite3.Connection):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, migration in enumerate(_MIGRATIONS[version:], start=version + 1):
+                if callable(migration):
+                    migration(self, conn)
+                else:
+                    for statement in migration.split(";"):
+                        if statement.strip():
+                            conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {number}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _import_legacy_json(self, conn: sqlite3.Connection):
+        """Importa una sola vez las notas del antiguo archivo JSON y lo renombra"""
+        if not os.path.exists(self.legacy_file):
+            return
+        try:
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                notes = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"Error al leer notas de aprendizaje antiguas: {e}")
+            return
+
+        notes = sorted((n for n in notes if isinstance(n, dict) and n.get("id")),
+                       key=lambda n: n.get("created_at", ""))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for note in notes:
+                self._insert(conn, note)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_json_imported', ?)",
+                         (datetime.now().isoformat(),))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        try:
+            os.replace(self.legacy_file, self.legacy_file + ".migrated")
+        except FileNotFoundError:
+            pass  # Otro proceso ya completó la migración
+        print(f"✅ Migradas {len(notes)} notas de aprendizaje a {self.path}")
+
+    # ========== ESCRITURA ==========
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, note: Dict[str, Any]) -> Optional[int]:
+        cursor = conn.execute(
+            f"INSERT OR IGNORE INTO notes ({', '.join(_NOTE_COLUMNS)}) "
+            f"VALUES ({', '.join(['?'] * len(_NOTE_COLUMNS))})",
+            (
+                note["id"],
+                note.get("query", ""),
+                note.get("query_type"),
+                note.get("execution_time", 0),
+                note.get("rows_affected", 0),
+                1 if note.get("success") else 0,
+                note.get("note", ""),
+                json.dumps(note.get("tags") or [], ensure_ascii=False),
+                note.get("created_at") or datetime.now().isoformat(),
+                note.get("complexity"),
+                json.dumps(note["plan"], ensure_ascii=False, default=str) if note.get("plan") else None,
+            ),
+        )
+        if cursor.rowcount == 0:
+            return None
+        seq = cursor.lastrowid
+        conn.executemany("INSERT OR IGNORE INTO note_tags (tag, seq) VALUES (?, ?)",
+                         [(tag, seq) for tag in set(note.get("tags") or [])])
+        NoteStore._index_text(conn, seq, note.get("query", ""), note.get("note", ""),
+                              " ".join(note.get("tags") or []))
+        fp_hash = NoteStore._record_fingerprint(
+            conn, note.get("query", ""), note.get("execution_time") or 0,
+            bool(note.get("success")), note.get("rows_affected") or 0,
+            note.get("created_at"), seq,
+        )
+        conn.execute("UPDATE notes SET fingerprint = ? WHERE seq = ?", (fp_hash, seq))
+        conn.execute(
+            "INSERT INTO note_aggregates (query_type, success, notes, total_time) VALUES (?, ?, 1, ?) "
+            "ON CONFLICT (query_type, success) DO UPDATE SET "
+            "notes = notes + 1, total_time = total_time + excluded.total_time",
+            (note.get("query_type") or "", 1 if note.get("success") else 0,
+             note.get("execution_time") or 0),
+        )
+        return seq
+
+    # ========== HUELLAS DE CONSULTAS ==========
+
+    @staticmethod
+    def _record_fingerprint(conn: sqlite3.Connection, query: str, execution_time: float,
+                            success: bool, rows: int, seen_at: str = None,
+                            seq: int = None) -> str:
+        """
+        Suma una ejecución a las estadísticas de la huella de la consulta, creando la
+        huella (y sus cubetas LSH) la primera vez que aparece
+
+        El ejemplo de la huella es la primera nota exitosa (seq): la telemetría solo suma
+        estadísticas, para no guardar ni devolver sus literales.
+        """
+        tokens = fingerprint_tokens(query)
+        fingerprint = " ".join(tokens).replace(" . ", ".")
+        fp_hash = fingerprint_hash(fingerprint)
+        seen_at = seen_at or datetime.now().isoformat()
+        example = (query, seq) if success and seq is not None else (None, None)
+
+        updated = conn.execute(
+            """
+            UPDATE fingerprints SET
+                executions = executions + 1,
+                successes = successes + ?,
+                total_time = total_time + ?,
+                min_time = MIN(COALESCE(min_time, ?), ?),
+                max_time = MAX(COALESCE(max_time, ?), ?),
+                total_rows = total_rows + ?,
+                last_seen = MAX(COALESCE(last_seen, ''), ?),
+                example_query = COALESCE(example_query, ?),
+                example_seq = COALESCE(example_seq, ?)
+            WHERE hash = ?
+            """,
+            (int(success), execution_time, execution_time, execution_time,
+             execution_time, execution_time, rows, seen_at, *example, fp_hash),
+        ).rowcount
+        if not updated:
+            signature = minhash_signature(tokens)
+            conn.execute(
+                """
+                INSERT INTO fingerprints (hash, fingerprint, signature, example_query, example_seq,
+                    executions, successes, total_time, min_time, max_time, total_rows, last_seen)
+                VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?, ?, ?)
+                """,
+                (fp_hash, fingerprint, signature.tobytes(), *example, int(success),
+                 execution_time, execution_time, execution_time, rows, seen_at),
+            )
+            conn.executemany("INSERT OR IGNORE INTO lsh_buckets (band, bucket, hash) VALUES (?, ?, ?)",
+                             [(band, bucket, fp_hash) for band, bucket in lsh_buckets(signature)])
+        return fp_hash
+
+    def _backfill_fingerprints(self, conn: sqlite3.Connection):
+        rows = conn.execute(
+            "SELECT seq, query, execution_time, success, rows_affected, created_at FROM notes ORDER BY seq"
+        ).fetchall()
+        for row in rows:
+            fp_hash = self._record_fingerprint(
+                conn, row["query"], row["execution_time"] or 0, bool(row["success"]),
+                row["rows_affected"] or 0, row["created_at"], row["seq"],
+            )
+            conn.execute("UPDATE notes SET fingerprint = ? WHERE seq = ?", (fp_hash, row["seq"]))
+
+    def _rebuild_fingerprints(self, conn: sqlite3.Connection):
+        """Recalcula las huellas guardadas con la normalización actual, fusionando las que coinciden"""
+        rows = conn.execute("SELECT * FROM fingerprints").fetchall()
+        errors = conn.execute("SELECT * FROM fingerprint_errors").fetchall()
+        conn.execute("DELETE FROM lsh_buckets")
+        conn.execute("DELETE FROM fingerprint_errors")
+        conn.execute("DELETE FROM fingerprints")
+
+        rekeyed = {}
+        for row in rows:
+            tokens = fingerprint_tokens(row["example_query"] or row["fingerprint"])
+            fingerprint = " ".join(tokens).replace(" . ", ".")
+            fp_hash = fingerprint_hash(fingerprint)
+            rekeyed[row["hash"]] = fp_hash
+            merged = conn.execute(
+                """
+                UPDATE fingerprints SET
+                    executions = executions + ?,
+                    successes = successes + ?,
+                    total_time = total_time + ?,
+                    min_time = MIN(COALESCE(min_time, ?), COALESCE(?, min_time)),
+                    max_time = MAX(COALESCE(max_time, ?), COALESCE(?, max_time)),
+                    total_rows = total_rows + ?,
+                    last_seen = MAX(COALESCE(last_seen, ''), COALESCE(?, '')),
+                    example_query = COALESCE(example_query, ?),
+                    example_seq = COALESCE(example_seq, ?)
+                WHERE hash = ?
+                """,
+                (row["executions"], row["successes"], row["total_time"], row["min_time"], row["min_time"],
+                 row["max_time"], row["max_time"], row["total_rows"], row["last_seen"],
+                 row["example_query"], row["example_seq"], fp_hash),
+            ).rowcount
+            if not merged:
+                signature = minhash_signature(tokens)
+                conn.execute(
+                    """
+                    INSERT INTO fingerprints (hash, fingerprint, signature, example_query, example_seq,
+                        executions, successes, total_time, min_time, max_time, total_rows, last_seen)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (fp_hash, fingerprint, signature.tobytes(), row["example_query"], row["example_seq"],
+                     row["executions"], row["successes"], row["total_time"], row["min_time"],
+                     row["max_time"], row["total_rows"], row["last_seen"]),
+                )
+                conn.executemany("INSERT OR IGNORE INTO lsh_buckets (band, bucket, hash) VALUES (?, ?, ?)",
+                                 [(band, bucket, fp_hash) for band, bucket in lsh_buckets(signature)])
+
+        conn.executemany(
+            "INSERT INTO fingerprint_errors (hash, error_class, occurrences, last_seen) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (hash, error_class) DO UPDATE SET occurrences = occurrences + excluded.occurrences, "
+            "last_seen = MAX(COALESCE(last_seen, ''), COALESCE(excluded.last_seen, ''))",
+            [(rekeyed[row["hash"]], row["error_class"], row["occurrences"], row["last_seen"])
+             for row in errors if row["hash"] in rekeyed],
+        )
+        notes = conn.execute("SELECT seq, fingerprint FROM notes WHERE fingerprint IS NOT NULL").fetchall()
+        conn.executemany("UPDATE notes SET fingerprint = ? WHERE seq = ?",
+                         [(rekeyed[row["fingerprint"]], row["seq"]) for row in notes
+                          if rekeyed.get(row["fingerprint"], row["fingerprint"]) != row["fingerprint"]])
+
+    def record_executions(self, executions: List[Dict[str, Any]]) -> int:
+        """
+        Registra un lote de ejecuciones (telemetría) en una sola transacción
+
+        Cada ejecución lleva query, execution_time, rows, success, error_class y
+        executed_at; solo actualiza las estadísticas de su huella, sin crear notas.
+        """
+        if not executions:
+            return 0
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for execution in executions:
+                executed_at = execution.get("executed_at") or datetime.now().isoformat()
+                fp_hash = self._record_fingerprint(
+                    conn, execution["query"], execution.get("execution_time") or 0,
+                    bool(execution.get("success")), execution.get("rows") or 0, executed_at,
+                )
+                if execution.get("error_class"):
+                    conn.execute(
+                        "INSERT INTO fingerprint_errors (hash, error_class, occurrences, last_seen) "
+                        "VALUES (?, ?, 1, ?) ON CONFLICT (hash, error_class) DO UPDATE SET "
+                        "occurrences = occurrences + 1, last_seen = excluded.last_seen",
+                        (fp_hash, execution["error_class"], executed_at),
+                    )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(executions)
+
+    def top_fingerprints(self, limit: int = 20, order_by: str = "total_time") -> List[Dict[str, Any]]:
+        """Huellas con más tiempo acumulado, ejecuciones o fallos, con sus clases de error"""
+        orders = {
+            "total_time": "total_time DESC",
+            "executions": "executions DESC",
+            "avg_time": "total_time / executions DESC",
+            "failures": "executions - successes DESC",
+        }
+        if order_by not in orders:
+            raise ValueError(f"Orden no válido: {order_by} (use {', '.join(orders)})")
+        conn = self._connection()
+        rows = conn.execute(
+            f"SELECT * FROM fingerprints WHERE executions > 0 ORDER BY {orders[order_by]} LIMIT ?",
+            (limit,),
+        ).fetchall()
+        errors: Dict[str, Dict[str, int]] = {}
+        if rows:
+            hashes = [row["hash"] for row in rows]
+            for fp_hash, error_class, occurrences in conn.execute(
+                f"SELECT hash, error_class, occurrences FROM fingerprint_errors "
+                f"WHERE hash IN ({', '.join(['?'] * len(hashes))})", hashes
+            ):
+                errors.setdefault(fp_hash, {})[error_class] = occurrences
+        return [{
+            "fingerprint": row["fingerprint"],
+            "example_query": row["example_query"],
+            "executions": row["executions"],
+            "success_rate": row["successes"] / row["executions"],
+            "total_execution_time": row["total_time"],
+            "avg_execution_time": row["total_time"] / row["executions"],
+            "min_execution_time": row["min_time"],
+            "max_execution_time": row["max_time"],
+            "avg_rows": row["total_rows"] / row["executions"],
+            "last_seen": row["last_seen"],
+            "errors": errors.get(row["hash"], {}),
+        } for row in rows]
+
+    def has_successful_fingerprints(self) -> bool:
+        return self._connection().execute(
+            "SELECT 1 FROM fingerprints WHERE successes > 0 LIMIT 1"
+        ).fetchone() is not None
+
+    def similar_fingerprints(self, query: str, limit: int = 5, extra_hashes: List[str] = (),
+                             successful_only: bool = True) -> List[Dict[str, Any]]:
+        """
+        Huellas parecidas a una consulta (vecinos aproximados por LSH sobre MinHash)
+
+        Args:
+            query: Consulta o fragmento de consulta
+            limit: Número máximo de huellas
+            extra_hashes: Huellas candidatas adicionales (p. ej. de la búsqueda de texto)
+            successful_only: Solo huellas con al menos una ejecución exitosa
+
+        Returns:
+            Huellas con su similitud estimada y estadísticas agregadas, de mayor a menor similitud
+        """
+        tokens = fingerprint_tokens(query)
+        if not tokens and not extra_hashes:
+            return []
+        signature = minhash_signature(tokens)
+        conn = self._connection()
+
+        candidates = set(extra_hashes)
+        if tokens:
+            buckets = lsh_buckets(signature)
+            condition = " OR ".join(["(band = ? AND bucket = ?)"] * len(buckets))
+            params = [value for pair in buckets for value in pair]
+            candidates.update(row[0] for row in conn.execute(
+                f"SELECT DISTINCT hash FROM lsh_buckets WHERE {condition}", params
+            ))
+        if not candidates:
+            return []
+
+        where = "successes > 0 AND " if successful_only else ""
+        rows = conn.execute(
+            f"SELECT * FROM fingerprints WHERE {where}hash IN ({', '.join(['?'] * len(candidates))})",
+            list(candidates),
+        ).fetchall()
+
+        results = []
+        for row in rows:
+            similarity = estimate_similarity(signature, signature_from_bytes(row["signature"]))
+            results.append({
+                "fingerprint": row["fingerprint"],
+                "hash": row["hash"],
+                "similarity": similarity,
+                "example_query": row["example_query"],
+                "example_seq": row["example_seq"],
+                "executions": row["executions"],
+                "success_rate": row["successes"] / row["executions"] if row["executions"] else 0,
+                "avg_execution_time": row["total_time"] / row["executions"] if row["executions"] else 0,
+                "min_execution_time": row["min_time"],
+                "max_execution_time": row["max_time"],
+                "avg_rows": row["total_rows"] / row["executions"] if row["executions"] else 0,
+                "last_seen": row["last_seen"],
+            })
+        results.sort(key=lambda r: (-r["similarity"], r["avg_execution_time"]))
+        return results[:limit]
+
+    def get_notes_by_seq(self, seqs: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Notas indexadas por su número de secuencia interno"""
+        seqs = [seq for seq in seqs if seq is not None]
+        if not seqs:
+            return {}
+        rows = self._connection().execute(
+            f"SELECT * FROM notes WHERE seq IN ({', '.join(['?'] * len(seqs))})", seqs
+        ).fetchall()
+        return {row["seq"]: self._row_to_note(row) for row in rows}
+
+    # ========== ÍNDICE INVERTIDO ==========
+
+    @staticmethod
+    def _meta_add(conn: sqlite3.Connection, key: str, delta: int):
+        conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + ?",
+            (key, delta, delta),
+        )
+
+    @staticmethod
+    def _meta_int(conn: sqlite3.Connection, key: str) -> int:
+        row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return int(row[0]) if row else 0
+
+    @staticmethod
+    def _index_text(conn: sqlite3.Connection, seq: int, *texts: str):
+        """Añade las postings de una nota y actualiza df, número de documentos y longitud total"""
+        frequencies = term_frequencies(*texts)
+        doc_length = sum(frequencies.values())
+        conn.execute("UPDATE notes SET doc_length = ? WHERE seq = ?", (doc_length, seq))
+        conn.executemany("INSERT INTO term_postings (term, seq, tf) VALUES (?, ?, ?)",
+                         [(term, seq, tf) for term, tf in frequencies.items()])
+        conn.executemany(
+            "INSERT INTO term_stats (term, df) VALUES (?, 1) "
+            "ON CONFLICT (term) DO UPDATE SET df = df + 1",
+            [(term,) for term in frequencies],
+        )
+        NoteStore._meta_add(conn, "index_docs", 1)
+        NoteStore._meta_add(conn, "index_length", doc_length)
+
+    def _backfill_text_index(self, conn: sqlite3.Connection):
+        rows = conn.execute("SELECT seq, query, note, tags FROM notes ORDER BY seq").fetchall()
+        for row in rows:
+            self._index_text(conn, row["seq"], row["query"], row["note"] or "",
+                             " ".join(json.loads(row["tags"])))
+
+    def add_note(self, note: Dict[str, Any]) -> Dict[str, Any]:
+        """Añade una nota en su propia transacción"""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._insert(conn, note)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return note
+
+    # ========== LECTURA ==========
+
+    @staticmethod
+    def _row_to_note(row: sqlite3.Row) -> Dict[str, Any]:
+        note = {
+            "id": row["id"],
+            "query": row["query"],
+            "query_type": row["query_type"],
+            "execution_time": row["execution_time"],
+            "rows_affected": row["rows_affected"],
+            "success": bool(row["success"]),
+            "note": row["note"],
+            "tags": json.loads(row["tags"]),
+            "created_at": row["created_at"],
+            "complexity": row["complexity"],
+        }
+        if row["plan"]:
+            note["plan"] = json.loads(row["plan"])
+        return note
+
+    @staticmethod
+    def _where(query_type: str = None, success: bool = None, tags: List[str] = None,
+               max_execution_time: float = None, date_from: str = None,
+               date_to: str = None, contains: str = None) -> Tuple[str, List[Any]]:
+        conditions, params = [], []
+        if query_type:
+            conditions.append("query_type = ?")
+            params.append(query_type)
+        if success is not None:
+            conditions.append("success = ?")
+            params.append(1 if success else 0)
+        for tag in tags or []:
+            conditions.append("seq IN (SELECT seq FROM note_tags WHERE tag = ?)")
+            params.append(tag)
+        if max_execution_time is not None:
+            conditions.append("execution_time <= ?")
+            params.append(max_execution_time)
+        if date_from:
+            conditions.append("created_at >= ?")
+            params.append(_normalize_date(date_from))
+        if date_to:
+            conditions.append("created_at <= ?")
+            params.append(_normalize_date(date_to))
+        if contains:
+            conditions.append("(instr(lower(query), ?) > 0 OR instr(lower(note), ?) > 0)")
+            params.extend([contains.lower(), contains.lower()])
+        return (" WHERE " + " AND ".join(conditions)) if conditions else "", params
+
+    @staticmethod
+    def _bm25_scores(conn: sqlite3.Connection, terms: List[str], idf: Dict[str, float],
+                     avg_length: float, where: str, params: List[Any]) -> Dict[int, float]:
+        """Puntuación BM25 de las notas que cumplen los filtros y contienen alguno de los términos"""
+        where = (where + " AND" if where else " WHERE") + \
+            f" term IN ({', '.join(['?'] * len(terms))})"
+        scores: Dict[int, float] = {}
+        for seq, term, tf, doc_length in conn.execute(
+            f"SELECT seq, term, tf, doc_length FROM term_postings JOIN notes USING (seq){where}",
+            params + terms,
+        ):
+            scores[seq] = scores.get(seq, 0.0) + bm25_term_score(tf, doc_length, avg_length, idf[term])
+        return scores
+
+    def search_notes(self, text: str, limit: int = 50, common_term_ratio: float = 0.5,
+                     **filters) -> List[Dict[str, Any]]:
+        """
+        Búsqueda de texto con ranking BM25 sobre el índice invertido
+
+        Solo se leen las postings de los términos de la búsqueda. Primero se puntúa con los
+        términos selectivos (presentes en como mucho `common_term_ratio` de las notas); si
+        con los filtros no llegan a `limit` resultados se puntúa con todos los términos y
+        el IDF de BM25 resta peso a los comunes (p. ej. SELECT o FROM).
+        """
+        terms = sorted(set(tokenize(text)))
+        if not terms:
+            return []
+        conn = self._connection()
+        num_docs = self._meta_int(conn, "index_docs")
+        if not num_docs:
+            return []
+        avg_length = self._meta_int(conn, "index_length") / num_docs
+
+        doc_freqs = dict(conn.execute(
+            f"SELECT term, df FROM term_stats WHERE term IN ({', '.join(['?'] * len(terms))})", terms
+        ).fetchall())
+        if not doc_freqs:
+            return []
+        idf = {term: bm25_idf(num_docs, df) for term, df in doc_freqs.items()}
+        found = sorted(doc_freqs)
+        selective = [term for term in found if doc_freqs[term] <= num_docs * common_term_ratio]
+
+        where, params = self._where(**filters)
+        scores = self._bm25_scores(conn, selective, idf, avg_length, where, params) if selective else {}
+        if len(scores) < limit and len(selective) < len(found):
+            scores = self._bm25_scores(conn, found, idf, avg_length, where, params)
+
+        top = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        if not top:
+            return []
+        rows = {row["seq"]: row for row in conn.execute(
+            f"SELECT * FROM notes WHERE seq IN ({', '.join(['?'] * len(top))})",
+            [seq for seq, _ in top],
+        )}
+        results = []
+        for seq, score in top:
+            note = self._row_to_note(rows[seq])
+            note["relevance_score"] = round(score, 4)
+            results.append(note)
+        return results
+
+    def find_notes(self, limit: int = 50, offset: int = 0, newest_first: bool = False,
+                   **filters) -> List[Dict[str, Any]]:
+        """Notas que cumplen los filtros, ordenadas por fecha de creación"""
+        where, params = self._where(**filters)
+        order = "DESC" if newest_first else "ASC"
+        rows = self._connection().execute(
+            f"SELECT * FROM notes{where} ORDER BY created_at {order}, seq {order} LIMIT ? OFFSET ?",
+            params + [limit, offset],
+        ).fetchall()
+        return [self._row_to_note(row) for row in rows]
+
+    @staticmethod
+    def _encode_cursor(row: sqlite3.Row) -> str:
+        raw = json.dumps([row["created_at"], row["seq"]]).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[str, int]:
+        try:
+            created_at, seq = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            return str(created_at), int(seq)
+        except (ValueError, TypeError):
+            raise ValueError("Cursor de paginación no válido")
+
+    def page_notes(self, limit: int = 50, offset: int = 0, cursor: str = None,
+                   newest_first: bool = True, **filters) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Página de notas recorriendo el índice por fecha de creación
+
+        Con cursor la página continúa justo después de la última nota de la anterior
+        (coste proporcional a la página); sin cursor se usa offset.
+
+        Returns:
+            (notas, cursor de la página siguiente o None si no hay más)
+        """
+        where, params = self._where(**filters)
+        order = "DESC" if newest_first else "ASC"
+        if cursor:
+            created_at, seq = self._decode_cursor(cursor)
+            where = (where + " AND" if where else " WHERE") + \
+                f" (created_at, seq) {'<' if newest_first else '>'} (?, ?)"
+            params = params + [created_at, seq]
+            offset = 0
+        rows = self._connection().execute(
+            f"SELECT * FROM notes{where} ORDER BY created_at {order}, seq {order} LIMIT ? OFFSET ?",
+            params + [limit + 1, offset],
+        ).fetchall()
+        next_cursor = self._encode_cursor(rows[limit - 1]) if len(rows) > limit and limit > 0 else None
+        return [self._row_to_note(row) for row in rows[:limit]], next_cursor
+
+    def iter_notes(self, **filters) -> Iterator[Dict[str, Any]]:
+        """Recorre las notas que cumplen los filtros sin cargarlas todas en memoria"""
+        where, params = self._where(**filters)
+        cursor = self._connection().execute(f"SELECT * FROM notes{where} ORDER BY seq", params)
+        for row in cursor:
+            yield self._row_to_note(row)
+
+    @staticmethod
+    def _aggregate_where(query_type: str = None, success: bool = None) -> Tuple[str, List[Any]]:
+        conditions, params = [], []
+        if query_type:
+            conditions.append("query_type = ?")
+            params.append(query_type)
+        if success is not None:
+            conditions.append("success = ?")
+            params.append(1 if success else 0)
+        return (" WHERE " + " AND ".join(conditions)) if conditions else "", params
+
+    @staticmethod
+    def _uses_aggregates(filters: Dict[str, Any]) -> bool:
+        return all(key in _AGGREGATE_FILTERS for key, value in filters.items() if value is not None)
+
+    def count_notes(self, **filters) -> int:
+        conn = self._connection()
+        if self._uses_aggregates(filters):
+            where, params = self._aggregate_where(**filters)
+            return conn.execute(f"SELECT COALESCE(SUM(notes), 0) FROM note_aggregates{where}",
+                                params).fetchone()[0]
+        where, params = self._where(**filters)
+        return conn.execute(f"SELECT COUNT(*) FROM notes{where}", params).fetchone()[0]
+
+    def aggregate_stats(self, **filters) -> Dict[str, Any]:
+        """
+        Tasa de éxito, tiempo medio y número de notas por tipo
+
+        Filtrando solo por tipo y/o éxito se leen los agregados acumulados en cada
+        inserción (una fila por tipo y resultado); otros filtros recorren las notas.
+        """
+        conn = self._connection()
+        if self._uses_aggregates(filters):
+            where, params = self._aggregate_where(**filters)
+            rows = conn.execute(
+                f"SELECT query_type, success, notes, total_time FROM note_aggregates{where}", params
+            ).fetchall()
+            total = sum(row["notes"] for row in rows)
+            successes = sum(row["notes"] for row in rows if row["success"])
+            total_time = sum(row["total_time"] for row in rows)
+            by_type: Dict[str, int] = {}
+            for row in rows:
+                if row["notes"]:
+                    by_type[row["query_type"]] = by_type.get(row["query_type"], 0) + row["notes"]
+            return {
+                "success_rate": successes / total if total else 0,
+                "avg_execution_time": total_time / total if total else 0,
+                "count_by_type": by_type,
+            }
+
+        where, params = self._where(**filters)
+        total, successes, avg_time = conn.execute(
+            f"SELECT COUNT(*), SUM(success), AVG(execution_time) FROM notes{where}", params
+        ).fetchone()
+        by_type = conn.execute(
+            f"SELECT COALESCE(query_type, ''), COUNT(*) FROM notes{where} GROUP BY query_type", params
+        ).fetchall()
+        return {
+            "success_rate": (successes or 0) / total if total else 0,
+            "avg_execution_time": (avg_time or 0) if total else 0,
+            "count_by_type": {qtype: count for qtype, count in by_type},
+        }
+
+note_store = NoteStore()
@@ -0,0 +1,176 @@
+import hashlib
+import zlib
+from array import array
+from typing import List, Tuple
+from core.sql_classifier import SQL_TOKEN_RE as _SQL_TOKEN_RE
+
+# Palabras tras las que aparece un nombre de tabla
+_TABLE_INTRODUCERS = {"FROM", "JOIN", "INTO", "UPDATE", "TABLE"}
+
+# Palabras que nunca son alias aunque sigan a una tabla o expresión
+_RESERVED = {
+    "SELECT", "FROM", "WHERE", "JOIN", "INNER", "LEFT", "RIGHT", "FULL", "OUTER", "CROSS",
+    "NATURAL", "STRAIGHT_JOIN", "ON", "USING", "GROUP", "ORDER", "BY", "HAVING", "LIMIT",
+    "OFFSET", "UNION", "ALL", "DISTINCT", "AS", "AND", "OR", "NOT", "IN", "IS", "NULL",
+    "LIKE", "BETWEEN", "EXISTS", "CASE", "WHEN", "THEN", "ELSE", "END", "SET", "VALUES",
+    "INTO", "UPDATE", "DELETE", "INSERT", "REPLACE", "WITH", "FOR", "LOCK", "SHARE",
+    "MODE", "WINDOW", "PARTITION", "OVER", "ASC", "DESC", "INTERVAL", "TRUE", "FALSE",
+    "FORCE", "USE", "IGNORE", "INDEX", "KEY", "DUPLICATE", "LATERAL", "RECURSIVE",
+}
+
+# Parámetros de MinHash / LSH: 16 bandas de 4 filas (umbral de similitud ≈ 0.5)
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+SHINGLE_SIZE = 3
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def _permutations() -> List[Tuple[int, int]]:
+    """Coeficientes (a, b) deterministas para que las firmas sean estables entre ejecuciones"""
+    coefficients = []
+    for i in range(NUM_PERMUTATIONS):
+        digest = hashlib.blake2b(f"minhash-{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(digest[:8], "big") % (_MERSENNE_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:], "big") % _MERSENNE_PRIME
+        coefficients.append((a, b))
+    return coefficients
+
+
+_PERMUTATIONS = _permutations()
+
+
+def fingerprint_tokens(query: str) -> List[str]:
+    """
+    Tokens normalizados de una consulta:
+    - literales, números y parámetros -> ?
+    - listas IN (?, ?, ...) -> IN (?+)
+    - identificadores en minúsculas y sin backticks; palabras clave en mayúsculas
+    - alias de tabla sustituidos por el nombre de la tabla y alias de columna eliminados
+    - con una sola tabla, columnas sin calificar (o.id, orders.id e id son lo mismo)
+    """
+    raw = []
+    for match in _SQL_TOKEN_RE.finditer(query):
+        kind = match.lastgroup
+        text = match.group()
+        if kind == "comment":
+            continue
+        if kind in ("string", "number", "param"):
+            raw.append(("value", "?"))
+        elif kind == "quoted":
+            raw.append(("ident", text[1:-1].replace("``", "`").lower()))
+        elif kind == "word":
+            upper = text.upper()
+            if upper in _RESERVED:
+                raw.append(("keyword", upper))
+            else:
+                raw.append(("ident", text.lower()))
+        else:
+            raw.append(("symbol", text))
+
+    # Detectar alias: "tabla [AS] alias" tras FROM/JOIN y "expr AS alias" en el SELECT
+    aliases = {}
+    skip = set()
+    table_refs = []
+    for i, (kind, text) in enumerate(raw):
+        if kind == "keyword" and text in _TABLE_INTRODUCERS:
+            j = i + 1
+            # Nombre calificado esquema.tabla
+            while j + 2 < len(raw) and raw[j + 1] == ("symbol", ".") and raw[j + 2][0] == "ident":
+                j += 2
+            if j < len(raw) and raw[j][0] == "ident":
+                table = raw[j][1]
+                table_refs.append(table)
+                k = j + 1
+                if k < len(raw) and raw[k] == ("keyword", "AS"):
+                    k += 1
+                if k < len(raw) and raw[k][0] == "ident":
+                    aliases[raw[k][1]] = table
+                    skip.update(range(j + 1, k + 1))
+        elif kind == "keyword" and text == "AS" and i + 1 < len(raw) and raw[i + 1][0] == "ident":
+            if i not in skip:
+                skip.update((i, i + 1))
+
+    # Con una sola tabla, "tabla.columna", "alias.columna" y "columna" son la misma
+    # referencia: se quita el calificador para que las tres formas den la misma huella
+    single_table = table_refs[0] if len(table_refs) == 1 else None
+    tokens = []
+    for i, (kind, text) in enumerate(raw):
+        if i in skip:
+            continue
+        if kind == "ident" and i + 2 < len(raw) and raw[i + 1] == ("symbol", ".") and raw[i + 2][0] == "ident":
+            text = aliases.get(text, text)
+            if text == single_table:
+                skip.add(i + 1)
+                continue
+        tokens.append(text)
+
+    # Colapsar listas de valores: IN (?, ?, ?) -> IN (?+)
+    collapsed = []
+    i = 0
+    while i < len(tokens):
+        if tokens[i] == "(" and i + 1 < len(tokens) and tokens[i + 1] == "?":
+            j = i + 1
+            while j + 2 < len(tokens) and tokens[j + 1] == "," and tokens[j + 2] == "?":
+                j += 2
+            if j + 1 < len(tokens) and tokens[j + 1] == ")" and j > i + 1:
+                collapsed.extend(["(", "?+", ")"])
+                i = j + 2
+                continue
+        collapsed.append(tokens[i])
+        i += 1
+
+    # Quitar el ';' final
+    while collapsed and collapsed[-1] == ";":
+        collapsed.pop()
+    return collapsed
+
+
+def fingerprint_query(query: str) -> str:
+    """Huella textual de una consulta: misma huella para consultas que solo difieren en literales, alias o espacios"""
+    return " ".join(fingerprint_tokens(query)).replace(" . ", ".")
+
+
+def fingerprint_hash(fingerprint: str) -> str:
+    return hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:16]
+
+
+def _shingles(tokens: List[str]) -> List[bytes]:
+    if len(tokens) < SHINGLE_SIZE:
+        return [" ".join(tokens).encode("utf-8")] if tokens else []
+    return list({" ".join(tokens[i:i + SHINGLE_SIZE]).encode("utf-8")
+                 for i in range(len(tokens) - SHINGLE_SIZE + 1)})
+
+
+def minhash_signature(tokens: List[str]) -> array:
+    """Firma MinHash de las k-shingles de tokens de una huella"""
+    signature = array("I", [_MAX_HASH] * NUM_PERMUTATIONS)
+    for shingle in _shingles(tokens):
+        value = zlib.crc32(shingle)
+        for i, (a, b) in enumerate(_PERMUTATIONS):
+            hashed = ((a * value + b) % _MERSENNE_PRIME) & _MAX_HASH
+            if hashed < signature[i]:
+                signature[i] = hashed
+    return signature
+
+
+def lsh_buckets(signature: array) -> List[Tuple[int, str]]:
+    """(banda, cubeta) para indexar la firma: firmas que coinciden en alguna banda son candidatas"""
+    buckets = []
+    for band in range(LSH_BANDS):
+        chunk = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes()
+        buckets.append((band, hashlib.blake2b(chunk, digest_size=8).hexdigest()))
+    return buckets
+
+
+def estimate_similarity(first: array, second: array) -> float:
+    """Estimación de la similitud de Jaccard entre dos firmas"""
+    return sum(1 for x, y in zip(first, second) if x == y) / NUM_PERMUTATIONS
+
+
+def signature_from_bytes(data: bytes) -> array:
+    signature = array("I")
+    signature.frombytes(data)
+    return signature
@@ -0,0 +1,142 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+from dotenv import load_dotenv
+from .note_store import NoteStore, note_store
+
+load_dotenv()
+
+# Configuración de la telemetría de ejecución de consultas
+QUERY_TELEMETRY_ENABLED = os.getenv("QUERY_TELEMETRY_ENABLED", "true").lower() in ("1", "true", "yes")
+QUERY_TELEMETRY_QUEUE_SIZE = int(os.getenv("QUERY_TELEMETRY_QUEUE_SIZE", 10000))
+QUERY_TELEMETRY_BATCH_SIZE = int(os.getenv("QUERY_TELEMETRY_BATCH_SIZE", 500))
+QUERY_TELEMETRY_FLUSH_INTERVAL = float(os.getenv("QUERY_TELEMETRY_FLUSH_INTERVAL", 2))
+
+
+class QueryTelemetry:
+    """
+    Registro en segundo plano de las ejecuciones de consultas en el almacenamiento de aprendizaje.
+
+    record() solo encola la ejecución (sin esperar al disco); si la cola está llena la
+    ejecución se descarta y se contabiliza. Un hilo escribe los lotes en una única
+    transacción cada `flush_interval` segundos o al reunir `batch_size` ejecuciones.
+    """
+
+    def __init__(self, store: NoteStore, max_queue: int = QUERY_TELEMETRY_QUEUE_SIZE,
+                 batch_size: int = QUERY_TELEMETRY_BATCH_SIZE,
+                 flush_interval: float = QUERY_TELEMETRY_FLUSH_INTERVAL,
+                 enabled: bool = QUERY_TELEMETRY_ENABLED):
+        self.store = store
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.enabled = enabled
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._worker = None
+        self._recorded = 0
+        self._dropped = 0
+        self._flushed = 0
+        self._batches = 0
+        self._failed = 0
+
+    def record(self, query: str, execution_time: float, rows: int = 0, success: bool = True,
+               error_class: str = None) -> bool:
+        """Encola una ejecución; devuelve False si se descartó"""
+        if not self.enabled or not query:
+            return False
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait({
+                "query": query,
+                "execution_time": execution_time,
+                "rows": rows,
+                "success": success,
+                "error_class": error_class,
+                "executed_at": datetime.now().isoformat(),
+            })
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            return False
+        with self._lock:
+            self._recorded += 1
+        return True
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="query-telemetry", daemon=True)
+                self._worker.start()
+
+    def _next_batch(self, wait: bool) -> List[Dict[str, Any]]:
+        """Un lote de hasta batch_size ejecuciones; si wait, espera a la primera y luego hasta flush_interval"""
+        try:
+            batch = [self._queue.get() if wait else self._queue.get_nowait()]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + (self.flush_interval if wait else 0)
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: List[Dict[str, Any]]):
+        try:
+            self.store.record_executions(batch)
+            with self._lock:
+                self._flushed += len(batch)
+                self._batches += 1
+        except Exception as e:
+            print(f"❌ Error al guardar telemetría de consultas: {e}")
+            with self._lock:
+                self._failed += len(batch)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _run(self):
+        while True:
+            self._write(self._next_batch(wait=True))
+
+    def flush(self):
+        """Escribe de inmediato todo lo pendiente en el hilo llamador (cierre del proceso)"""
+        while True:
+            batch = self._next_batch(wait=False)
+            if not batch:
+                return
+            self._write(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "queued": self._queue.qsize(),
+                "recorded": self._recorded,
+                "dropped": self._dropped,
+                "flushed": self._flushed,
+                "batches": self._batches,
+                "failed": self._failed,
+            }
+
+
+query_telemetry = QueryTelemetry(note_store)
+atexit.register(query_telemetry.flush)
+
+
+def record_query_execution(query: str, execution_time: float, rows: int = 0,
+                           success: bool = True, error_class: str = None) -> bool:
+    """Registra en segundo plano una ejecución de consulta (no bloquea)"""
+    return query_telemetry.record(query, execution_time, rows, success, error_class)
+
+
+def get_telemetry_stats() -> Dict[str, Any]:
+    return query_telemetry.stats()
@@ -0,0 +1,53 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List
+
+# Identificadores, palabras y números; los backticks y comillas actúan como separadores
+_TOKEN_RE = re.compile(r"[a-z_][a-z0-9_$]*|\d+(?:\.\d+)?")
+
+# Parámetros estándar de BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def _fold(text: str) -> str:
+    """Minúsculas y sin acentos, para que 'búsqueda' y 'busqueda' coincidan"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokens de SQL y texto libre.
+
+    Los identificadores compuestos se indexan completos y también por partes
+    (customer_id -> customer_id, customer, id), así una búsqueda por 'customer'
+    encuentra consultas sobre 'customer_id' o 'db.customers'.
+    """
+    if not text:
+        return []
+    tokens = []
+    for token in _TOKEN_RE.findall(_fold(text)):
+        tokens.append(token)
+        if "_" in token:
+            tokens.extend(part for part in token.split("_") if part)
+    return tokens
+
+
+def term_frequencies(*texts: str) -> Dict[str, int]:
+    """Frecuencia de cada término en el conjunto de textos de una nota"""
+    counter = Counter()
+    for text in texts:
+        counter.update(tokenize(text))
+    return dict(counter)
+
+
+def bm25_idf(num_docs: int, doc_freq: int) -> float:
+    return math.log((num_docs - doc_freq + 0.5) / (doc_freq + 0.5) + 1)
+
+
+def bm25_term_score(tf: int, doc_length: int, avg_doc_length: float, idf: float) -> float:
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_length / (avg_doc_length or 1))
+    return idf * tf * (BM25_K1 + 1) / (tf + norm)
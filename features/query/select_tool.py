@@ -1,7 +1,19 @@
 from core import BaseTool
 from fastmcp import FastMCP
 from typing import Union, List, Tuple, Optional, Dict, Any
-from .services import execute_query
+from core import get_pools_stats, get_row_count_stats, get_replication_stats, get_classifier_stats
+from features.learning.services import record_query_execution, get_telemetry_stats
+from .services import (
+    execute_query_detailed_async,
+    get_cache_stats,
+    get_stream_stats,
+    start_query_stream_async,
+    fetch_query_page_async,
+    close_query_stream_async,
+    analyze_slow_query_async,
+    maybe_analyze_slow_query,
+    execute_batch_async
+)
 
 class QueryTool(BaseTool):
     def __init__(self, mcp: FastMCP):
@@ -44,11 +56,29 @@ class QueryTool(BaseTool):
                - Modo fetch_all: Retorna lista completa de resultados
                - Modo fetch_one: Retorna único registro
                - Para operaciones de escritura: Retorna número de filas afectadas
+               - Modo stream: Retorna los SELECT grandes por páginas con un
+                 continuation_token para pedir las siguientes con fetch_query_page_tool
             
             Parámetros:
             - query (str): Consulta SQL completa a ejecutar
             - params (opcional): Tupla o lista con parámetros seguros
             - fetch_all (bool): True para múltiples resultados, False para único
+            - stream (bool): True para leer el resultado por páginas sin cargarlo entero en memoria
+            - page_size (int): Filas por página en modo stream
+            - use_cache (bool): False para ignorar la caché de resultados de SELECT
+            - timeout (float, opcional): Segundos máximos de ejecución (por defecto QUERY_TIMEOUT;
+              0 = sin límite). Los SELECT usan el hint MAX_EXECUTION_TIME y el resto de
+              sentencias se cancelan con KILL QUERY. Si el cliente se desconecta, la
+              consulta en curso también se cancela
+            - max_rows (int, opcional): Máximo de filas devueltas (por defecto QUERY_MAX_ROWS; 0 = sin límite)
+            - max_bytes (int, opcional): Tamaño máximo aproximado del resultado (por defecto QUERY_MAX_BYTES)
+            - format (str): Formato de las filas de un SELECT:
+              * json: lista de diccionarios (por defecto)
+              * rows: {"columns": [...], "rows": [[...], ...]} sin repetir los nombres de columna
+              * columnar: {"columns": [...], "values": [[...], ...]} con un array por columna
+              * csv: texto CSV con cabecera
+              * arrow: tabla Arrow (IPC stream) codificada en base64; requiere pyarrow
+            - columnar (bool): Equivale a format="columnar"
             
             Retorna:
             Diccionario con:
@@ -57,6 +87,16 @@ class QueryTool(BaseTool):
               * INSERT/UPDATE/DELETE: Número de filas afectadas
               * None en caso de error
             - execution_time (float): Tiempo de ejecución en segundos
+            - cached (bool): True si el SELECT se respondió desde la caché de resultados
+              (las escrituras sobre una tabla invalidan sus entradas)
+            - truncated (bool): True si el SELECT superó max_rows o max_bytes; las filas
+              restantes no se leen de MySQL (usar stream o LIMIT/OFFSET para obtenerlas)
+            - rows_returned (int): Filas incluidas en result
+            - estimated_total (int): Total de filas (estimado con EXPLAIN si se truncó)
+            - timed_out (bool): True si la consulta se interrumpió por superar el tiempo máximo
+              (execution_time indica el tiempo transcurrido hasta la interrupción)
+            - slow_query_analysis: "scheduled" si el SELECT superó el umbral de consulta lenta
+              y se programó su análisis con EXPLAIN (ver analyze_query_tool)
             
             Casos de uso típicos:
             - Obtención de datos complejos con múltiples relaciones
@@ -73,18 +113,209 @@ class QueryTool(BaseTool):
             """,
             tags={"database", "mysql", "sql", "crud", "query", "join", "transaction", "performance"},
         )
-        def execute_query_tool(
+        async def execute_query_tool(
             query: str, 
             params: Optional[Union[Tuple, List]] = None,
-            fetch_all: bool = True
+            fetch_all: bool = True,
+            stream: bool = False,
+            page_size: int = 1000,
+            use_cache: bool = True,
+            timeout: Optional[float] = None,
+            max_rows: Optional[int] = None,
+            max_bytes: Optional[int] = None,
+            format: str = "json",
+            columnar: bool = False
         ) -> Dict[str, Any]:
     
-            result, execution_time = execute_query(query, params, fetch_all)
+            if stream:
+                page = await start_query_stream_async(query, params, page_size)
+                page["query"] = query
+                if "execution_time" in page:
+                    record_query_execution(query, page["execution_time"], len(page.get("result") or []),
+                                           page.get("error") is None)
+                return page
+    
+            outcome = await execute_query_detailed_async(query, params, fetch_all, use_cache, timeout,
+                                                         max_rows, max_bytes,
+                                                         "columnar" if columnar else format)
+            
+            # Telemetría en segundo plano (las respuestas de la caché no llegan a MySQL)
+            if not outcome["cached"]:
+                result = outcome["result"]
+                rows = outcome.get("rows_returned", result if isinstance(result, int) else int(result is not None))
+                record_query_execution(query, outcome["execution_time"], rows,
+                                       "error" not in outcome, outcome.get("error_class"))
+                # SELECT lentos: EXPLAIN y nota con el plan en segundo plano
+                if "error" not in outcome and maybe_analyze_slow_query(query, params, outcome["execution_time"], rows):
+                    outcome["slow_query_analysis"] = "scheduled"
             
             # Retornar como diccionario estructurado
-            return {
-                "result": result,
-                "execution_time": execution_time,
+            response = {
+                "result": outcome["result"],
+                "execution_time": outcome["execution_time"],
                 "query": query, 
-                "success": result is not None
-            }
\ No newline at end of file
+                "success": outcome["result"] is not None,
+                "cached": outcome["cached"]
+            }
+            if "error" in outcome:
+                response["error"] = outcome["error"]
+            for key in ("truncated", "rows_returned", "estimated_total", "format"):
+                if key in outcome:
+                    response[key] = outcome[key]
+            if not outcome["cached"]:
+                response["timeout"] = outcome.get("timeout")
+                response["timed_out"] = outcome.get("timed_out", False)
+                if outcome.get("cancelled"):
+                    response["cancelled"] = True
+            if "slow_query_analysis" in outcome:
+                response["slow_query_analysis"] = outcome["slow_query_analysis"]
+            return response
+        
+        @self.mcp.tool(
+            name="fetch_query_page_tool",
+            description="""
+            Obtiene la siguiente página de una consulta ejecutada con execute_query_tool en modo stream.
+            
+            El servidor mantiene abierto un cursor sin buffer y solo lee del servidor MySQL
+            las filas de la página solicitada, por lo que la memoria usada no depende del
+            tamaño total del resultado.
+            
+            Parámetros:
+            - continuation_token (str): Token devuelto por la página anterior
+            - close (bool): True para cerrar el flujo sin leer más páginas
+            
+            Retorna:
+            Diccionario con:
+            - result: Lista de filas de la página
+            - has_more / continuation_token: Si quedan filas y el token para pedirlas
+            - rows_sent: Filas entregadas hasta el momento
+            
+            Los flujos sin actividad se cierran automáticamente tras unos minutos.
+            """,
+            tags={"database", "mysql", "sql", "query", "pagination", "streaming"},
+        )
+        async def fetch_query_page_tool(
+            continuation_token: str,
+            close: bool = False
+        ) -> Dict[str, Any]:
+            if close:
+                closed = await close_query_stream_async(continuation_token)
+                return {"closed": closed, "success": closed}
+            return await fetch_query_page_async(continuation_token)
+        
+        @self.mcp.tool(
+            name="execute_batch_tool",
+            description="""
+            Ejecuta una lista de sentencias SQL en una sola llamada y una sola conexión.
+            
+            Evita un viaje de ida y vuelta MCP y una conexión por sentencia cuando se
+            encadenan operaciones relacionadas (p. ej. varios INSERT y un SELECT de
+            comprobación).
+            
+            Parámetros:
+            - statements (list): Sentencias en orden; cada una puede ser un texto SQL,
+              {"query": "...", "params": [...]} o ["...", [...]]
+            - transaction (bool): True (por defecto) para ejecutarlas en una transacción:
+              si alguna falla se revierten todas (todo o nada) y no se ejecutan las siguientes.
+              Las sentencias DDL (CREATE, ALTER, DROP...) confirman implícitamente en MySQL
+            - stop_on_error (bool): Sin transacción, True para detenerse en el primer error
+              (cada sentencia se confirma al terminar)
+            - timeout (float, opcional): Segundos máximos por sentencia (por defecto QUERY_TIMEOUT)
+            - max_rows / max_bytes (int, opcional): Presupuesto de la respuesta de cada SELECT
+            
+            Retorna:
+            Diccionario con:
+            - success (bool): True si todas las sentencias se ejecutaron sin error
+            - committed / rolled_back (bool): Resultado de la transacción
+            - execution_time (float): Tiempo total en segundos
+            - results: Una entrada por sentencia ejecutada con index, query, result
+              (filas de un SELECT o filas afectadas), execution_time, success,
+              last_insert_id (escrituras), truncated (SELECT) y error si falló
+            """,
+            tags={"database", "mysql", "sql", "batch", "transaction", "performance"},
+        )
+        async def execute_batch_tool(
+            statements: List[Union[str, Dict[str, Any], List[Any]]],
+            transaction: bool = True,
+            stop_on_error: bool = True,
+            timeout: Optional[float] = None,
+            max_rows: Optional[int] = None,
+            max_bytes: Optional[int] = None
+        ) -> Dict[str, Any]:
+            outcome = await execute_batch_async(statements, transaction, stop_on_error,
+                                                timeout, max_rows, max_bytes)
+            # Telemetría por sentencia (las revertidas también se ejecutaron en MySQL)
+            for entry in outcome["results"]:
+                result = entry["result"]
+                rows = entry.get("rows_returned", result if isinstance(result, int) else 0)
+                record_query_execution(entry["query"], entry["execution_time"], rows,
+                                       entry["success"], entry.get("error_class"))
+            return outcome
+        
+        @self.mcp.tool(
+            name="analyze_query_tool",
+            description="""
+            Analizador de consultas lentas con EXPLAIN e índices recomendados.
+            
+            Ejecuta la consulta SELECT para medir su tiempo, obtiene el plan con
+            EXPLAIN FORMAT=JSON y lo guarda junto a una nota de aprendizaje.
+            
+            Detecta:
+            - Lecturas completas de tabla (full scan) o de índice
+            - Ordenaciones en disco/memoria (filesort)
+            - Tablas temporales
+            
+            Propone índices candidatos a partir de las condiciones del plan, comprobando
+            los índices existentes y las columnas del esquema en caché.
+            
+            Los SELECT de execute_query_tool que superan SLOW_QUERY_THRESHOLD segundos se
+            analizan automáticamente en segundo plano (una vez por patrón de consulta).
+            
+            Parámetros:
+            - query (str): Consulta SELECT a analizar
+            - params (opcional): Parámetros de la consulta
+            - save_note (bool): Guardar la nota de aprendizaje con el plan
+            
+            Retorna:
+            Diccionario con plan, query_cost, issues, index_suggestions (con su DDL),
+            execution_time y note_id
+            """,
+            tags={"database", "mysql", "sql", "performance", "explain", "index", "optimization"},
+        )
+        async def analyze_query_tool(
+            query: str,
+            params: Optional[Union[Tuple, List]] = None,
+            save_note: bool = True
+        ) -> Dict[str, Any]:
+            return await analyze_slow_query_async(query, params, save_note=save_note)
+        
+        @self.mcp.resource(
+            uri="metrics://query/stats",
+            name="get_query_execution_stats",
+            description="""
+            Métricas de ejecución de consultas del servidor MCP.
+            
+            Incluye:
+            - Caché de resultados: aciertos, fallos, expulsiones, invalidaciones y memoria usada
+            - Pool de conexiones: conexiones abiertas, en uso, creadas y esperas agotadas
+            - Sentencias preparadas: aciertos, fallos, expulsiones y tasa de acierto (prepared_hit_rate)
+            - Flujos de lectura por páginas abiertos
+            - Telemetría de ejecuciones: encoladas, escritas y descartadas
+            - Conteos de registros cacheados: entradas, aciertos e invalidaciones por escrituras
+            - Réplicas de lectura: retraso, estado y lecturas enviadas a cada réplica o al primario
+            - Clasificador de sentencias: análisis memorizados y tasa de acierto
+            
+            Útil para medir cuánta carga se evita sobre MySQL y dimensionar el servidor.
+            """,
+            tags={"metrics", "performance", "cache", "mysql", "monitoring"},
+        )
+        def get_query_execution_stats() -> Dict[str, Any]:
+            return {
+                "result_cache": get_cache_stats(),
+                "connection_pools": get_pools_stats(),
+                "streams": get_stream_stats(),
+                "telemetry": get_telemetry_stats(),
+                "row_counts": get_row_count_stats(),
+                "replication": get_replication_stats(),
+                "sql_classifier": get_classifier_stats()
+            }
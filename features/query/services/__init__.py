@@ -1,2 +1,43 @@
-from .query_service import execute_query
-__all__ = ["execute_query"]
\ No newline at end of file
+from .query_service import (
+    execute_query,
+    execute_query_async,
+    execute_query_detailed,
+    execute_query_detailed_async
+)
+from core.result_cache import get_cache_stats
+from .stream_service import (
+    start_query_stream,
+    fetch_query_page,
+    close_query_stream,
+    get_stream_stats,
+    start_query_stream_async,
+    fetch_query_page_async,
+    close_query_stream_async
+)
+from .batch_service import execute_batch, execute_batch_async
+from .explain_service import (
+    explain_query,
+    analyze_slow_query,
+    analyze_slow_query_async,
+    maybe_analyze_slow_query
+)
+__all__ = [
+    "execute_query",
+    "execute_query_async",
+    "execute_query_detailed",
+    "execute_query_detailed_async",
+    "get_cache_stats",
+    "start_query_stream",
+    "fetch_query_page",
+    "close_query_stream",
+    "get_stream_stats",
+    "start_query_stream_async",
+    "fetch_query_page_async",
+    "close_query_stream_async",
+    "explain_query",
+    "analyze_slow_query",
+    "analyze_slow_query_async",
+    "maybe_analyze_slow_query",
+    "execute_batch",
+    "execute_batch_async"
+]
\ No newline at end of file
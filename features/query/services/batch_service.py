@@ -0,0 +1,208 @@
+from core import MySQLConnector, run_blocking
+from core.query_watchdog import QUERY_TIMEOUT, QueryControl, watchdog, is_interrupted
+from typing import Any, Dict, List, Optional, Tuple, Union
+import asyncio
+import os
+import time
+from .query_service import with_max_execution_time, error_class
+from .result_budget import QUERY_MAX_ROWS, QUERY_MAX_BYTES, fetch_within_budget
+from core.result_cache import is_write, invalidate_for_write
+
+# Sentencias máximas por lote
+BATCH_MAX_STATEMENTS = int(os.getenv("BATCH_MAX_STATEMENTS", 100))
+
+BatchItem = Union[str, Dict[str, Any], List[Any], Tuple[Any, ...]]
+
+
+def _parse_item(item: BatchItem) -> Tuple[str, Optional[Union[Tuple, List]]]:
+    """Acepta "SQL", {"query": ..., "params": [...]} o [query, params]"""
+    if isinstance(item, str):
+        return item, None
+    if isinstance(item, dict):
+        query, params = item.get("query"), item.get("params")
+    elif isinstance(item, (list, tuple)) and 1 <= len(item) <= 2:
+        query, params = item[0], item[1] if len(item) == 2 else None
+    else:
+        raise ValueError("Cada sentencia debe ser un texto SQL, {\"query\", \"params\"} o [query, params]")
+    if not isinstance(query, str) or not query.strip():
+        raise ValueError("Sentencia sin texto SQL")
+    return query, params
+
+
+def _run_statement(db: MySQLConnector, query: str, params, timeout: float, control: QueryControl,
+                   max_rows: int, max_bytes: int) -> Dict[str, Any]:
+    """Ejecuta una sentencia del lote en la conexión ya abierta (sin confirmar)"""
+    statement = with_max_execution_time(query, timeout) if timeout > 0 else query
+    watch = None
+    if statement is None:
+        statement = query
+        watch = watchdog.watch(control, timeout)
+    prepared = False
+    try:
+        statement, cursor, prepared = db.statement_cursor(statement, params)
+        cursor.execute(statement, params or ())
+        if cursor.with_rows:
+            rows, truncated = fetch_within_budget(cursor, max_rows, max_bytes)
+            if truncated:
+                # La conexión se sigue usando: las filas sobrantes se leen y se descartan
+                db.conn.consume_results()
+            return {
+                "result": db.normalize_keys(rows),
+                "rows_returned": len(rows),
+                "truncated": truncated,
+            }
+        return {"result": cursor.rowcount, "last_insert_id": cursor.lastrowid or None}
+    except Exception:
+        if prepared:
+            db.forget_statement(statement)
+        raise
+    finally:
+        watchdog.unwatch(watch)
+
+
+def execute_batch(
+    statements: List[BatchItem],
+    transaction: bool = True,
+    stop_on_error: bool = True,
+    timeout: Optional[float] = None,
+    control: Optional[QueryControl] = None,
+    max_rows: Optional[int] = None,
+    max_bytes: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Ejecuta varias sentencias en una sola conexión del pool
+
+    Con transaction=True todas se ejecutan entre begin_transaction y
+    commit_transaction: si una falla se revierte el lote completo y no se
+    ejecutan las siguientes. Sin transacción cada sentencia se confirma al
+    terminar y stop_on_error decide si se continúa tras un error.
+
+    Los SELECT no pasan por la caché de resultados (dentro de una transacción
+    pueden ver cambios aún no confirmados); las escrituras invalidan la caché
+    después del commit. El lote siempre se ejecuta en el primario.
+
+    Args:
+        statements: Lista de "SQL", {"query", "params"} o [query, params]
+        timeout: Segundos máximos por sentencia (None = QUERY_TIMEOUT, 0 = sin límite)
+        control: Permite cancelar el lote desde otro hilo (desconexión del cliente)
+        max_rows / max_bytes: Presupuesto de la respuesta de cada SELECT
+
+    Returns:
+        Dict con success, committed, rolled_back, execution_time y results (uno por
+        sentencia ejecutada: result, execution_time, success y error si falló)
+    """
+    timeout = QUERY_TIMEOUT if timeout is None else timeout
+    max_rows = QUERY_MAX_ROWS if max_rows is None else max_rows
+    max_bytes = QUERY_MAX_BYTES if max_bytes is None else max_bytes
+    control = control or QueryControl()
+    start_time = time.time()
+    response = {
+        "success": False,
+        "committed": False,
+        "rolled_back": False,
+        "execution_time": 0.0,
+        "results": [],
+    }
+
+    try:
+        if not statements:
+            raise ValueError("El lote no contiene sentencias")
+        if len(statements) > BATCH_MAX_STATEMENTS:
+            raise ValueError(f"El lote supera el máximo de {BATCH_MAX_STATEMENTS} sentencias")
+        parsed = [_parse_item(item) for item in statements]
+    except ValueError as e:
+        response["error"] = str(e)
+        response["error_class"] = "InvalidBatch"
+        return response
+
+    results = response["results"]
+    written: List[str] = []
+    with MySQLConnector() as db:
+        if db.conn is None:
+            response["error"] = "No se pudo obtener una conexión a MySQL"
+            response["error_class"] = "ConnectionUnavailable"
+            return response
+        control.attach(db.config, db.conn.connection_id)
+        try:
+            if transaction:
+                db.begin_transaction()
+            failed = False
+            for index, (query, params) in enumerate(parsed):
+                if control.reason is not None:
+                    failed = True
+                    response["error"] = "Lote cancelado"
+                    response["cancelled"] = True
+                    break
+                statement_start = time.time()
+                entry = {"index": index, "query": query}
+                try:
+                    entry.update(_run_statement(db, query, params, timeout, control, max_rows, max_bytes))
+                    if not transaction:
+                        db.conn.commit()
+                    entry["success"] = True
+                    if is_write(query):
+                        written.append(query)
+                except Exception as e:
+                    print(f"❌ Error en la sentencia {index} del lote: {e}")
+                    entry.update({"result": None, "success": False, "error": str(e), "error_class": error_class(e)})
+                    if is_interrupted(e):
+                        entry["timed_out"] = control.reason in (None, "timeout")
+                        entry["cancelled"] = control.reason == "cancelled"
+                    failed = True
+                    if not transaction:
+                        db.conn.rollback()
+                entry["execution_time"] = time.time() - statement_start
+                results.append(entry)
+                if failed and (transaction or stop_on_error):
+                    break
+
+            if transaction:
+                if failed:
+                    # Todo o nada: se deshacen también las sentencias que habían terminado bien
+                    db.rollback_transaction()
+                    response["rolled_back"] = True
+                else:
+                    db.commit_transaction()
+                    response["committed"] = True
+            else:
+                response["committed"] = any(entry["success"] for entry in results)
+            response["success"] = not failed
+        except Exception as e:
+            print(f"❌ Error en lote: {e}")
+            if db.conn is not None:
+                db.conn.rollback()
+            response["rolled_back"] = transaction
+            response["error"] = str(e)
+            response["error_class"] = error_class(e)
+        finally:
+            control.detach()
+
+    for query in written:
+        invalidate_for_write(query)
+    if written:
+        db.note_write()
+    response["execution_time"] = time.time() - start_time
+    return response
+
+
+async def execute_batch_async(
+    statements: List[BatchItem],
+    transaction: bool = True,
+    stop_on_error: bool = True,
+    timeout: Optional[float] = None,
+    max_rows: Optional[int] = None,
+    max_bytes: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Versión asíncrona de execute_batch
+
+    Si la tarea se cancela la sentencia en curso se cancela con KILL QUERY y el
+    lote se revierte.
+    """
+    control = QueryControl()
+    try:
+        return await run_blocking(execute_batch, statements, transaction, stop_on_error,
+                                  timeout, control, max_rows, max_bytes)
+    except asyncio.CancelledError:
+        await asyncio.to_thread(control.cancel, "cancelled")
+        raise
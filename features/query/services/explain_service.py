@@ -0,0 +1,349 @@
+from core import MySQLConnector, run_blocking, get_executor
+from core.sql_classifier import classify
+from typing import Any, Dict, List, Optional, Tuple, Union
+import json
+import os
+import re
+import threading
+import time
+from features.information.services import schema_cache
+from features.learning.services import save_query_note
+from features.learning.services.query_fingerprint import fingerprint_query, fingerprint_hash
+
+# Configuración del analizador de consultas lentas
+SLOW_QUERY_THRESHOLD = float(os.getenv("SLOW_QUERY_THRESHOLD", 1.0))
+SLOW_QUERY_ANALYZE = os.getenv("SLOW_QUERY_ANALYZE", "true").lower() in ("1", "true", "yes")
+# Segundos durante los que no se vuelve a analizar la misma huella
+SLOW_QUERY_REANALYZE_INTERVAL = float(os.getenv("SLOW_QUERY_REANALYZE_INTERVAL", 600))
+
+# Columnas calificadas tal como aparecen en attached_condition: `db`.`alias`.`col`
+_QUALIFIED_COLUMN_RE = re.compile(r"`(\w+)`\.`(\w+)`\.`(\w+)`")
+_EQUALITY_RE = r"(?:`\w+`\.`{alias}`\.`{column}`\s*=(?!>)|=\s*`\w+`\.`{alias}`\.`{column}`)"
+
+_TABLE_ALIAS_RE = re.compile(
+    r"\b(?:FROM|JOIN)\s+`?(\w+)`?(?:\s*\.\s*`?(\w+)`?)?(?:\s+(?:AS\s+)?`?(\w+)`?)?",
+    re.IGNORECASE,
+)
+_ORDER_BY_RE = re.compile(r"\bORDER\s+BY\s+(.+?)(?:\bLIMIT\b|\bFOR\b|$)", re.IGNORECASE | re.DOTALL)
+_ORDER_COLUMN_RE = re.compile(r"^`?(?:(\w+)`?\s*\.\s*`?)?(\w+)`?(?:\s+(?:ASC|DESC))?$", re.IGNORECASE)
+
+_ALIAS_STOPWORDS = {
+    "where", "join", "inner", "left", "right", "cross", "natural", "straight_join", "on",
+    "using", "group", "order", "having", "limit", "union", "for", "lock", "window",
+    "force", "use", "ignore", "partition",
+}
+
+_recent_lock = threading.Lock()
+_recently_analyzed: Dict[str, float] = {}
+
+
+def _table_aliases(query: str) -> Dict[str, str]:
+    """Alias -> tabla real de las tablas de FROM/JOIN (la propia tabla también es su alias)"""
+    aliases = {}
+    for first, second, alias in _TABLE_ALIAS_RE.findall(query):
+        table = second or first
+        aliases[table.lower()] = table
+        if alias and alias.lower() not in _ALIAS_STOPWORDS:
+            aliases[alias.lower()] = table
+    return aliases
+
+
+def _walk_tables(node: Any, flags: Dict[str, bool]) -> List[Tuple[Dict[str, Any], Dict[str, bool]]]:
+    """Recorre el plan JSON y devuelve cada nodo 'table' con las operaciones que lo envuelven"""
+    found = []
+    if isinstance(node, dict):
+        flags = dict(flags)
+        if node.get("using_filesort"):
+            flags["filesort"] = True
+        if node.get("using_temporary_table"):
+            flags["temporary"] = True
+        for key, value in node.items():
+            if key == "table" and isinstance(value, dict):
+                found.append((value, flags))
+            found.extend(_walk_tables(value, flags))
+    elif isinstance(node, list):
+        for item in node:
+            found.extend(_walk_tables(item, flags))
+    return found
+
+
+def _existing_indexes(db: MySQLConnector, table: str) -> List[List[str]]:
+    """Columnas de cada índice de la tabla: instantánea del esquema o, si no está, SHOW INDEX"""
+    indexes = schema_cache.get_indexes(table)
+    if indexes:
+        return [[col.lower() for col in index["columns"]] for index in indexes]
+    rows = db.get_table_indexes(f"`{table}`") or []
+    by_name: Dict[str, List[Tuple[int, str]]] = {}
+    for row in rows:
+        by_name.setdefault(row["key_name"], []).append((row["seq_in_index"], row["column_name"].lower()))
+    return [[col for _, col in sorted(cols)] for cols in by_name.values()]
+
+
+def _table_columns(table: str) -> Optional[set]:
+    document = schema_cache.get_document()
+    if document is None or table not in document["structure"]:
+        return None
+    return {col["name"].lower() for col in document["structure"][table]["columns"]}
+
+
+def _order_columns(query: str, alias: str, aliases: Dict[str, str]) -> List[str]:
+    match = _ORDER_BY_RE.search(query)
+    if not match:
+        return []
+    columns = []
+    single_table = len(set(aliases.values())) == 1
+    for part in match.group(1).split(","):
+        column = _ORDER_COLUMN_RE.match(part.strip())
+        if not column:
+            return []  # Expresiones: un índice no evitaría el filesort
+        owner, name = column.groups()
+        if (owner and owner.lower() == alias.lower()) or (not owner and single_table):
+            columns.append(name.lower())
+    return columns
+
+
+def _suggest_index(table: str, alias: str, node: Dict[str, Any], flags: Dict[str, bool],
+                   query: str, aliases: Dict[str, str], existing: List[List[str]]) -> Optional[Dict[str, Any]]:
+    """Índice candidato: igualdades primero, luego rangos y por último las columnas del ORDER BY"""
+    condition = node.get("attached_condition", "")
+    equality, ranges = [], []
+    for _, owner, column in _QUALIFIED_COLUMN_RE.findall(condition):
+        if owner.lower() != alias.lower():
+            continue
+        column = column.lower()
+        pattern = _EQUALITY_RE.format(alias=re.escape(owner), column=re.escape(column))
+        target = equality if re.search(pattern, condition, re.IGNORECASE) else ranges
+        if column not in equality and column not in ranges:
+            target.append(column)
+    columns = equality + ranges[:1]
+    if flags.get("filesort") and not ranges:
+        columns += [col for col in _order_columns(query, alias, aliases) if col not in columns]
+    if not columns:
+        return None
+
+    known = _table_columns(table)
+    if known is not None:
+        columns = [col for col in columns if col in known]
+        if not columns:
+            return None
+    # Ya existe un índice cuyo prefijo cubre las columnas propuestas
+    if any(index[:len(columns)] == columns for index in existing):
+        return None
+
+    index_name = f"idx_{table}_{'_'.join(columns)}"[:64]
+    return {
+        "table": table,
+        "columns": columns,
+        "index_name": index_name,
+        "ddl": f"CREATE INDEX `{index_name}` ON `{table}` ({', '.join(f'`{col}`' for col in columns)})",
+        "reason": "columnas de igualdad, luego rango y orden de la condición del plan",
+    }
+
+
+def analyze_plan(db: MySQLConnector, query: str, plan: Dict[str, Any]) -> Dict[str, Any]:
+    """Detecta full scans, filesorts y tablas temporales y propone índices"""
+    aliases = _table_aliases(query)
+    issues, suggestions = [], []
+    nodes = _walk_tables(plan, {})
+    for position, (node, flags) in enumerate(nodes):
+        alias = node.get("table_name", "")
+        table = aliases.get(alias.lower(), alias)
+        access = node.get("access_type")
+        rows = node.get("rows_examined_per_scan")
+        if access in ("ALL", "index"):
+            issues.append({
+                "type": "full_scan" if access == "ALL" else "full_index_scan",
+                "table": table,
+                "rows_examined": rows,
+                "possible_keys": node.get("possible_keys"),
+            })
+        if flags.get("filesort"):
+            issues.append({"type": "filesort", "table": table})
+        if flags.get("temporary"):
+            issues.append({"type": "temporary_table", "table": table})
+        # La ordenación se aplica sobre la primera tabla del plan: solo ahí puede evitarla un índice
+        if access in ("ALL", "index") or (flags.get("filesort") and position == 0):
+            sort_flags = dict(flags, filesort=bool(flags.get("filesort")) and position == 0)
+            suggestion = _suggest_index(table, alias, node, sort_flags, query, aliases,
+                                        _existing_indexes(db, table))
+            if suggestion and suggestion not in suggestions:
+                suggestions.append(suggestion)
+
+    # Un mismo filesort/temporal se repite en cada tabla bajo la operación
+    unique_issues = []
+    for issue in issues:
+        if issue["type"] in ("filesort", "temporary_table") and \
+                any(i["type"] == issue["type"] for i in unique_issues):
+            continue
+        unique_issues.append(issue)
+
+    return {
+        "query_cost": plan.get("query_block", {}).get("cost_info", {}).get("query_cost"),
+        "issues": unique_issues,
+        "index_suggestions": suggestions,
+    }
+
+
+_LIMIT_RE = re.compile(r"\bLIMIT\s+(\d+)(?:\s*(?:,|OFFSET)\s*(\d+))?\s*;?\s*$", re.IGNORECASE)
+
+
+def estimate_query_rows(
+    query: str,
+    params: Optional[Union[Tuple, List]] = None
+) -> Optional[int]:
+    """
+    Filas aproximadas de un SELECT según el optimizador (EXPLAIN, sin ejecutarlo)
+
+    Se multiplican rows × filtered de las tablas del bloque principal y se acota
+    con el LIMIT de la consulta. Devuelve None si no se puede estimar.
+    """
+    if classify(query).statement_type != "SELECT":
+        return None
+    with MySQLConnector() as db:
+        if db.conn is None:
+            return None
+        try:
+            db.cursor.execute("EXPLAIN " + query.strip().rstrip(";"), params or ())
+            plan = db.normalize_keys(db.cursor.fetchall())
+        except Exception as e:
+            print(f"❌ Error al estimar las filas de la consulta: {e}")
+            return None
+    estimate = None
+    for row in plan:
+        if row.get("id") not in (1, None) or row.get("rows") is None:
+            continue
+        rows = float(row["rows"]) * float(row.get("filtered") or 100) / 100
+        estimate = rows if estimate is None else estimate * rows
+    if estimate is None:
+        return None
+    limit = _LIMIT_RE.search(query)
+    if limit:
+        # LIMIT n | LIMIT offset, n | LIMIT n OFFSET offset
+        first, second = limit.groups()
+        count = int(second) if second and "," in limit.group(0) else int(first)
+        estimate = min(estimate, count)
+    return int(round(estimate))
+
+
+def explain_query(
+    query: str,
+    params: Optional[Union[Tuple, List]] = None
+) -> Dict[str, Any]:
+    """
+    Ejecuta EXPLAIN FORMAT=JSON sobre un SELECT y analiza el plan
+
+    Returns:
+        Dict con plan, query_cost, issues e index_suggestions (o error)
+    """
+    if classify(query).statement_type != "SELECT":
+        return {"error": "Solo se analizan consultas SELECT"}
+    with MySQLConnector() as db:
+        if db.conn is None:
+            return {"error": "No se pudo obtener una conexión a MySQL"}
+        try:
+            db.cursor.execute("EXPLAIN FORMAT=JSON " + query.strip().rstrip(";"), params or ())
+            row = db.cursor.fetchone()
+            plan = json.loads(next(iter(row.values())))
+            return {"plan": plan, **analyze_plan(db, query, plan)}
+        except Exception as e:
+            print(f"❌ Error al analizar la consulta: {e}")
+            return {"error": str(e)}
+
+
+def analyze_slow_query(
+    query: str,
+    params: Optional[Union[Tuple, List]] = None,
+    execution_time: float = None,
+    rows: int = 0,
+    save_note: bool = True,
+    timeout: Optional[float] = None,
+    max_rows: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Analiza una consulta con EXPLAIN y guarda el plan junto a una nota de aprendizaje
+
+    Solo se analizan lecturas: una escritura no se ejecuta nunca para medirla.
+
+    Args:
+        query: Consulta SELECT
+        params: Parámetros de la consulta
+        execution_time: Tiempo medido (si se omite se mide ejecutando la consulta)
+        rows: Filas devueltas
+        save_note: Guardar nota con el plan en el almacenamiento de aprendizaje
+        timeout / max_rows: Límites de la ejecución de medida (None = QUERY_TIMEOUT / QUERY_MAX_ROWS)
+    """
+    if not classify(query).read_only:
+        return {"query": query, "error": "Solo se analizan consultas SELECT de solo lectura"}
+    if execution_time is None:
+        # Import diferido: query_service importa este módulo
+        from .query_service import execute_query_detailed
+        measured = execute_query_detailed(query, params, use_cache=False, timeout=timeout, max_rows=max_rows)
+        if "error" in measured:
+            return {"query": query, "error": measured["error"], "error_class": measured.get("error_class")}
+        execution_time = measured["execution_time"]
+        rows = measured.get("rows_returned", 0)
+
+    analysis = explain_query(query, params)
+    analysis.update({"query": query, "execution_time": execution_time,
+                     "slow": execution_time >= SLOW_QUERY_THRESHOLD})
+    if "error" in analysis or not save_note:
+        return analysis
+
+    summary = ", ".join(sorted({issue["type"] for issue in analysis["issues"]})) or "sin problemas en el plan"
+    text = f"Consulta lenta ({execution_time:.3f}s): {summary}."
+    if analysis["index_suggestions"]:
+        text += " Índices sugeridos: " + "; ".join(s["ddl"] for s in analysis["index_suggestions"])
+    tags = ["slow_query", "explain"] + sorted({issue["type"] for issue in analysis["issues"]})
+    saved = save_query_note(
+        query=query,
+        execution_time=execution_time,
+        rows_affected=rows,
+        success=True,
+        note=text,
+        tags=tags,
+        plan={key: analysis[key] for key in ("plan", "query_cost", "issues", "index_suggestions")}
+    )
+    analysis["note_id"] = saved["id"]
+    return analysis
+
+
+def maybe_analyze_slow_query(
+    query: str,
+    params: Optional[Union[Tuple, List]],
+    execution_time: float,
+    rows: int
+) -> bool:
+    """
+    Programa en segundo plano el análisis de un SELECT que superó el umbral
+
+    Cada huella se analiza como mucho una vez por SLOW_QUERY_REANALYZE_INTERVAL.
+    """
+    if not SLOW_QUERY_ANALYZE or execution_time < SLOW_QUERY_THRESHOLD:
+        return False
+    if classify(query).statement_type != "SELECT":
+        return False
+    key = fingerprint_hash(fingerprint_query(query))
+    now = time.monotonic()
+    with _recent_lock:
+        last = _recently_analyzed.get(key)
+        if last is not None and now - last < SLOW_QUERY_REANALYZE_INTERVAL:
+            return False
+        _recently_analyzed[key] = now
+        # Olvidar huellas antiguas para acotar la memoria
+        if len(_recently_analyzed) > 10000:
+            for old_key in [k for k, t in _recently_analyzed.items() if now - t >= SLOW_QUERY_REANALYZE_INTERVAL]:
+                del _recently_analyzed[old_key]
+    get_executor().submit(analyze_slow_query, query, params, execution_time, rows)
+    return True
+
+
+async def analyze_slow_query_async(
+    query: str,
+    params: Optional[Union[Tuple, List]] = None,
+    execution_time: float = None,
+    save_note: bool = True,
+    timeout: Optional[float] = None,
+    max_rows: Optional[int] = None
+) -> Dict[str, Any]:
+    """Versión asíncrona de analyze_slow_query"""
+    return await run_blocking(analyze_slow_query, query, params, execution_time, 0, save_note, timeout, max_rows)
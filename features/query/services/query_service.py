@@ -1,6 +1,261 @@
-from core import MySQLConnector
-from typing import Union, List, Dict, Tuple, Optional
+from core import MySQLConnector, run_blocking
+from core.sql_classifier import classify
+from core.query_watchdog import QUERY_TIMEOUT, QueryControl, watchdog, is_interrupted
+from typing import Union, List, Dict, Tuple, Optional, Any
+import asyncio
 import time
+from .result_budget import (
+    QUERY_MAX_ROWS,
+    QUERY_MAX_BYTES,
+    fetch_within_budget,
+    apply_budget
+)
+from .result_format import RESULT_FORMATS, encode_rows
+from .explain_service import estimate_query_rows
+from core.result_cache import (
+    QUERY_CACHE_ENABLED,
+    ResultCache,
+    result_cache,
+    is_cacheable,
+    is_write,
+    extract_tables,
+    invalidate_for_write
+)
+
+def with_max_execution_time(query: str, timeout: float) -> Optional[str]:
+    """
+    Añade el hint MAX_EXECUTION_TIME a un SELECT para que MySQL lo interrumpa por sí mismo
+
+    Returns:
+        La consulta con el hint, o None si no es un SELECT (se vigila con KILL QUERY)
+    """
+    offset = classify(query).hint_offset
+    if offset is None:
+        return None
+    if "MAX_EXECUTION_TIME" in query.upper():
+        return query
+    return f"{query[:offset]} /*+ MAX_EXECUTION_TIME({max(1, int(timeout * 1000))}) */{query[offset:]}"
+
+def error_class(error: Exception) -> str:
+    """Clase de un error con su código MySQL si lo tiene (ProgrammingError:1146)"""
+    errno = getattr(error, "errno", None)
+    return f"{type(error).__name__}:{errno}" if errno and errno > 0 else type(error).__name__
+
+def execute_query_detailed(
+    query: str,
+    params: Optional[Union[Tuple, List]] = None,
+    fetch_all: bool = True,
+    use_cache: bool = True,
+    timeout: Optional[float] = None,
+    control: Optional[QueryControl] = None,
+    max_rows: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    result_format: str = "json"
+) -> Dict[str, Any]:
+    """
+    Ejecuta una consulta SQL pasando por la caché de resultados
+    
+    Los SELECT deterministas se sirven desde la caché cuando es posible y las
+    escrituras invalidan las entradas de las tablas que modifican.
+    
+    El tiempo máximo se aplica con el hint MAX_EXECUTION_TIME en los SELECT y con
+    un watchdog que lanza KILL QUERY desde otra conexión en el resto de sentencias.
+    
+    Los SELECT con fetch_all se leen con fetchmany hasta agotar el resultado o el
+    presupuesto de filas/bytes; las filas sobrantes no llegan a leerse de MySQL.
+    Con un formato distinto de json se usa un cursor de tuplas: los nombres de
+    columna se leen (en minúsculas) una sola vez de cursor.description.
+    Las consultas con parámetros posicionales reutilizan sentencias preparadas en
+    el servidor (caché LRU por conexión del pool).
+    
+    Args:
+        query: Consulta SQL a ejecutar
+        params: Parámetros para la consulta (previene inyección SQL)
+        fetch_all: True para lista de resultados, False para un único registro
+        use_cache: False para forzar la lectura desde MySQL
+        timeout: Segundos máximos de ejecución (None = QUERY_TIMEOUT, 0 = sin límite)
+        control: Permite cancelar la consulta desde otro hilo (desconexión del cliente)
+        max_rows: Máximo de filas devueltas (None = QUERY_MAX_ROWS, 0 = sin límite)
+        max_bytes: Tamaño máximo aproximado del resultado (None = QUERY_MAX_BYTES, 0 = sin límite)
+        result_format: Formato de las filas de un SELECT con fetch_all:
+            - json: lista de diccionarios (por defecto)
+            - rows: {"columns", "rows"} con una lista de valores por fila
+            - columnar: {"columns", "values"} con un array de valores por columna
+            - csv: texto CSV con cabecera
+            - arrow: tabla Arrow IPC en base64 (requiere pyarrow)
+    
+    Returns:
+        Dict con:
+        - result: Resultado de la consulta (None en caso de error)
+        - execution_time: Tiempo de ejecución en segundos
+        - cached: True si el resultado proviene de la caché
+        - error: Mensaje de error (solo si falló)
+        - error_class: Clase del error, p. ej. ProgrammingError:1146 (solo si falló)
+        - timed_out / cancelled: True si se interrumpió por tiempo o por cancelación
+        - timeout: Tiempo máximo aplicado en segundos
+        - truncated / rows_returned / estimated_total: Solo en SELECT con fetch_all
+    """
+    timeout = QUERY_TIMEOUT if timeout is None else timeout
+    max_rows = QUERY_MAX_ROWS if max_rows is None else max_rows
+    max_bytes = QUERY_MAX_BYTES if max_bytes is None else max_bytes
+    control = control or QueryControl()
+    columns = None
+    start_time = time.time()
+    if result_format not in RESULT_FORMATS:
+        return {
+            "result": None,
+            "execution_time": 0.0,
+            "cached": False,
+            "error": f"Formato no válido: {result_format} (use {', '.join(RESULT_FORMATS)})",
+            "error_class": "InvalidFormat",
+        }
+    tuple_rows = fetch_all and result_format != "json"
+    
+    cacheable = use_cache and QUERY_CACHE_ENABLED and is_cacheable(query)
+    if cacheable:
+        cache_key = ResultCache.make_key(query, params, fetch_all, "tuples" if tuple_rows else "dicts")
+        cache_tables = extract_tables(query)
+        cache_generation = result_cache.generation(cache_tables)
+        found, cached_result = result_cache.get(cache_key)
+        if found:
+            truncated = False
+            if tuple_rows:
+                columns, cached_result = cached_result["columns"], cached_result["rows"]
+            if isinstance(cached_result, list):
+                cached_result, truncated = apply_budget(cached_result, max_rows, max_bytes)
+            return _finish_result({
+                "result": cached_result,
+                "execution_time": time.time() - start_time,
+                "cached": True,
+                "truncated": truncated,
+            }, query, params, result_format if tuple_rows else "json", columns)
+    
+    # Lecturas a una réplica si hay alguna al día; escrituras y lecturas con bloqueo al primario
+    with MySQLConnector.for_query(query) as db:
+        if db.conn is None:
+            return {
+                "result": None,
+                "execution_time": time.time() - start_time,
+                "cached": False,
+                "error": "No se pudo obtener una conexión a MySQL",
+                "error_class": "ConnectionUnavailable",
+            }
+        statement = with_max_execution_time(query, timeout) if timeout > 0 else query
+        watch = None
+        cursor = None
+        prepared = False
+        truncated = False
+        control.attach(db.config, db.conn.connection_id)
+        try:
+            if control.reason is not None:
+                # Cancelada mientras esperaba una conexión del pool
+                return {
+                    "result": None,
+                    "execution_time": time.time() - start_time,
+                    "cached": False,
+                    "error": "Consulta cancelada antes de ejecutarse",
+                    "error_class": "Cancelled",
+                    "cancelled": True,
+                    "timeout": timeout,
+                }
+            if statement is None:
+                statement = query
+                watch = watchdog.watch(control, timeout)
+            statement, cursor, prepared = db.statement_cursor(statement, params, dictionary=not tuple_rows)
+            cursor.execute(statement, params or ())
+            
+            if classify(query).modifies_data:
+                db.conn.commit()
+                result = cursor.rowcount
+            elif fetch_all:
+                result, truncated = fetch_within_budget(cursor, max_rows, max_bytes)
+                if tuple_rows:
+                    columns = [column[0].lower() for column in cursor.description or ()]
+                else:
+                    result = db.normalize_keys(result)
+                if truncated:
+                    # Filas restantes sin leer: se descarta la conexión en lugar de drenarla
+                    db.invalidate()
+            else:
+                # Se lee del cursor que ejecutó la sentencia (puede ser uno preparado)
+                result = db.normalize_keys(cursor.fetchone()) if cursor.with_rows else cursor.rowcount
+                if cursor.with_rows and db.conn.unread_result:
+                    # Filas restantes sin leer en ese cursor: se descarta la conexión
+                    db.invalidate()
+            
+            if is_write(query):
+                invalidate_for_write(query)
+                db.note_write()
+            elif cacheable and not truncated:
+                cached_value = {"columns": columns, "rows": result} if tuple_rows and isinstance(result, list) else result
+                result_cache.put(cache_key, cached_value, cache_tables, cache_generation)
+                
+            outcome = {
+                "result": result,
+                "execution_time": time.time() - start_time,
+                "cached": False,
+                "timeout": timeout,
+                "truncated": truncated,
+            }
+                
+        except Exception as e:
+            print(f"❌ Error en consulta: {e}")
+            if prepared:
+                db.forget_statement(statement, dictionary=not tuple_rows)
+            if db.conn is not None:
+                db.conn.rollback()
+            outcome = {
+                "result": None,
+                "execution_time": time.time() - start_time,
+                "cached": False,
+                "error": str(e),
+                "error_class": error_class(e),
+                "timeout": timeout,
+            }
+            if is_interrupted(e):
+                # Sin motivo registrado la interrumpió MySQL (hint MAX_EXECUTION_TIME)
+                outcome["timed_out"] = control.reason in (None, "timeout")
+                outcome["cancelled"] = control.reason == "cancelled"
+            return outcome
+        finally:
+            watchdog.unwatch(watch)
+            control.detach()
+            if tuple_rows and cursor is not None and not prepared and not truncated and db.conn is not None:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+    
+    # La estimación usa otra conexión: se pide después de devolver la de la consulta
+    return _finish_result(outcome, query, params, result_format if tuple_rows else "json", columns)
+
+def _finish_result(
+    outcome: Dict[str, Any],
+    query: str,
+    params: Optional[Union[Tuple, List]],
+    result_format: str = "json",
+    columns: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Añade rows_returned y estimated_total a los SELECT y codifica las filas de tupla"""
+    result = outcome["result"]
+    if not isinstance(result, list):
+        outcome.pop("truncated", None)
+        return outcome
+    outcome["rows_returned"] = len(result)
+    if outcome.get("truncated"):
+        estimate = estimate_query_rows(query, params)
+        outcome["estimated_total"] = max(estimate, len(result) + 1) if estimate is not None else None
+    else:
+        outcome["estimated_total"] = len(result)
+    if result_format != "json":
+        try:
+            outcome["result"] = encode_rows(columns or [], result, result_format)
+            outcome["format"] = result_format
+        except ValueError as e:
+            outcome["result"] = None
+            outcome["error"] = str(e)
+            outcome["error_class"] = "UnsupportedFormat"
+    return outcome
 
 def execute_query(
     query: str, 
@@ -25,24 +280,38 @@ def execute_query(
           * None en caso de error
         - Tiempo de ejecución en segundos (float)
     """
-    start_time = time.time()
+    # API interna: resultado completo, sin el presupuesto de las respuestas al LLM
+    outcome = execute_query_detailed(query, params, fetch_all, max_rows=0, max_bytes=0)
+    return (outcome["result"], outcome["execution_time"])
+
+async def execute_query_async(
+    query: str,
+    params: Optional[Union[Tuple, List]] = None,
+    fetch_all: bool = True
+) -> Tuple[Union[List[Dict], Dict, int, None], float]:
+    """Versión asíncrona de execute_query: ejecuta la consulta sin bloquear el event loop"""
+    return await run_blocking(execute_query, query, params, fetch_all)
+
+async def execute_query_detailed_async(
+    query: str,
+    params: Optional[Union[Tuple, List]] = None,
+    fetch_all: bool = True,
+    use_cache: bool = True,
+    timeout: Optional[float] = None,
+    max_rows: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    result_format: str = "json"
+) -> Dict[str, Any]:
+    """
+    Versión asíncrona de execute_query_detailed
     
-    with MySQLConnector() as db:
-        try:
-            db.cursor.execute(query, params or ())
-            
-            if query.strip().upper().startswith(('INSERT', 'UPDATE', 'DELETE')):
-                db.conn.commit()
-                result = db.cursor.rowcount
-            else:
-                result = db.cursor.fetchall() if fetch_all else db.cursor.fetchone()
-                result = db.normalize_keys(result)
-                
-            execution_time = time.time() - start_time
-            return (result, execution_time)
-                
-        except Exception as e:
-            execution_time = time.time() - start_time
-            print(f"❌ Error en consulta: {e}")
-            db.conn.rollback()
-            return (None, execution_time)
\ No newline at end of file
+    Si la tarea se cancela (p. ej. el cliente MCP se desconecta) la consulta en
+    curso se cancela en MySQL con KILL QUERY.
+    """
+    control = QueryControl()
+    try:
+        return await run_blocking(execute_query_detailed, query, params, fetch_all, use_cache,
+                                  timeout, control, max_rows, max_bytes, result_format)
+    except asyncio.CancelledError:
+        await asyncio.to_thread(control.cancel, "cancelled")
+        raise
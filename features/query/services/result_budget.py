@@ -0,0 +1,78 @@
+from typing import Any, Dict, List, Sequence, Tuple, Union
+import os
+
+# Límites de las respuestas de SELECT enviadas al LLM (0 = sin límite)
+QUERY_MAX_ROWS = int(os.getenv("QUERY_MAX_ROWS", 1000))
+QUERY_MAX_BYTES = int(os.getenv("QUERY_MAX_BYTES", 1048576))
+QUERY_FETCH_BATCH = int(os.getenv("QUERY_FETCH_BATCH", 200))
+
+
+def estimate_row_bytes(row: Union[Dict[str, Any], Sequence[Any]]) -> int:
+    """
+    Tamaño aproximado de una fila serializada en JSON (comillas y separadores incluidos)
+
+    En las filas dict se cuentan también las claves, que se repiten en cada fila;
+    en las filas tupla solo los valores.
+    """
+    size = 2
+    if isinstance(row, dict):
+        for key, value in row.items():
+            size += len(key) + 6
+            size += 4 if value is None else len(str(value))
+        return size
+    for value in row:
+        size += 3 + (4 if value is None else len(str(value)))
+    return size
+
+
+def fetch_within_budget(
+    cursor,
+    max_rows: int = QUERY_MAX_ROWS,
+    max_bytes: int = QUERY_MAX_BYTES,
+    batch_size: int = QUERY_FETCH_BATCH
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Lee filas con fetchmany hasta agotar el resultado o el presupuesto
+
+    El cursor no debe tener buffer: las filas que no se piden no salen de MySQL.
+
+    Returns:
+        (filas, truncated) — truncated es True si quedaron filas sin leer
+    """
+    rows: List[Dict[str, Any]] = []
+    used_bytes = 0
+    while True:
+        size = batch_size
+        if max_rows:
+            # Pedir una fila de más para saber si el resultado continúa
+            size = min(size, max_rows + 1 - len(rows))
+        batch = cursor.fetchmany(size)
+        for row in batch:
+            if (max_rows and len(rows) >= max_rows) or (max_bytes and used_bytes >= max_bytes):
+                return rows, True
+            rows.append(row)
+            used_bytes += estimate_row_bytes(row)
+        if len(batch) < size:
+            return rows, False
+        if max_bytes and used_bytes >= max_bytes:
+            return rows, bool(cursor.fetchmany(1))
+
+
+def apply_budget(
+    rows: List[Dict[str, Any]],
+    max_rows: int = QUERY_MAX_ROWS,
+    max_bytes: int = QUERY_MAX_BYTES
+) -> Tuple[List[Dict[str, Any]], bool]:
+    """Recorta una lista ya en memoria (p. ej. de la caché) con el mismo presupuesto"""
+    if max_rows and len(rows) > max_rows:
+        rows, truncated = rows[:max_rows], True
+    else:
+        truncated = False
+    if max_bytes:
+        used_bytes = 0
+        for index, row in enumerate(rows):
+            if used_bytes >= max_bytes:
+                return rows[:index], True
+            used_bytes += estimate_row_bytes(row)
+    return rows, truncated
+
@@ -0,0 +1,79 @@
+from typing import Any, Dict, List, Sequence, Union
+from datetime import date, datetime, time, timedelta
+import base64
+import csv
+import io
+
+# Formatos de respuesta de los SELECT
+RESULT_FORMATS = ("json", "rows", "columnar", "csv", "arrow")
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (bytes, bytearray)):
+        return base64.b64encode(value).decode("ascii")
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return value
+
+
+def to_rows(columns: List[str], rows: List[Sequence[Any]]) -> Dict[str, Any]:
+    """Lista de columnas y una lista de valores por fila"""
+    return {"columns": columns, "rows": [list(row) for row in rows]}
+
+
+def to_columns(columns: List[str], rows: List[Sequence[Any]]) -> Dict[str, Any]:
+    """Lista de columnas y un array de valores por columna"""
+    values = [list(column) for column in zip(*rows)] if rows else [[] for _ in columns]
+    return {"columns": columns, "values": values}
+
+
+def to_csv(columns: List[str], rows: List[Sequence[Any]]) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+    return buffer.getvalue()
+
+
+def _arrow_value(value: Any) -> Any:
+    # Arrow no tiene tipo para TIME de MySQL (timedelta): se envía como texto
+    if isinstance(value, timedelta):
+        return str(value)
+    return value
+
+
+def to_arrow(columns: List[str], rows: List[Sequence[Any]]) -> str:
+    """Tabla Arrow en formato IPC stream codificada en base64 (requiere pyarrow)"""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ValueError("El formato 'arrow' requiere el paquete pyarrow (pip install pyarrow)")
+    arrays = []
+    for index in range(len(columns)):
+        values = [_arrow_value(row[index]) for row in rows]
+        try:
+            arrays.append(pa.array(values))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Columnas con tipos mezclados: se envían como texto
+            arrays.append(pa.array([None if v is None else str(v) for v in values], type=pa.string()))
+    table = pa.Table.from_arrays(arrays, names=columns)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return base64.b64encode(sink.getvalue()).decode("ascii")
+
+
+def encode_rows(columns: List[str], rows: List[Sequence[Any]], result_format: str) -> Union[str, Dict[str, Any], List[Dict[str, Any]]]:
+    """Codifica filas en forma de tupla en el formato de respuesta pedido"""
+    if result_format == "rows":
+        return to_rows(columns, rows)
+    if result_format == "columnar":
+        return to_columns(columns, rows)
+    if result_format == "csv":
+        return to_csv(columns, rows)
+    if result_format == "arrow":
+        return to_arrow(columns, rows)
+    return [dict(zip(columns, row)) for row in rows]
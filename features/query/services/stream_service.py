@@ -0,0 +1,254 @@
+from core import MySQLConnector, run_blocking
+from core.sql_classifier import classify
+from typing import Union, List, Dict, Tuple, Optional, Any
+import os
+import threading
+import time
+import uuid
+
+# Cada flujo abierto retiene una conexión del pool, por eso el número está acotado
+STREAM_MAX_OPEN = int(os.getenv("STREAM_MAX_OPEN", 4))
+STREAM_IDLE_TIMEOUT = float(os.getenv("STREAM_IDLE_TIMEOUT", 120))
+STREAM_MAX_PAGE_SIZE = int(os.getenv("STREAM_MAX_PAGE_SIZE", 5000))
+
+
+class _QueryStream:
+    """Consulta en curso con su conexión, generador de lotes y progreso"""
+
+    def __init__(self, query: str, page_size: int):
+        self.db = MySQLConnector.for_query(query)
+        self.query = query
+        self.page_size = page_size
+        self.batches = None
+        self.pages_sent = 0
+        self.rows_sent = 0
+        self.last_access = time.monotonic()
+        self.lock = threading.RLock()
+
+    def open(self, params) -> bool:
+        if not self.db.connect():
+            return False
+        self.batches = self.db.stream_query(self.query, params, self.page_size)
+        return True
+
+    def next_page(self) -> List[Dict]:
+        page = next(self.batches, [])
+        # El tiempo de inactividad cuenta desde que el cliente recibe la página
+        self.last_access = time.monotonic()
+        self.pages_sent += 1
+        self.rows_sent += len(page)
+        return page
+
+    def close(self):
+        if self.batches is not None:
+            self.batches.close()
+            self.batches = None
+        self.db.disconnect()
+
+
+_streams: Dict[str, _QueryStream] = {}
+_streams_lock = threading.Lock()
+_reaper: Optional[threading.Thread] = None
+
+
+def _reap_idle_streams():
+    """Cierra los flujos abandonados por el cliente"""
+    now = time.monotonic()
+    with _streams_lock:
+        expired = [token for token, stream in _streams.items()
+                   if now - stream.last_access > STREAM_IDLE_TIMEOUT]
+        streams = [_streams.pop(token) for token in expired]
+    for stream in streams:
+        with stream.lock:
+            stream.close()
+
+
+def _reap_loop():
+    while True:
+        time.sleep(max(1.0, STREAM_IDLE_TIMEOUT / 4))
+        try:
+            _reap_idle_streams()
+        except Exception as e:
+            print(f"❌ Error al cerrar flujos inactivos: {e}")
+
+
+def _ensure_reaper():
+    """Hilo que cierra los flujos inactivos aunque no lleguen más peticiones"""
+    global _reaper
+    if _reaper is not None:
+        return
+    with _streams_lock:
+        if _reaper is None:
+            _reaper = threading.Thread(target=_reap_loop, name="stream-reaper", daemon=True)
+            _reaper.start()
+
+
+def _reserve_slot(token: str, stream: _QueryStream) -> bool:
+    """Registra el flujo si queda hueco; la comprobación y la inserción van bajo el mismo bloqueo"""
+    with _streams_lock:
+        if len(_streams) >= STREAM_MAX_OPEN:
+            return False
+        _streams[token] = stream
+        return True
+
+
+def _page_response(stream: _QueryStream, rows: List[Dict], token: Optional[str],
+                   start_time: float) -> Dict[str, Any]:
+    return {
+        "result": rows,
+        "page": stream.pages_sent,
+        "rows_returned": len(rows),
+        "rows_sent": stream.rows_sent,
+        "has_more": token is not None,
+        "continuation_token": token,
+        "execution_time": time.time() - start_time,
+        "success": True,
+    }
+
+
+def start_query_stream(
+    query: str,
+    params: Optional[Union[Tuple, List]] = None,
+    page_size: int = 1000
+) -> Dict[str, Any]:
+    """
+    Ejecuta una consulta de lectura en modo streaming y devuelve la primera página
+
+    Args:
+        query: Consulta SELECT a ejecutar
+        params: Parámetros para la consulta
+        page_size: Número de filas por página (acotado por STREAM_MAX_PAGE_SIZE)
+
+    Returns:
+        Dict con las filas de la página, progreso y un continuation_token
+        (None cuando ya no quedan filas)
+    """
+    start_time = time.time()
+    if not classify(query).read_only:
+        # Una escritura en streaming no se confirmaría: el pool la revertiría al devolver la conexión
+        return {
+            "result": None,
+            "error": "El modo streaming solo admite consultas SELECT de solo lectura",
+            "error_class": "NotReadOnly",
+            "execution_time": time.time() - start_time,
+            "success": False,
+        }
+    _ensure_reaper()
+
+    page_size = max(1, min(page_size, STREAM_MAX_PAGE_SIZE))
+    stream = _QueryStream(query, page_size)
+    token = uuid.uuid4().hex
+    # Sin hueco se cierran antes los flujos inactivos y se vuelve a intentar
+    if not _reserve_slot(token, stream):
+        _reap_idle_streams()
+        if not _reserve_slot(token, stream):
+            return {
+                "result": None,
+                "error": f"Hay {STREAM_MAX_OPEN} flujos abiertos (el máximo); "
+                         "consuma o cierre alguno antes de abrir otro",
+                "execution_time": time.time() - start_time,
+                "success": False,
+            }
+
+    with stream.lock:
+        try:
+            if not stream.open(params):
+                raise RuntimeError("No se pudo obtener una conexión")
+            rows = stream.next_page()
+        except Exception as e:
+            print(f"❌ Error en consulta: {e}")
+            close_query_stream(token)
+            return {
+                "result": None,
+                "error": str(e),
+                "execution_time": time.time() - start_time,
+                "success": False,
+            }
+
+    if len(rows) < page_size:
+        close_query_stream(token)
+        token = None
+
+    return _page_response(stream, rows, token, start_time)
+
+
+def fetch_query_page(continuation_token: str) -> Dict[str, Any]:
+    """
+    Obtiene la siguiente página de un flujo abierto con start_query_stream
+
+    Args:
+        continuation_token: Token devuelto por la página anterior
+
+    Returns:
+        Dict con las filas de la página y el token de la siguiente (None al terminar)
+    """
+    start_time = time.time()
+    with _streams_lock:
+        stream = _streams.get(continuation_token)
+    if stream is None:
+        return {
+            "result": None,
+            "error": "continuation_token desconocido o caducado",
+            "execution_time": time.time() - start_time,
+            "success": False,
+        }
+
+    with stream.lock:
+        try:
+            rows = stream.next_page()
+        except Exception as e:
+            print(f"❌ Error en consulta: {e}")
+            close_query_stream(continuation_token)
+            return {
+                "result": None,
+                "error": str(e),
+                "execution_time": time.time() - start_time,
+                "success": False,
+            }
+
+    token = continuation_token
+    if len(rows) < stream.page_size:
+        close_query_stream(continuation_token)
+        token = None
+
+    return _page_response(stream, rows, token, start_time)
+
+
+def close_query_stream(continuation_token: str) -> bool:
+    """Cierra un flujo y libera su conexión; devuelve False si no existía"""
+    with _streams_lock:
+        stream = _streams.pop(continuation_token, None)
+    if stream is None:
+        return False
+    with stream.lock:
+        stream.close()
+    return True
+
+
+def get_stream_stats() -> Dict[str, Any]:
+    """Número de flujos abiertos y límites configurados"""
+    with _streams_lock:
+        return {
+            "open_streams": len(_streams),
+            "max_open_streams": STREAM_MAX_OPEN,
+            "idle_timeout": STREAM_IDLE_TIMEOUT,
+        }
+
+
+async def start_query_stream_async(
+    query: str,
+    params: Optional[Union[Tuple, List]] = None,
+    page_size: int = 1000
+) -> Dict[str, Any]:
+    """Versión asíncrona de start_query_stream"""
+    return await run_blocking(start_query_stream, query, params, page_size)
+
+
+async def fetch_query_page_async(continuation_token: str) -> Dict[str, Any]:
+    """Versión asíncrona de fetch_query_page"""
+    return await run_blocking(fetch_query_page, continuation_token)
+
+
+async def close_query_stream_async(continuation_token: str) -> bool:
+    """Versión asíncrona de close_query_stream"""
+    return await run_blocking(close_query_stream, continuation_token)
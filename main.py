@@ -12,6 +12,7 @@ def main():
         print("    3. La base de datos exista")
         print("    4. El usuario tenga permisos adecuados")
         sys.exit(1)
+    db.close()
     
     server = create_server()
     
@@ -0,0 +1,113 @@
+import json
+import pytest
+from features.learning.services.note_store import NoteStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return NoteStore(str(tmp_path / "notes.db"), str(tmp_path / "legacy.json"))
+
+
+def _note(note_id, query, success=True, note="", tags=(), created_at=None, execution_time=0.1):
+    return {"id": note_id, "query": query, "query_type": query.split()[0].upper(),
+            "execution_time": execution_time, "rows_affected": 1, "success": success,
+            "note": note, "tags": list(tags), "created_at": created_at}
+
+
+def test_add_and_find_notes(store):
+    store.add_note(_note("a", "SELECT * FROM users", tags=["users"], created_at="2026-01-01T00:00:00"))
+    store.add_note(_note("b", "DELETE FROM users", success=False, created_at="2026-01-02T00:00:00"))
+    # Un id repetido no duplica la nota
+    store.add_note(_note("a", "SELECT * FROM users", created_at="2026-01-03T00:00:00"))
+
+    assert [n["id"] for n in store.find_notes()] == ["a", "b"]
+    assert [n["id"] for n in store.find_notes(newest_first=True)] == ["b", "a"]
+    assert [n["id"] for n in store.find_notes(tags=["users"])] == ["a"]
+    assert [n["id"] for n in store.find_notes(success=False)] == ["b"]
+    assert [n["id"] for n in store.find_notes(date_from="2026-01-02")] == ["b"]
+
+
+def test_page_notes_with_cursor_visits_every_note_once(store):
+    for i in range(7):
+        store.add_note(_note(f"n{i}", f"SELECT {i}", created_at="2026-01-01T00:00:00"))
+    seen, cursor = [], None
+    while True:
+        notes, cursor = store.page_notes(limit=3, cursor=cursor)
+        seen.extend(n["id"] for n in notes)
+        if cursor is None:
+            break
+    assert sorted(seen) == [f"n{i}" for i in range(7)]
+    assert len(seen) == 7
+
+
+@pytest.mark.parametrize("filters, count", [
+    ({}, 3),
+    ({"success": True}, 2),
+    ({"query_type": "SELECT"}, 2),
+    ({"query_type": "SELECT", "success": False}, 0),
+    ({"contains": "orders"}, 1),
+])
+def test_count_notes(store, filters, count):
+    store.add_note(_note("a", "SELECT * FROM users"))
+    store.add_note(_note("b", "SELECT * FROM orders"))
+    store.add_note(_note("c", "DELETE FROM users", success=False))
+    assert store.count_notes(**filters) == count
+
+
+def test_aggregate_stats_from_aggregates_and_notes_agree(store):
+    store.add_note(_note("a", "SELECT * FROM users", execution_time=0.2))
+    store.add_note(_note("b", "DELETE FROM users", success=False, execution_time=0.4))
+    from_aggregates = store.aggregate_stats()
+    from_notes = store.aggregate_stats(contains="users")
+    assert from_aggregates == from_notes
+    assert from_aggregates["success_rate"] == 0.5
+    assert from_aggregates["count_by_type"] == {"SELECT": 1, "DELETE": 1}
+
+
+def test_legacy_json_is_imported_once(tmp_path):
+    legacy = tmp_path / "legacy.json"
+    legacy.write_text(json.dumps([{"id": "old", "query": "SELECT 1", "success": True,
+                                   "created_at": "2025-01-01T00:00:00"}]))
+    store = NoteStore(str(tmp_path / "notes.db"), str(legacy))
+    assert [n["id"] for n in store.find_notes()] == ["old"]
+    assert not legacy.exists()
+    assert (tmp_path / "legacy.json.migrated").exists()
+
+
+def test_search_keeps_common_terms_when_selective_ones_miss_the_filters(store):
+    # "orders" está en casi todas las notas; "archive" solo en una nota fallida
+    for i in range(5):
+        store.add_note(_note(f"ok-{i}", f"SELECT * FROM orders WHERE id = {i}"))
+    store.add_note(_note("failed", "SELECT * FROM orders_archive JOIN orders", success=False,
+                         note="archive"))
+
+    results = store.search_notes("orders archive", limit=3, success=True)
+
+    assert len(results) == 3
+    assert all(note["success"] for note in results)
+
+
+def test_search_ranks_selective_terms_first(store):
+    for i in range(5):
+        store.add_note(_note(f"ok-{i}", f"SELECT * FROM orders WHERE id = {i}"))
+    store.add_note(_note("archive", "SELECT * FROM orders", note="archive"))
+
+    results = store.search_notes("orders archive", limit=10)
+
+    assert results[0]["id"] == "archive"
+    assert len(results) == 6
+
+
+def test_telemetry_never_becomes_the_fingerprint_example(store):
+    store.record_executions([{"query": "SELECT * FROM users WHERE email = 'ana@example.com'",
+                              "execution_time": 0.2, "success": True}])
+    assert store.top_fingerprints()[0]["example_query"] is None
+
+    store.add_note(_note("first", "SELECT * FROM users WHERE email = 'demo'"))
+    store.add_note(_note("second", "SELECT * FROM users WHERE email = 'other'"))
+    store.record_executions([{"query": "SELECT * FROM users WHERE email = 'bob@example.com'",
+                              "execution_time": 0.2, "success": True}])
+
+    [similar] = store.similar_fingerprints("SELECT * FROM users WHERE email = ?")
+    assert similar["example_query"] == "SELECT * FROM users WHERE email = 'demo'"
+    assert similar["executions"] == 4
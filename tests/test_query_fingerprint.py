@@ -0,0 +1,32 @@
+import pytest
+from features.learning.services.note_store import NoteStore
+from features.learning.services.query_fingerprint import fingerprint_query
+
+
+@pytest.mark.parametrize("bare, aliased", [
+    ("SELECT * FROM orders WHERE id = 1", "SELECT * FROM orders o WHERE o.id = 10"),
+    ("SELECT id, total FROM orders WHERE id = 1", "SELECT o.id, o.total FROM orders AS o WHERE o.id = 2"),
+    ("SELECT * FROM orders WHERE id = 1", "SELECT * FROM orders WHERE orders.id = 3"),
+    ("UPDATE orders SET total = 1 WHERE id = 2", "UPDATE orders o SET o.total = 5 WHERE o.id = 7"),
+])
+def test_single_table_alias_and_bare_columns_share_fingerprint(bare, aliased):
+    assert fingerprint_query(bare) == fingerprint_query(aliased)
+
+
+def test_join_keeps_column_qualifiers():
+    fingerprint = fingerprint_query(
+        "SELECT o.id, c.name FROM orders o JOIN customers c ON c.id = o.customer_id"
+    )
+    assert fingerprint == ("SELECT orders.id , customers.name FROM orders JOIN customers "
+                           "ON customers.id = orders.customer_id")
+
+
+def test_alias_and_bare_queries_aggregate_into_one_fingerprint(tmp_path):
+    store = NoteStore(str(tmp_path / "notes.db"), str(tmp_path / "legacy.json"))
+    store.record_executions([
+        {"query": "SELECT * FROM orders WHERE id = 1", "execution_time": 0.1, "success": True},
+        {"query": "SELECT * FROM orders o WHERE o.id = 10", "execution_time": 0.3, "success": True},
+    ])
+    fingerprints = store.top_fingerprints()
+    assert len(fingerprints) == 1
+    assert fingerprints[0]["executions"] == 2
@@ -0,0 +1,54 @@
+import pytest
+from features.query.services.result_budget import apply_budget, estimate_row_bytes, fetch_within_budget
+
+
+class FakeCursor:
+    """Cursor sin buffer simulado: cuenta las filas que salen del servidor"""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.fetched = 0
+
+    def fetchmany(self, size):
+        batch = self.rows[self.fetched:self.fetched + size]
+        self.fetched += len(batch)
+        return batch
+
+
+ROWS = [{"id": i, "name": "x" * 10} for i in range(50)]
+
+
+@pytest.mark.parametrize("max_rows, max_bytes, expected_rows, truncated", [
+    (0, 0, 50, False),
+    (100, 0, 50, False),
+    (50, 0, 50, False),
+    (10, 0, 10, True),
+    (0, estimate_row_bytes(ROWS[0]) * 5, 5, True),
+    (3, estimate_row_bytes(ROWS[0]) * 5, 3, True),
+])
+def test_fetch_within_budget(max_rows, max_bytes, expected_rows, truncated):
+    rows, was_truncated = fetch_within_budget(FakeCursor(ROWS), max_rows, max_bytes, batch_size=7)
+    assert rows == ROWS[:expected_rows]
+    assert was_truncated is truncated
+
+
+def test_fetch_within_budget_stops_reading_at_the_row_limit():
+    cursor = FakeCursor(ROWS)
+    fetch_within_budget(cursor, max_rows=10, max_bytes=0, batch_size=200)
+    # Solo una fila de más para saber si el resultado continúa
+    assert cursor.fetched == 11
+
+
+@pytest.mark.parametrize("max_rows, max_bytes, expected_rows, truncated", [
+    (0, 0, 50, False),
+    (10, 0, 10, True),
+    (50, 0, 50, False),
+    (0, estimate_row_bytes(ROWS[0]) * 5, 5, True),
+])
+def test_apply_budget_matches_fetch(max_rows, max_bytes, expected_rows, truncated):
+    assert apply_budget(ROWS, max_rows, max_bytes) == (ROWS[:expected_rows], truncated)
+    assert fetch_within_budget(FakeCursor(ROWS), max_rows, max_bytes) == (ROWS[:expected_rows], truncated)
+
+
+def test_estimate_row_bytes_counts_keys_only_for_dicts():
+    assert estimate_row_bytes({"id": 1, "name": None}) > estimate_row_bytes((1, None))
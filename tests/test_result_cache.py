@@ -0,0 +1,77 @@
+import pytest
+from core.result_cache import ResultCache, is_cacheable, normalize_query
+
+
+@pytest.fixture
+def cache():
+    return ResultCache(max_bytes=1024, ttl=60)
+
+
+def test_put_and_get(cache):
+    key = ResultCache.make_key("SELECT * FROM users", None, True)
+    assert cache.get(key) == (False, None)
+    assert cache.put(key, [{"id": 1}], {"users"})
+    assert cache.get(key) == (True, [{"id": 1}])
+    assert cache.stats()["hits"] == 1
+
+
+def test_make_key_ignores_whitespace_but_not_literals():
+    assert ResultCache.make_key("SELECT  *\nFROM users;", None, True) == \
+        ResultCache.make_key("SELECT * FROM users", None, True)
+    assert normalize_query("SELECT 'a  b'") == "SELECT 'a  b'"
+
+
+def test_invalidate_tables_drops_only_matching_entries(cache):
+    users = ResultCache.make_key("SELECT * FROM users", None, True)
+    orders = ResultCache.make_key("SELECT * FROM orders", None, True)
+    cache.put(users, [1], {"users"})
+    cache.put(orders, [2], {"orders"})
+    assert cache.invalidate_tables(["USERS"]) == 1
+    assert cache.get(users) == (False, None)
+    assert cache.get(orders) == (True, [2])
+
+
+def test_stale_generation_is_not_stored(cache):
+    key = ResultCache.make_key("SELECT * FROM users", None, True)
+    generation = cache.generation({"users"})
+    # Escritura concurrente entre la lectura y el put
+    cache.invalidate_tables(["users"])
+    assert not cache.put(key, [1], {"users"}, generation)
+    assert cache.put(key, [1], {"users"}, cache.generation({"users"}))
+
+
+def test_clear_invalidates_pending_generations(cache):
+    generation = cache.generation({"users"})
+    cache.clear()
+    assert not cache.put(ResultCache.make_key("SELECT 1", None, True), [1], {"users"}, generation)
+
+
+def test_lru_eviction_by_size(cache):
+    first = ResultCache.make_key("SELECT * FROM a", None, True)
+    second = ResultCache.make_key("SELECT * FROM b", None, True)
+    cache.put(first, ["x" * 600], {"a"})
+    cache.put(second, ["y" * 600], {"b"})
+    assert cache.get(first) == (False, None)
+    assert cache.get(second)[0]
+    assert cache.stats()["evictions"] == 1
+    assert not cache.put(first, ["z" * 2000], {"a"})
+
+
+def test_expired_entries_miss():
+    cache = ResultCache(max_bytes=1024, ttl=-1)
+    key = ResultCache.make_key("SELECT * FROM users", None, True)
+    cache.put(key, [1], {"users"})
+    assert cache.get(key) == (False, None)
+    assert cache.stats()["expirations"] == 1
+
+
+@pytest.mark.parametrize("query, cacheable", [
+    ("SELECT * FROM users", True),
+    ("SELECT NOW() FROM users", False),
+    ("SELECT * FROM users FOR UPDATE", False),
+    ("SELECT 1", False),
+    ("SHOW TABLES", False),
+    ("DELETE FROM users", False),
+])
+def test_is_cacheable(query, cacheable):
+    assert is_cacheable(query) is cacheable
@@ -0,0 +1,77 @@
+import pytest
+from core.sql_classifier import SQLClassifier, classify
+
+
+@pytest.mark.parametrize("query, statement_type, read_only, is_write, tables_read, tables_written", [
+    ("SELECT * FROM users", "SELECT", True, False, {"users"}, set()),
+    ("SELECT * FROM db.`Users` u JOIN orders o ON o.uid = u.id", "SELECT", True, False, {"users", "orders"}, set()),
+    ("REPLACE INTO users (id) VALUES (1)", "REPLACE", False, True, set(), {"users"}),
+    ("INSERT INTO logs SELECT * FROM users", "INSERT", False, True, {"users"}, {"logs"}),
+    ("DELETE FROM users WHERE id = 1", "DELETE", False, True, set(), {"users"}),
+    ("WITH t AS (SELECT id FROM a) UPDATE users JOIN t ON t.id = users.id SET users.x = 1",
+     "UPDATE", False, True, {"a"}, {"users"}),
+    # El nombre de la CTE no es una tabla
+    ("WITH recent AS (SELECT * FROM orders) SELECT * FROM recent", "SELECT", True, False, {"orders"}, set()),
+    ("TRUNCATE TABLE users", "TRUNCATE", False, True, set(), {"users"}),
+    ("CREATE INDEX idx_email ON users (email)", "CREATE", False, True, set(), {"users"}),
+    ("EXPLAIN SELECT * FROM users", "EXPLAIN", True, False, {"users"}, set()),
+    ("SHOW TABLES", "SHOW", True, False, set(), set()),
+    ("CALL refresh_stats()", "CALL", False, False, set(), set()),
+    ("DO SLEEP(1)", "DO", False, False, set(), set()),
+    ("LOCK TABLES users WRITE", "LOCK", False, False, set(), set()),
+])
+def test_statement_classification(query, statement_type, read_only, is_write, tables_read, tables_written):
+    info = classify(query)
+    assert info.statement_type == statement_type
+    assert info.read_only is read_only
+    assert info.is_write is is_write
+    assert info.tables_read == tables_read
+    assert info.tables_written == tables_written
+
+
+@pytest.mark.parametrize("query", [
+    "SELECT * FROM users WHERE id = 1 FOR UPDATE",
+    "SELECT * FROM users LOCK IN SHARE MODE",
+    "SELECT GET_LOCK('job', 10)",
+])
+def test_locking_reads_are_not_read_only(query):
+    info = classify(query)
+    assert info.locking
+    assert not info.read_only
+    assert not info.deterministic
+
+
+@pytest.mark.parametrize("query, statements, read_only", [
+    ("SELECT 1; DELETE FROM users", 2, False),
+    ("SELECT 1; SELECT 2", 2, False),
+    ("SELECT 1;", 1, True),
+    ("SELECT ';' FROM users -- ;", 1, True),
+])
+def test_multiple_statements_are_never_read_only(query, statements, read_only):
+    info = classify(query)
+    assert info.statements == statements
+    assert info.read_only is read_only
+
+
+@pytest.mark.parametrize("query, deterministic, select_into", [
+    ("SELECT id FROM users WHERE id = 1", True, False),
+    ("SELECT NOW(), RAND() FROM users", False, False),
+    ("SELECT * FROM users INTO OUTFILE '/tmp/users.csv'", True, True),
+])
+def test_determinism_and_select_into(query, deterministic, select_into):
+    info = classify(query)
+    assert info.deterministic is deterministic
+    assert info.select_into is select_into
+    assert info.read_only is not select_into
+
+
+def test_classifier_memoizes_and_evicts():
+    classifier = SQLClassifier(max_entries=2)
+    first = classifier.classify("SELECT * FROM a")
+    assert classifier.classify("SELECT * FROM a") is first
+    classifier.classify("SELECT * FROM b")
+    classifier.classify("SELECT * FROM c")
+    stats = classifier.stats()
+    assert stats["hits"] == 1
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1